@@ -0,0 +1,228 @@
+# analytics.py
+
+import argparse
+import os
+import sqlite3
+import sys
+from datetime import date, timedelta
+
+import archive_orders
+import db_profiles
+import migrations
+import queries
+import table_renderer
+
+# Periods the order reports can be broken down by (see ROLLUP_PERIODS in
+# migrations.py).
+GRAINS = tuple(migrations.ROLLUP_PERIODS)
+
+# Earliest and latest period start, used when no date range is given.
+FIRST_DATE = "0000-01-01"
+LAST_DATE = "9999-12-31"
+
+# The reports, by name: the registered query, the column headers, and
+# whether the query takes a period range and a top-N limit.
+REPORTS = {
+    'orders': {
+        'query': 'order_totals',
+        'title': "Orders per {grain}",
+        'headers': ("Period", "Orders", "Quantity", "Change", "Running Total"),
+        'periods': True,
+        'top': False,
+    },
+    'suppliers': {
+        'query': 'rollup_by_supplier',
+        'title': "Top suppliers per {grain} by quantity ordered",
+        'headers': ("Period", "Supplier ID", "Supplier Name", "Orders", "Quantity", "Share %", "Rank"),
+        'periods': True,
+        'top': True,
+    },
+    'departments': {
+        'query': 'rollup_by_department',
+        'title': "Top departments per {grain} by quantity ordered",
+        'headers': ("Period", "Dept ID", "Department Name", "Orders", "Quantity", "Share %", "Rank"),
+        'periods': True,
+        'top': True,
+    },
+    'revenue': {
+        'query': 'revenue_by_product',
+        'title': "Revenue per product",
+        'headers': ("Product ID", "Product Name", "Department", "Sold", "Revenue", "Share %",
+                    "Dept Rank", "Rank"),
+        'periods': False,
+        'top': True,
+    },
+    'department-revenue': {
+        'query': 'revenue_by_department',
+        'title': "Revenue per department",
+        'headers': ("Dept ID", "Department Name", "Products", "Sold", "Revenue", "Share %", "Rank"),
+        'periods': False,
+        'top': True,
+    },
+    'payroll': {
+        'query': 'department_payroll',
+        'title': "Payroll per department",
+        'headers': ("Dept ID", "Department Name", "Employees", "Payroll", "Average Salary",
+                    "Highest Salary", "Share %", "Rank"),
+        'periods': False,
+        'top': True,
+    },
+}
+
+def period_start(grain, day):
+    """
+    Returns the start of the day, week (Monday) or month a YYYY-MM-DD date
+    falls in, the same way OrderRollup buckets orders.
+    """
+    value = date.fromisoformat(day)
+    if grain == 'week':
+        value -= timedelta(days=value.weekday())
+    elif grain == 'month':
+        value = value.replace(day=1)
+    return value.isoformat()
+
+def report_parameters(report, grain='month', date_from=None, date_to=None, top=None):
+    """
+    Returns the parameters of a report's query. The range covers every
+    period that overlaps date_from..date_to; top None keeps every row.
+    """
+    spec = REPORTS[report]
+    params = []
+    if spec['periods']:
+        if grain not in GRAINS:
+            raise ValueError(f"unknown grain '{grain}' (use one of {', '.join(GRAINS)})")
+        params += [grain,
+                   period_start(grain, date_from) if date_from else FIRST_DATE,
+                   date_to or LAST_DATE]
+    if spec['top']:
+        params.append(top if top is not None else sys.maxsize)
+    return params
+
+def run_report(conn, report, grain='month', date_from=None, date_to=None, top=None):
+    """
+    Returns a cursor over the rows of a report (see REPORTS).
+    """
+    return queries.execute(conn, REPORTS[report]['query'],
+                           report_parameters(report, grain, date_from, date_to, top))
+
+def show_report(conn, report, grain='month', date_from=None, date_to=None, top=None, stream=None):
+    """
+    Prints a report as a table. Returns the number of rows shown.
+    """
+    spec = REPORTS[report]
+    count = table_renderer.render(spec['headers'], run_report(conn, report, grain, date_from, date_to, top),
+                                  title=spec['title'].format(grain=grain) + ":", stream=stream)
+    if not count:
+        print("No data for this report.")
+    return count
+
+def rollup_source(conn):
+    """
+    Returns what OrderRollup is computed from: the order_history view when
+    the archive is attached, since archived orders stay in the rollup (see
+    archive_orders.archive_orders), and otherwise Orders.
+    """
+    return "order_history" if archive_orders.is_attached(conn) else "Orders"
+
+def verify_rollup(conn):
+    """
+    Compares OrderRollup with a full recomputation from Orders and the
+    attached archive. Returns a list of (bucket, rollup values, recomputed
+    values) for every bucket that differs; an empty list means the rollup
+    is correct. Buckets whose orders were all deleted hold zeros and count
+    as missing.
+    """
+    rollup = {row[:4]: row[4:] for row in conn.execute(
+        "SELECT grain, dimension, period_start, key, order_count, total_quantity "
+        "FROM OrderRollup WHERE order_count != 0 OR total_quantity != 0")}
+    mismatches = []
+    for query in migrations.rollup_queries(rollup_source(conn)):
+        for row in conn.execute(query):
+            expected = row[4:]
+            actual = rollup.pop(row[:4], None)
+            if actual != expected:
+                mismatches.append((row[:4], actual, expected))
+    for bucket, actual in rollup.items():
+        mismatches.append((bucket, actual, None))
+    return sorted(mismatches, key=lambda mismatch: mismatch[0])
+
+def rebuild_rollup(conn):
+    """
+    Replaces the contents of OrderRollup with a full recomputation from
+    Orders and the attached archive, e.g. after products moved to another department. Returns the
+    number of rows in the rebuilt rollup.
+    """
+    if conn.in_transaction:
+        conn.commit()
+    try:
+        conn.execute("BEGIN IMMEDIATE")
+        conn.execute("DELETE FROM OrderRollup")
+        count = sum(conn.execute(statement).rowcount for statement in migrations.rollup_fill_statements(rollup_source(conn)))
+        conn.commit()
+        return count
+    except sqlite3.Error:
+        conn.rollback()
+        raise
+
+def parse_date(value):
+    """
+    Checks a YYYY-MM-DD date given on the command line.
+    """
+    try:
+        date.fromisoformat(value)
+    except ValueError:
+        raise argparse.ArgumentTypeError(f"invalid date '{value}' (use YYYY-MM-DD)")
+    return value
+
+def main():
+    parser = argparse.ArgumentParser(
+        description="Order, revenue and payroll reports from the pre-aggregated rollups.")
+    parser.add_argument("report", choices=list(REPORTS) + ["verify", "rebuild"],
+                        help="report to show, or verify/rebuild the OrderRollup table")
+    parser.add_argument("--grain", choices=GRAINS, default="month",
+                        help="period of the order reports (default: month)")
+    parser.add_argument("--from", dest="date_from", type=parse_date, help="first date of the order reports (YYYY-MM-DD)")
+    parser.add_argument("--to", dest="date_to", type=parse_date, help="last date of the order reports (YYYY-MM-DD)")
+    parser.add_argument("--top", type=int, help="keep only the top N entries (per period for the order reports)")
+    parser.add_argument("--database", default="business.db", help="database file (default: business.db)")
+    parser.add_argument("--profile", help="connection profile from db_profiles.py")
+    args = parser.parse_args()
+
+    if not os.path.exists(args.database):
+        print(f"Error: {args.database} does not exist. Run setup_database.py first.")
+        return
+    try:
+        conn, _, _ = db_profiles.connect(args.database, args.profile)
+    except (sqlite3.Error, ValueError) as e:
+        print(f"Error connecting to database: {e}")
+        return
+    if not migrations.migrate(conn, verbose=False):
+        conn.close()
+        return
+
+    try:
+        if args.report in ("rebuild", "verify"):
+            archive_orders.attach_default_archive(conn)
+        if args.report == "rebuild":
+            count = rebuild_rollup(conn)
+            print(f"OrderRollup rebuilt with {count} row(s).")
+        elif args.report == "verify":
+            mismatches = verify_rollup(conn)
+            source = "the live and archived orders" if rollup_source(conn) == "order_history" else "the Orders table"
+            if not mismatches:
+                print(f"OrderRollup matches {source}.")
+            else:
+                print(f"OrderRollup differs from {source} in {len(mismatches)} bucket(s):")
+                table_renderer.render(("Bucket", "Rollup (count, quantity)", "Expected (count, quantity)"),
+                                      [(" ".join(map(str, bucket)), str(actual), str(expected))
+                                       for bucket, actual, expected in mismatches[:20]])
+                print("\nRun 'python3 analytics.py rebuild' to repair it.")
+        else:
+            show_report(conn, args.report, args.grain, args.date_from, args.date_to, args.top)
+    except sqlite3.Error as e:
+        print(f"An error occurred while running the report: {e}")
+    finally:
+        conn.close()
+
+if __name__ == "__main__":
+    main()
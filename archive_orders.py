@@ -0,0 +1,251 @@
+# archive_orders.py
+
+import argparse
+import os
+import sqlite3
+import time
+from datetime import date, timedelta
+
+import bulk_import
+import db_profiles
+import migrations
+
+# Orders older than this many days are moved by default.
+ARCHIVE_AFTER_DAYS = 365
+
+# Orders moved per transaction.
+CHUNK_SIZE = 5000
+
+ORDER_COLUMNS = bulk_import.TABLE_COLUMNS['Orders']
+
+# The archive keeps the Orders columns but no foreign keys: the referenced
+# tables live in the main database, which SQLite cannot reference across files.
+ARCHIVE_SCHEMA = [
+    '''
+    CREATE TABLE IF NOT EXISTS archive.Orders (
+        order_id INTEGER PRIMARY KEY,
+        order_date TEXT NOT NULL,
+        supplier_id INTEGER,
+        product_id INTEGER,
+        order_quantity INTEGER NOT NULL,
+        product_ordered TEXT NOT NULL,
+        supplied_by INTEGER
+    )
+    ''',
+    '''
+    CREATE INDEX IF NOT EXISTS archive.idx_orders_listing
+    ON Orders(order_date, order_id, supplier_id, product_id, supplied_by, order_quantity, product_ordered)
+    ''',
+]
+
+# Live and archived orders together, for the explicit historical views.
+HISTORY_VIEW = f'''
+CREATE TEMP VIEW IF NOT EXISTS order_history AS
+SELECT {', '.join(ORDER_COLUMNS)} FROM main.Orders
+UNION ALL
+SELECT {', '.join(ORDER_COLUMNS)} FROM archive.Orders
+'''
+
+def default_archive_path(database):
+    """
+    Returns the archive file that goes with a database: business.db -> business_archive.db.
+    """
+    root, extension = os.path.splitext(database)
+    return f"{root}_archive{extension or '.db'}"
+
+def is_attached(conn, name='archive'):
+    """
+    Checks whether a database is attached under the given name.
+    """
+    return any(row[1] == name for row in conn.execute("PRAGMA database_list"))
+
+def attach_archive(conn, path, create=False):
+    """
+    Attaches the archive database as "archive" and defines the order_history
+    view over live and archived orders. Returns False if the archive does not
+    exist and create is False.
+    """
+    if is_attached(conn):
+        return True
+    if not create and not os.path.exists(path):
+        return False
+    # ATTACH cannot run inside a transaction.
+    if conn.in_transaction:
+        conn.commit()
+    conn.execute("ATTACH DATABASE ? AS archive", (path,))
+    for statement in ARCHIVE_SCHEMA:
+        conn.execute(statement)
+    conn.execute(HISTORY_VIEW)
+    conn.commit()
+    return True
+
+def attach_default_archive(conn):
+    """
+    Attaches the archive that goes with the connection's main database file.
+    Returns False if there is none yet.
+    """
+    main_file = next(row[2] for row in conn.execute("PRAGMA database_list") if row[1] == 'main')
+    return attach_archive(conn, default_archive_path(main_file))
+
+def detach_archive(conn):
+    """
+    Detaches the archive database again, if it is attached.
+    """
+    if is_attached(conn):
+        if conn.in_transaction:
+            conn.commit()
+        conn.execute("DROP VIEW IF EXISTS temp.order_history")
+        conn.execute("DETACH DATABASE archive")
+
+def cutoff_date(days):
+    """
+    Returns the YYYY-MM-DD date days ago; orders before it get archived.
+    """
+    return (date.today() - timedelta(days=days)).isoformat()
+
+def count_orders(conn, cutoff=None):
+    """
+    Returns (live orders, live orders before cutoff, archived orders).
+    The archive must be attached.
+    """
+    live = conn.execute("SELECT COUNT(*) FROM main.Orders").fetchone()[0]
+    older = 0
+    if cutoff:
+        older = conn.execute("SELECT COUNT(*) FROM main.Orders WHERE order_date < ?", (cutoff,)).fetchone()[0]
+    archived = conn.execute("SELECT COUNT(*) FROM archive.Orders").fetchone()[0]
+    return live, older, archived
+
+def archive_orders(conn, cutoff, chunk_size=CHUNK_SIZE, verbose=True):
+    """
+    Moves orders dated before cutoff from the main database into the attached
+    archive, oldest first, chunk_size orders per transaction.
+
+    Each chunk is copied and then deleted in one transaction. In WAL mode a
+    transaction over attached files is atomic per file only, so orders that
+    already reached the archive with the same content (from a run that was
+    interrupted) are not copied again. An archived order with the same ID
+    but different content raises sqlite3.IntegrityError, as order IDs can be
+    reused once the highest ones are deleted, and nothing in that chunk is
+    moved.
+
+    Archived orders stay in OrderRollup: deleting them from main.Orders
+    fires the rollup's delete trigger, so their contribution is added back
+    in the same transaction and the analytics reports keep the full
+    history. Returns the number of orders moved.
+    """
+    columns = ', '.join(ORDER_COLUMNS)
+    live_columns = ', '.join(f"o.{column}" for column in ORDER_COLUMNS)
+    archived_columns = ', '.join(f"a.{column}" for column in ORDER_COLUMNS)
+    if conn.in_transaction:
+        conn.commit()
+    moved = 0
+    while True:
+        conn.execute("BEGIN")
+        try:
+            # The (date, ID) key of the last order in this chunk, or None if
+            # fewer than chunk_size orders are left to move.
+            boundary = conn.execute('''
+                SELECT order_date, order_id FROM main.Orders
+                WHERE order_date < ?
+                ORDER BY order_date, order_id
+                LIMIT 1 OFFSET ?
+            ''', (cutoff, chunk_size - 1)).fetchone()
+            condition = "o.order_date < ?"
+            params = [cutoff]
+            if boundary:
+                condition += " AND (o.order_date, o.order_id) <= (?, ?)"
+                params.extend(boundary)
+
+            conflict = conn.execute(f'''
+                SELECT o.order_id FROM main.Orders AS o
+                JOIN archive.Orders AS a ON a.order_id = o.order_id
+                WHERE {condition} AND ({live_columns}) IS NOT ({archived_columns})
+                LIMIT 1
+            ''', params).fetchone()
+            if conflict:
+                raise sqlite3.IntegrityError(
+                    f"order {conflict[0]} is already archived with different details; "
+                    "move or renumber the archived order first")
+
+            conn.execute(f'''
+                INSERT INTO archive.Orders ({columns})
+                SELECT {live_columns} FROM main.Orders AS o
+                WHERE {condition}
+                  AND NOT EXISTS (SELECT 1 FROM archive.Orders AS a WHERE a.order_id = o.order_id)
+            ''', params)
+            # Cancels out what the delete trigger takes away from OrderRollup.
+            for statement in migrations.rollup_add_statements(condition, "main.Orders"):
+                conn.execute(statement, params)
+            deleted = conn.execute(f"DELETE FROM main.Orders AS o WHERE {condition}", params).rowcount
+            conn.commit()
+        except sqlite3.Error:
+            conn.rollback()
+            raise
+        moved += deleted
+        if verbose and deleted:
+            print(f"  moved {moved} orders...")
+        if not boundary:
+            return moved
+
+def main():
+    parser = argparse.ArgumentParser(description="Move old orders into an archive database.")
+    parser.add_argument("--database", default="business.db", help="database file (default: business.db)")
+    parser.add_argument("--archive", help="archive database file (default: <database>_archive.db)")
+    when = parser.add_mutually_exclusive_group()
+    when.add_argument("--before", help="archive orders dated before this day (YYYY-MM-DD)")
+    when.add_argument("--older-than-days", type=int, default=ARCHIVE_AFTER_DAYS,
+                      help=f"archive orders older than this many days (default: {ARCHIVE_AFTER_DAYS})")
+    parser.add_argument("--chunk-size", type=int, default=CHUNK_SIZE,
+                        help=f"orders moved per transaction (default: {CHUNK_SIZE})")
+    parser.add_argument("--dry-run", action="store_true", help="only show how many orders would be moved")
+    parser.add_argument("--vacuum", action="store_true",
+                        help="VACUUM the main database afterwards so the file shrinks")
+    parser.add_argument("--profile", help="connection profile from db_profiles.py")
+    args = parser.parse_args()
+
+    if not os.path.exists(args.database):
+        print(f"Error: {args.database} does not exist. Run setup_database.py first.")
+        return
+    if args.before:
+        try:
+            date.fromisoformat(args.before)
+        except ValueError:
+            print("Invalid date format. Please use YYYY-MM-DD.")
+            return
+    cutoff = args.before or cutoff_date(args.older_than_days)
+    archive = args.archive or default_archive_path(args.database)
+
+    try:
+        conn, _, _ = db_profiles.connect(args.database, args.profile)
+    except (sqlite3.Error, ValueError) as e:
+        print(f"Error connecting to database: {e}")
+        return
+    if not migrations.migrate(conn, verbose=False):
+        conn.close()
+        return
+
+    try:
+        # A dry run does not create the archive file.
+        if not attach_archive(conn, archive, create=not args.dry_run):
+            older = conn.execute("SELECT COUNT(*) FROM Orders WHERE order_date < ?", (cutoff,)).fetchone()[0]
+            print(f"{older} orders dated before {cutoff} would be moved to {archive}.")
+            return
+        live, older, archived = count_orders(conn, cutoff)
+        print(f"{live} live orders ({older} dated before {cutoff}), {archived} archived in {archive}.")
+        if args.dry_run or not older:
+            return
+
+        start = time.perf_counter()
+        moved = archive_orders(conn, cutoff, args.chunk_size)
+        print(f"Moved {moved} orders to {archive} in {time.perf_counter() - start:.1f}s.")
+        if args.vacuum:
+            detach_archive(conn)
+            conn.execute("VACUUM")
+            print(f"Vacuumed {args.database}.")
+    except sqlite3.Error as e:
+        print(f"An error occurred while archiving orders: {e}")
+    finally:
+        conn.close()
+
+if __name__ == "__main__":
+    main()
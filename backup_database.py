@@ -0,0 +1,228 @@
+# backup_database.py
+
+import argparse
+import os
+import sqlite3
+import sys
+import time
+from datetime import datetime
+
+# Where backups go when no output file is given.
+BACKUP_DIR = "backups"
+
+# Pages copied per step. Each step holds a read lock on the database only
+# while it copies; with 4 KB pages this is 1 MB at a time.
+PAGES_PER_STEP = 256
+
+# Pause between steps, so the application's own reads and writes get the
+# disk and the database in between.
+SLEEP_MS = 10
+
+# A write by another connection between two steps makes SQLite start the
+# backup over, so it always ends up a consistent snapshot. After this many
+# restarts the rest is copied in a single step, which in WAL mode still only
+# holds a read lock and does not block writers.
+MAX_RESTARTS = 3
+
+class TooManyRestarts(Exception):
+    """
+    Raised by BackupProgress to stop a backup that keeps starting over.
+    """
+
+class BackupProgress:
+    """
+    Progress callback for Connection.backup, called after every step: it
+    pauses sleep_ms before the next one, prints a line every time another
+    tenth of the database has been copied, and counts restarts. Raising from
+    the callback aborts the backup, which it does once there have been more
+    than max_restarts.
+    """
+
+    def __init__(self, verbose=True, max_restarts=None, sleep_ms=0):
+        self.verbose = verbose
+        self.max_restarts = max_restarts
+        self.sleep_ms = sleep_ms
+        self.restarts = 0
+        self.remaining = None
+        self.next_report = 0.1
+
+    def __call__(self, status, remaining, total):
+        if self.remaining is not None and remaining > self.remaining:
+            self.restarts += 1
+            self.next_report = 0.1
+            if self.max_restarts is not None and self.restarts > self.max_restarts:
+                raise TooManyRestarts()
+            if self.verbose:
+                print("  the database changed during the backup; starting over")
+        self.remaining = remaining
+        done = (total - remaining) / total if total else 1.0
+        if self.verbose and done >= self.next_report and remaining:
+            print(f"  copied {total - remaining} of {total} pages ({done:.0%})")
+            while self.next_report <= done:
+                self.next_report += 0.1
+        # The backup's sleep argument only applies when a step finds the
+        # database locked, so the pause between steps is taken here.
+        if remaining and self.sleep_ms:
+            time.sleep(self.sleep_ms / 1000)
+
+def default_output(database, backup_dir=BACKUP_DIR):
+    """
+    Returns a timestamped backup file name for a database.
+    """
+    name = os.path.splitext(os.path.basename(database))[0]
+    return os.path.join(backup_dir, f"{name}-{datetime.now().strftime('%Y%m%d-%H%M%S')}.db")
+
+def backup_database(database, output, pages=PAGES_PER_STEP, sleep_ms=SLEEP_MS,
+                    max_restarts=MAX_RESTARTS, verbose=True, count_rows=False):
+    """
+    Copies a live database to output with the SQLite backup API, pages at
+    a time with a pause of sleep_ms in between, so connections using the
+    database are never blocked for long. The result is a consistent
+    snapshot of the database at the moment the last step finished.
+
+    With count_rows, a database in WAL mode is copied from a single read
+    transaction, which writers do not wait for, and its rows are counted in
+    that same transaction, so the counts describe exactly what was copied.
+    In other journal modes that transaction would hold off every writer for
+    the whole copy, so no counts are taken.
+
+    The copy is written under a temporary name and renamed to output when
+    complete. Returns (pages copied, restarts, {table: rows} or None).
+    """
+    partial = f"{output}.{os.getpid()}.partial"
+    if os.path.exists(partial):
+        os.remove(partial)
+    directory = os.path.dirname(output)
+    if directory:
+        os.makedirs(directory, exist_ok=True)
+
+    source = sqlite3.connect(f"file:{database}?mode=ro", uri=True)
+    target = sqlite3.connect(partial)
+    progress = BackupProgress(verbose, max_restarts, sleep_ms)
+    counts = None
+    try:
+        source.execute("PRAGMA busy_timeout = 5000")
+        snapshot = count_rows and source.execute("PRAGMA journal_mode").fetchone()[0].lower() == "wal"
+        if snapshot:
+            # The backup steps run inside this transaction and see only
+            # its snapshot, so they never start over.
+            source.execute("BEGIN")
+            source.execute("SELECT COUNT(*) FROM sqlite_master").fetchone()
+        try:
+            source.backup(target, pages=pages, progress=progress)
+        except TooManyRestarts:
+            if verbose:
+                print("  copying the whole database in one step")
+            progress.max_restarts = None
+            progress.remaining = None
+            source.backup(target, pages=-1, progress=progress)
+        if snapshot:
+            counts = table_counts(source)
+            source.rollback()
+        page_count = target.execute("PRAGMA page_count").fetchone()[0]
+        # The copy takes the source's journal mode; a backup file stands alone.
+        target.execute("PRAGMA journal_mode = DELETE")
+    except (sqlite3.Error, TooManyRestarts):
+        target.close()
+        source.close()
+        os.remove(partial)
+        raise
+    target.close()
+    source.close()
+    os.replace(partial, output)
+    return page_count, progress.restarts, counts
+
+def table_names(conn):
+    """
+    Returns the names of the ordinary tables of a database, leaving out
+    SQLite's own tables and the shadow tables of full-text indexes.
+    """
+    rows = conn.execute(
+        "SELECT name, sql FROM sqlite_master WHERE type = 'table' AND name NOT LIKE 'sqlite_%' ORDER BY name"
+    ).fetchall()
+    virtual = [name for name, sql in rows if sql.upper().startswith("CREATE VIRTUAL")]
+    return [name for name, sql in rows
+            if name not in virtual and not any(name.startswith(v + "_") for v in virtual)]
+
+def table_counts(conn):
+    """
+    Returns {table: number of rows} for every table, as seen by the
+    connection's current transaction if it has one.
+    """
+    return {name: conn.execute(f'SELECT COUNT(*) FROM "{name}"').fetchone()[0]
+            for name in table_names(conn)}
+
+def verify_backup(output, source_counts=None):
+    """
+    Runs an integrity check on a backup and counts its rows per table.
+    If source_counts is given (see backup_database), the counts must match
+    it. Returns (problems, {table: (backup rows, source rows or None)}).
+    """
+    conn = sqlite3.connect(f"file:{output}?mode=ro", uri=True)
+    try:
+        problems = [row[0] for row in conn.execute("PRAGMA integrity_check") if row[0] != "ok"]
+        counts = table_counts(conn)
+    finally:
+        conn.close()
+
+    source_counts = source_counts or {}
+    for table, count in counts.items():
+        if table in source_counts and source_counts[table] != count:
+            problems.append(f"{table} has {count} rows in the backup but {source_counts[table]} "
+                            "in the database it was copied from")
+    return problems, {table: (count, source_counts.get(table)) for table, count in counts.items()}
+
+def main():
+    parser = argparse.ArgumentParser(description="Back up a database while it is in use.")
+    parser.add_argument("output", nargs="?", help=f"backup file (default: {BACKUP_DIR}/NAME-DATE-TIME.db)")
+    parser.add_argument("--database", default="business.db", help="database to back up (default: business.db)")
+    parser.add_argument("--pages", type=int, default=PAGES_PER_STEP,
+                        help=f"pages copied per step, -1 for all at once (default: {PAGES_PER_STEP})")
+    parser.add_argument("--sleep-ms", type=float, default=SLEEP_MS,
+                        help=f"pause between steps in milliseconds (default: {SLEEP_MS})")
+    parser.add_argument("--verify", action="store_true", help="check the backup's integrity and row counts")
+    parser.add_argument("--force", action="store_true", help="replace the output file if it exists")
+    args = parser.parse_args()
+
+    if not os.path.exists(args.database):
+        print(f"Error: {args.database} does not exist. Run setup_database.py first.")
+        return 1
+    output = args.output or default_output(args.database)
+    if os.path.exists(output) and not args.force:
+        print(f"Error: {output} already exists. Use --force to replace it.")
+        return 1
+    if args.pages == 0:
+        print("Error: --pages must be a positive number, or -1.", file=sys.stderr)
+        return 1
+
+    print(f"Backing up {args.database} to {output}...")
+    start = time.perf_counter()
+    try:
+        page_count, restarts, source_counts = backup_database(args.database, output, args.pages, args.sleep_ms,
+                                                              count_rows=args.verify)
+    except (sqlite3.Error, OSError) as e:
+        print(f"An error occurred while backing up the database: {e}")
+        return 1
+    print(f"Backed up {page_count} pages in {time.perf_counter() - start:.1f}s"
+          + (f" ({restarts} restart(s) because of concurrent writes)." if restarts else "."))
+
+    if args.verify:
+        try:
+            problems, counts = verify_backup(output, source_counts)
+        except sqlite3.Error as e:
+            print(f"An error occurred while verifying the backup: {e}")
+            return 1
+        print("{:<16} {:>12} {:>12}".format("Table", "Backup", args.database[-12:]))
+        print("-" * 42)
+        for table, (count, live) in counts.items():
+            print("{:<16} {:>12} {:>12}".format(table, count, "-" if live is None else live))
+        if problems:
+            print("\nThe backup failed verification:")
+            for problem in problems[:20]:
+                print(f"    {problem}")
+            return 1
+        print("\nThe backup passed the integrity check.")
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main())
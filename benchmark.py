@@ -0,0 +1,267 @@
+# benchmark.py
+
+import argparse
+import contextlib
+import json
+import os
+import platform
+import shutil
+import sqlite3
+import time
+from datetime import datetime, timedelta
+from unittest import mock
+
+import bulk_import
+import cli_application as cli
+import db_profiles
+import generate_data
+import migrations
+import report_cache
+from latency_stats import percentile
+
+RESULTS_FILE = "benchmark_results.json"
+DATA_DIR = "benchmark_data"
+DEFAULT_REPEAT = 5
+
+def summarize(name, kind, timings):
+    """
+    Turns a list of timings in seconds into a result record in milliseconds.
+    """
+    values = sorted(t * 1000 for t in timings)
+    return {
+        'case': name,
+        'kind': kind,
+        'iterations': len(values),
+        'min_ms': round(values[0], 3) if values else None,
+        'p50_ms': round(percentile(values, 50), 3) if values else None,
+        'p95_ms': round(percentile(values, 95), 3) if values else None,
+        'p99_ms': round(percentile(values, 99), 3) if values else None,
+        'max_ms': round(values[-1], 3) if values else None,
+        'mean_ms': round(sum(values) / len(values), 3) if values else None,
+    }
+
+def scripted_input(answers):
+    """
+    Returns a replacement for input() that answers each prompt from a dict of
+    {prompt prefix: answer}, so the interactive CLI functions can be timed.
+    """
+    def respond(prompt=''):
+        for prefix, answer in answers.items():
+            if prompt.startswith(prefix):
+                return str(answer)
+        raise RuntimeError(f"No scripted answer for prompt: {prompt!r}")
+    return respond
+
+def run_quietly(func, conn, *args, answers=None):
+    """
+    Calls a CLI function with its screen output discarded and, if answers is
+    given, with input() answered from the script.
+    """
+    with open(os.devnull, 'w') as devnull, contextlib.redirect_stdout(devnull):
+        if answers is None:
+            return func(conn, *args)
+        with mock.patch('builtins.input', scripted_input(answers)):
+            return func(conn, *args)
+
+def sample_ids(conn):
+    """
+    Picks the IDs the write cases work on. Suppliers are taken from the least
+    busy end so each delete iteration removes a different, typical supplier.
+    """
+    def column(sql):
+        return [row[0] for row in conn.execute(sql)]
+
+    return {
+        'dept_id': column("SELECT dept_id FROM Department ORDER BY dept_id LIMIT 1")[0],
+        'employee_id': column("SELECT employee_id FROM Employee ORDER BY employee_id LIMIT 1")[0],
+        'product_ids': column("SELECT product_id FROM Inventory ORDER BY product_id LIMIT 100"),
+        'busiest_supplier': column(
+            "SELECT supplier_id FROM Orders GROUP BY supplier_id ORDER BY COUNT(*) DESC LIMIT 1")[0],
+        'quiet_suppliers': column(
+            '''SELECT s.supplier_id FROM Supplier s
+               LEFT JOIN Orders o ON o.supplier_id = s.supplier_id
+               GROUP BY s.supplier_id ORDER BY COUNT(o.order_id), s.supplier_id'''),
+        'order_ids': column("SELECT order_id FROM Orders ORDER BY order_id DESC LIMIT 1000"),
+    }
+
+def uncached(view):
+    """
+    Returns a case that shows a view with the connection's report cache
+    emptied first (see report_cache.py), so it times the view's query.
+    """
+    def run(conn):
+        report_cache.invalidate(conn)
+        return run_quietly(view, conn)
+    return run
+
+def read_cases(ids):
+    """
+    Returns (name, callable) pairs for every query path in cli_application.
+    """
+    # Keyset boundary halfway through the generated order history.
+    middle_date = generate_data.END_DATE - timedelta(days=generate_data.DAYS_OF_HISTORY // 2)
+    middle_order = (middle_date.isoformat(), 0)
+    cases = [
+        ('get_departments', lambda conn: cli.get_departments(conn)),
+        ('get_products', lambda conn: cli.get_products(conn)),
+        ('get_suppliers', lambda conn: cli.get_suppliers(conn)),
+        ('get_employees', lambda conn: cli.get_employees(conn)),
+        ('get_all_orders', lambda conn: cli.get_all_orders(conn)),
+        ('get_orders_by_supplier', lambda conn: cli.get_orders_by_supplier(conn, ids['busiest_supplier'])),
+        ('fetch_page_orders_middle', lambda conn: cli.fetch_page(conn, 'orders', middle_order)),
+        ('search_records_product', lambda conn: cli.search_records(conn, 'product', 'lap')),
+    ]
+    # Each view is timed from the database and, separately, served from the
+    # report cache that its untimed first call fills.
+    for view in (cli.view_sales_report, cli.view_employees, cli.view_products,
+                 cli.view_departments, cli.view_suppliers, cli.view_orders):
+        cases.append((view.__name__, uncached(view)))
+        cases.append((f'{view.__name__}_cached', lambda conn, view=view: run_quietly(view, conn)))
+    for view, spec in cli.PAGED_VIEWS.items():
+        # Views over the archive need an archive database, which the generated ones lack.
+        if spec.get('archive'):
+            continue
+        cases.append((f'fetch_page_{view}_first', lambda conn, view=view: cli.fetch_page(conn, view)))
+    return cases
+
+def write_cases(ids):
+    """
+    Returns (name, callable factory, iterations available) for every write path.
+    Each factory takes the iteration number so repeated runs touch fresh rows.
+    """
+    products = ids['product_ids']
+    suppliers = list(ids['quiet_suppliers'])
+    # The two supplier deletes must not share suppliers.
+    half = len(suppliers) // 2
+    purge_suppliers, delete_suppliers = suppliers[:half], suppliers[half:]
+
+    return [
+        ('add_employee', lambda conn, i: run_quietly(cli.add_employee, conn, answers={
+            'Enter employee name': f'Benchmark Employee {i}',
+            'Enter employee position': 'Tester',
+            'Enter employee salary': 50000,
+            'Enter department ID': ids['dept_id'],
+        }), None),
+        ('add_order', lambda conn, i: run_quietly(cli.add_order, conn, answers={
+            'Enter supplier ID': ids['busiest_supplier'],
+            'Enter product ID': products[i % len(products)],
+            'Enter order quantity': 5,
+            'Enter product ordered': 'Benchmark Item',
+            'Enter employee ID': ids['employee_id'],
+        }), None),
+        ('update_product_quantity', lambda conn, i: run_quietly(cli.update_product_quantity, conn, answers={
+            'Enter product ID to update': products[i % len(products)],
+            'Enter new quantity': 100 + i,
+        }), None),
+        ('delete_order', lambda conn, i: run_quietly(cli.delete_order, conn, answers={
+            'Enter order ID to delete': ids['order_ids'][i],
+            'Are you sure': 'yes',
+        }), len(ids['order_ids'])),
+        ('delete_orders_by_supplier', lambda conn, i: run_quietly(
+            cli.delete_orders_by_supplier, conn, purge_suppliers[i]), len(purge_suppliers)),
+        ('delete_supplier', lambda conn, i: run_quietly(cli.delete_supplier, conn, answers={
+            'Enter supplier ID to delete': delete_suppliers[i],
+            'Enter your choice (1-2)': '2',
+            'Are you sure': 'yes',
+        }), len(delete_suppliers)),
+    ]
+
+def time_call(func, *args):
+    """
+    Returns how long one call took, in seconds.
+    """
+    start = time.perf_counter()
+    func(*args)
+    return time.perf_counter() - start
+
+def run_scale(rows, seed, repeat, data_dir, cases=None, profile=None):
+    """
+    Benchmarks every case against a generated database of the given scale and
+    returns the run record. The generated database is cached in data_dir and
+    the write cases run on a throwaway copy of it.
+    """
+    os.makedirs(data_dir, exist_ok=True)
+    # The schema version is part of the name so a schema change regenerates the data.
+    template = os.path.join(data_dir, f"bench_{rows}_seed{seed}_v{migrations.LATEST_VERSION}.db")
+    if not os.path.exists(template):
+        if generate_data.build_database(template, rows, seed) is None:
+            return None
+    working = template[:-len(".db")] + "_work.db"
+    shutil.copyfile(template, working)
+
+    conn, profile, _ = db_profiles.connect(working, profile, allow_vacuum=True)
+    row_counts = {table: conn.execute(f"SELECT COUNT(*) FROM {table}").fetchone()[0]
+                  for table in bulk_import.TABLE_COLUMNS}
+    ids = sample_ids(conn)
+    results = []
+
+    print(f"\nBenchmarking {rows} rows ({repeat} iterations per case):")
+    for name, func in read_cases(ids):
+        if cases and name not in cases:
+            continue
+        func(conn)  # warm the page cache
+        result = summarize(name, 'read', [time_call(func, conn) for _ in range(repeat)])
+        results.append(result)
+        print(f"  {name:<32} p50 {result['p50_ms']:>10.3f} ms   p95 {result['p95_ms']:>10.3f} ms")
+
+    for name, func, available in write_cases(ids):
+        if cases and name not in cases:
+            continue
+        iterations = repeat if available is None else min(repeat, available)
+        result = summarize(name, 'write', [time_call(func, conn, i) for i in range(iterations)])
+        results.append(result)
+        if result['iterations']:
+            print(f"  {name:<32} p50 {result['p50_ms']:>10.3f} ms   p95 {result['p95_ms']:>10.3f} ms")
+        else:
+            print(f"  {name:<32} skipped (no rows to work on)")
+
+    conn.close()
+    os.remove(working)
+    return {
+        'timestamp': datetime.now().isoformat(timespec='seconds'),
+        'scale_rows': rows,
+        'seed': seed,
+        'repeat': repeat,
+        'profile': profile,
+        'db_size_bytes': os.path.getsize(template),
+        'row_counts': row_counts,
+        'sqlite_version': sqlite3.sqlite_version,
+        'python_version': platform.python_version(),
+        'results': results,
+    }
+
+def save_results(path, runs):
+    """
+    Appends run records to the JSON results file.
+    """
+    existing = {'runs': []}
+    if os.path.exists(path):
+        with open(path) as file:
+            existing = json.load(file)
+    existing['runs'].extend(runs)
+    with open(path, 'w') as file:
+        json.dump(existing, file, indent=2)
+    print(f"\nResults written to {path}.")
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark the CLI's queries and write paths at several scales.")
+    parser.add_argument("--scales", nargs="+", type=generate_data.parse_scale, default=[generate_data.SCALES['10k']],
+                        help=f"scales to run: {', '.join(generate_data.SCALES)} or numbers (default: 10k)")
+    parser.add_argument("--seed", type=int, default=generate_data.DEFAULT_SEED, help="random seed (default: 42)")
+    parser.add_argument("--repeat", type=int, default=DEFAULT_REPEAT, help="iterations per case (default: 5)")
+    parser.add_argument("--cases", nargs="+", help="only run these cases")
+    parser.add_argument("--data-dir", default=DATA_DIR, help="where generated databases are cached")
+    parser.add_argument("--output", default=RESULTS_FILE, help="results file (default: benchmark_results.json)")
+    parser.add_argument("--profile", help="connection profile to benchmark (default: as configured)")
+    args = parser.parse_args()
+
+    runs = []
+    for rows in args.scales:
+        run = run_scale(rows, args.seed, args.repeat, args.data_dir, args.cases, args.profile)
+        if run is not None:
+            runs.append(run)
+    if runs:
+        save_results(args.output, runs)
+
+if __name__ == "__main__":
+    main()
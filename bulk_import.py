@@ -0,0 +1,246 @@
+# bulk_import.py
+
+import argparse
+import csv
+import json
+import os
+import sqlite3
+import time
+
+import db_profiles
+
+# Columns that can be loaded for each table, in insert order.
+TABLE_COLUMNS = {
+    'Department': ('dept_id', 'dept_name'),
+    'Employee': ('employee_id', 'employee_name', 'employee_position', 'employee_salary', 'employee_dept'),
+    'Product': ('product_id', 'product_name', 'product_price', 'product_quantity', 'product_dept'),
+    'Inventory': ('inventory_id', 'product_id', 'quantity_in_stock'),
+    'Supplier': ('supplier_id', 'supplier_name', 'contact_number', 'supplier_address'),
+    'Orders': ('order_id', 'order_date', 'supplier_id', 'product_id', 'order_quantity',
+               'product_ordered', 'supplied_by'),
+    'Sales': ('sale_id', 'product_id', 'quantity_sold', 'products_sold'),
+}
+
+# Rows inserted per transaction.
+BATCH_SIZE = 50000
+
+def read_csv(path):
+    """
+    Yields one dict per CSV row. Empty fields are read as NULL.
+    """
+    with open(path, newline='') as file:
+        for record in csv.DictReader(file):
+            yield {key: (value if value != '' else None) for key, value in record.items()}
+
+def read_jsonl(path):
+    """
+    Yields one dict per non-empty line of a JSON Lines file.
+    """
+    with open(path) as file:
+        for line_number, line in enumerate(file, 1):
+            line = line.strip()
+            if not line:
+                continue
+            try:
+                yield json.loads(line)
+            except json.JSONDecodeError as e:
+                raise ValueError(f"{path}, line {line_number}: {e}")
+
+def read_json(path):
+    """
+    Yields the objects of a JSON file holding one array of objects.
+    """
+    with open(path) as file:
+        try:
+            records = json.load(file)
+        except json.JSONDecodeError as e:
+            raise ValueError(f"{path}: {e}")
+    if not isinstance(records, list):
+        raise ValueError(f"{path}: expected an array of objects")
+    yield from records
+
+READERS = {'csv': read_csv, 'jsonl': read_jsonl, 'json': read_json}
+
+def detect_format(path):
+    """
+    Guesses the input format from the file extension.
+    """
+    extension = os.path.splitext(path)[1].lower()
+    if extension in ('.jsonl', '.ndjson'):
+        return 'jsonl'
+    if extension == '.json':
+        return 'json'
+    return 'csv'
+
+def resolve_table(name):
+    """
+    Returns the table name as spelled in TABLE_COLUMNS, matching case-insensitively.
+    """
+    for table in TABLE_COLUMNS:
+        if table.lower() == name.lower():
+            return table
+    raise ValueError(f"Unknown table '{name}'. Choose from: {', '.join(TABLE_COLUMNS)}")
+
+def records_to_rows(table, records):
+    """
+    Turns a stream of dict records into (columns, rows) for load_rows.
+
+    Every record is checked against the table's columns, and a key that is
+    not one of them raises ValueError. The rows hold all of the table's
+    columns, so they can share one INSERT statement whichever keys each
+    record has. A missing key is loaded as NULL, the same as leaving the
+    column out, since none of these columns has a DEFAULT.
+    """
+    columns = TABLE_COLUMNS[table]
+    allowed = frozenset(columns)
+    records = iter(records)
+    first = next(records, None)
+    if first is None:
+        return (), iter(())
+
+    def row(number, record):
+        if not isinstance(record, dict):
+            raise ValueError(f"record {number} is not an object")
+        if not allowed.issuperset(record):
+            # csv.DictReader puts the fields beyond the header under None.
+            if None in record:
+                raise ValueError(f"record {number} has more fields than the header")
+            unknown = [key for key in record if key not in allowed]
+            raise ValueError(f"record {number}: unknown column(s) for {table}: {', '.join(unknown)}")
+        return tuple(record.get(column) for column in columns)
+
+    def rows():
+        yield row(1, first)
+        for number, record in enumerate(records, 2):
+            yield row(number, record)
+
+    return columns, rows()
+
+def load_rows(conn, table, columns, rows, batch_size=BATCH_SIZE, verbose=True):
+    """
+    Inserts rows into a table with executemany, one transaction per batch.
+
+    rows may be any iterable of tuples; it is consumed batch_size rows at a
+    time, so the whole input is never held in memory. Returns the row count.
+    """
+    sql = "INSERT INTO {}({}) VALUES({})".format(
+        table, ", ".join(columns), ", ".join("?" for _ in columns))
+    if conn.in_transaction:
+        conn.commit()
+
+    total = 0
+    batch = []
+    cur = conn.cursor()
+
+    def flush():
+        conn.execute("BEGIN")
+        try:
+            cur.executemany(sql, batch)
+            conn.commit()
+        except sqlite3.Error:
+            conn.rollback()
+            raise
+
+    for row in rows:
+        batch.append(row)
+        if len(batch) >= batch_size:
+            flush()
+            total += len(batch)
+            batch = []
+            if verbose:
+                print(f"  {total} rows loaded into {table}...")
+    if batch:
+        flush()
+        total += len(batch)
+    return total
+
+def drop_indexes(conn, table):
+    """
+    Drops the secondary indexes of a table and returns their CREATE statements.
+    """
+    indexes = conn.execute(
+        "SELECT name, sql FROM sqlite_master WHERE type = 'index' AND tbl_name = ? AND sql IS NOT NULL",
+        (table,)).fetchall()
+    for name, _ in indexes:
+        conn.execute(f"DROP INDEX {name}")
+    conn.commit()
+    return [sql for _, sql in indexes]
+
+def create_indexes(conn, statements):
+    """
+    Recreates indexes previously removed by drop_indexes.
+    """
+    for statement in statements:
+        conn.execute(statement)
+    conn.commit()
+
+def import_files(conn, table, paths, file_format=None, batch_size=BATCH_SIZE, defer_indexes=False):
+    """
+    Streams CSV, JSONL or JSON files into a table and reports the load rate.
+
+    With defer_indexes the table's indexes are dropped once before the first
+    file and rebuilt once after the last, instead of being updated row by row.
+    Returns the number of rows loaded.
+    """
+    table = resolve_table(table)
+    start = time.perf_counter()
+    deferred = drop_indexes(conn, table) if defer_indexes else []
+    total = 0
+    try:
+        for path in paths:
+            path_format = file_format or detect_format(path)
+            records = READERS[path_format](path)
+            try:
+                columns, rows = records_to_rows(table, records)
+                count = load_rows(conn, table, columns, rows, batch_size) if columns else 0
+            except (sqlite3.Error, ValueError, OSError) as e:
+                print(f"An error occurred while importing {path} into {table}: {e}")
+                print("Batches committed before the error were kept; the failed batch was rolled back.")
+                break
+            total += count
+            print(f"Loaded {count} rows from {path}.")
+    finally:
+        if deferred:
+            print(f"Rebuilding {len(deferred)} index(es) on {table}...")
+            create_indexes(conn, deferred)
+    elapsed = time.perf_counter() - start
+
+    rate = total / elapsed if elapsed > 0 else 0
+    print(f"Imported {total} rows into {table} in {elapsed:.2f}s ({rate:,.0f} rows/sec).")
+    return total
+
+def main():
+    parser = argparse.ArgumentParser(description="Bulk load CSV, JSONL or JSON files into the business database.")
+    parser.add_argument("table", help=f"target table ({', '.join(TABLE_COLUMNS)})")
+    parser.add_argument("files", nargs="+", help="CSV, JSONL or JSON files to load")
+    parser.add_argument("--format", choices=tuple(READERS), help="input format (default: from file extension)")
+    parser.add_argument("--batch-size", type=int, default=BATCH_SIZE, help="rows per transaction")
+    parser.add_argument("--defer-indexes", action="store_true",
+                        help="drop the table's indexes during the load and rebuild them at the end")
+    parser.add_argument("--database", default="business.db", help="database file (default: business.db)")
+    parser.add_argument("--profile", default="bulk-load",
+                        help="connection profile from db_profiles.py (default: bulk-load)")
+    args = parser.parse_args()
+
+    try:
+        table = resolve_table(args.table)
+    except ValueError as e:
+        print(f"Error: {e}")
+        return
+    for path in args.files:
+        if not os.path.exists(path):
+            print(f"Error: {path} does not exist.")
+            return
+
+    try:
+        conn, _, _ = db_profiles.connect(args.database, args.profile)
+    except (sqlite3.Error, ValueError) as e:
+        print(f"Error connecting to database: {e}")
+        return
+
+    import_files(conn, table, args.files, args.format, args.batch_size, args.defer_indexes)
+
+    conn.close()
+
+if __name__ == "__main__":
+    main()
@@ -1,20 +1,116 @@
 # cli_application.py
 
+import re
 import sqlite3
+import sys
 from datetime import datetime
 
-def create_connection(db_file):
-    """Create a database connection to the SQLite database."""
+import analytics
+import archive_orders
+import db_profiles
+import export_data
+import instrumentation
+import lookup_cache
+import migrations
+import purge_orders
+import queries
+import report_cache
+import table_renderer
+
+def create_connection(db_file, profile=None):
+    """Create a database connection to the SQLite database.
+
+    The connection profile (see db_profiles.py) comes from the profile argument,
+    the BUSINESS_DB_PROFILE environment variable or business_db.ini. Every
+    statement is timed (see instrumentation.py).
+    """
     conn = None
     try:
-        conn = sqlite3.connect(db_file)
-        # Enable foreign key constraints
-        conn.execute("PRAGMA foreign_keys = 1")
-        print(f"Connected to SQLite database: {db_file}\n")
-    except sqlite3.Error as e:
+        # Enables foreign key constraints and applies the profile's pragmas
+        conn, name, notes = db_profiles.connect(db_file, profile,
+                                                factory=instrumentation.InstrumentedConnection)
+        print(f"Connected to SQLite database: {db_file} (profile: {name})\n")
+        for note in notes:
+            print(f"Note: {note}")
+    except (sqlite3.Error, ValueError) as e:
         print(f"Error connecting to database: {e}")
     return conn
 
+# Matches listed when a name is typed at an ID prompt.
+PICKER_MATCHES = 10
+
+# Records that can be picked by name: the table holding them, the registered
+# full-text search (see migration 4) and how a match is listed.
+PICKERS = {
+    'supplier': {'table': 'Supplier', 'key': 'supplier_id', 'search': 'search_suppliers',
+                 'line': "{0}. {1} ({2})"},
+    'product': {'table': 'Product', 'key': 'product_id', 'search': 'search_products',
+                'line': "{0}. {1} (Current Stock: {2})"},
+    'employee': {'table': 'Employee', 'key': 'employee_id', 'search': 'search_employees',
+                 'line': "{0}. {1}, {2}"},
+}
+
+def match_expression(text):
+    """
+    Turns typed text into an FTS5 query matching every word as a prefix, so
+    "lap pro" finds "Pro Laptop 12". Returns None if there are no words.
+    """
+    words = re.findall(r"\w+", text)
+    if not words:
+        return None
+    return " ".join(f'"{word}"*' for word in words)
+
+def search_records(conn, kind, text, limit=PICKER_MATCHES):
+    """
+    Returns the best name matches for typed text among suppliers, products
+    or employees.
+    """
+    expression = match_expression(text)
+    if expression is None:
+        return []
+    return queries.execute(conn, PICKERS[kind]['search'], (expression, limit)).fetchall()
+
+def has_records(conn, kind):
+    """
+    Checks whether there is at least one supplier, product or employee.
+    """
+    return conn.execute(f"SELECT 1 FROM {PICKERS[kind]['table']} LIMIT 1").fetchone() is not None
+
+def pick_record(conn, kind, prompt, optional=False):
+    """
+    Asks for the ID of a supplier, product or employee. Instead of an ID the
+    user can type the start of a name (or, for suppliers and employees, an
+    address or position) to list the best matches. Returns the chosen ID,
+    or None if the answer was left blank: "any" when optional is set, and
+    otherwise a cancel.
+    """
+    picker = PICKERS[kind]
+    blank = "blank for any" if optional else "blank to cancel"
+    while True:
+        text = input(f"{prompt} (or type part of a name to search, {blank}): ").strip()
+        if not text:
+            return None
+        if text.isdigit():
+            record_id = int(text)
+            if record_exists(conn, picker['table'], picker['key'], record_id):
+                return record_id
+            print(f"Invalid {kind} ID. Type part of a name to search.")
+            continue
+        try:
+            matches = search_records(conn, kind, text)
+        except sqlite3.Error as e:
+            print(f"An error occurred while searching {kind}s: {e}")
+            continue
+        if not matches:
+            print(f"No {kind} matches '{text}'.")
+            continue
+        if len(matches) == 1:
+            print(f"Selected {picker['line'].format(*matches[0])}")
+            return matches[0][0]
+        print(f"Top matches for '{text}':")
+        for match in matches:
+            print("  " + picker['line'].format(*match))
+
 def add_employee(conn):
     """
     Adds a new employee to the Employee table.
@@ -31,7 +127,8 @@ def add_employee(conn):
             print("Invalid input for salary. Please enter a numeric value.")
     
     print("\nAvailable Departments:")
-    departments = get_departments(conn)
+    cache = lookup_cache.get_lookup_cache(conn)
+    departments = cache.rows('departments')
     if not departments:
         print("No departments found. Please add a department first.\n")
         return
@@ -41,20 +138,17 @@ def add_employee(conn):
     while True:
         try:
             employee_dept = int(input("Enter department ID from the list above: ").strip())
-            if any(dept[0] == employee_dept for dept in departments):
+            if cache.contains('departments', employee_dept):
                 break
             else:
                 print("Invalid department ID. Please choose a valid ID from the list.")
         except ValueError:
             print("Invalid input for department ID. Please enter a numeric value.")
     
-    sql = '''INSERT INTO Employee(employee_name, employee_position, employee_salary, employee_dept)
-             VALUES(?, ?, ?, ?)'''
-    cur = conn.cursor()
     try:
-        cur.execute(sql, (employee_name, employee_position, employee_salary, employee_dept))
+        employee_id = insert_employee(conn, employee_name, employee_position, employee_salary, employee_dept)
         conn.commit()
-        print(f"Employee '{employee_name}' added successfully with ID {cur.lastrowid}.\n")
+        print(f"Employee '{employee_name}' added successfully with ID {employee_id}.\n")
     except sqlite3.Error as e:
         print(f"An error occurred while adding employee: {e}\n")
 
@@ -63,23 +157,13 @@ def update_product_quantity(conn):
     Updates the quantity_in_stock for a given product.
     """
     print("\n=== Update Product Quantity ===")
-    print("\nAvailable Products:")
-    products = get_products(conn)
-    if not products:
+    if not has_records(conn, 'product'):
         print("No products found. Please add a product first.\n")
         return
-    for product in products:
-        print(f"{product[0]}. {product[1]} (Current Stock: {product[5]})")
-    
-    while True:
-        try:
-            product_id = int(input("Enter product ID to update: ").strip())
-            if any(prod[0] == product_id for prod in products):
-                break
-            else:
-                print("Invalid product ID. Please choose a valid ID from the list.")
-        except ValueError:
-            print("Invalid input for product ID. Please enter a numeric value.")
+    product_id = pick_record(conn, 'product', "Enter product ID to update")
+    if product_id is None:
+        print("Update canceled.\n")
+        return
     
     while True:
         try:
@@ -91,13 +175,8 @@ def update_product_quantity(conn):
         except ValueError:
             print("Invalid input for quantity. Please enter a numeric value.")
     
-    sql = '''UPDATE Inventory
-             SET quantity_in_stock = ?
-             WHERE product_id = ?'''
-    cur = conn.cursor()
     try:
-        cur.execute(sql, (new_quantity, product_id))
-        if cur.rowcount == 0:
+        if set_stock_quantity(conn, product_id, new_quantity) == 0:
             print("Product ID not found in Inventory.\n")
         else:
             conn.commit()
@@ -107,32 +186,31 @@ def update_product_quantity(conn):
 
 def delete_supplier(conn):
     """
-    Deletes a supplier from the Supplier table after ensuring no dependent orders exist.
-    Offers the option to delete dependent orders.
+    Deletes a supplier from the Supplier table. If the supplier has orders,
+    shows how many and offers to delete them too. Nothing is deleted before
+    the final confirmation. Up to purge_orders.CHUNK_SIZE orders go in one
+    transaction with the supplier; more are deleted in chunks, so an
+    interrupted delete can leave some orders gone and the supplier still
+    there, and running it again finishes the job (see
+    purge_orders.delete_supplier).
     """
     print("\n=== Delete a Supplier ===")
-    print("\nAvailable Suppliers:")
-    suppliers = get_suppliers(conn)
-    if not suppliers:
+    if not has_records(conn, 'supplier'):
         print("No suppliers found.\n")
         return
-    for supplier in suppliers:
-        print(f"{supplier[0]}. {supplier[1]}")
-    
-    while True:
-        try:
-            supplier_id = int(input("Enter supplier ID to delete: ").strip())
-            if any(sup[0] == supplier_id for sup in suppliers):
-                break
-            else:
-                print("Invalid supplier ID. Please choose a valid ID from the list.")
-        except ValueError:
-            print("Invalid input for supplier ID. Please enter a numeric value.")
+    supplier_id = pick_record(conn, 'supplier', "Enter supplier ID to delete")
+    if supplier_id is None:
+        print("Deletion canceled.\n")
+        return
     
-    # Check for dependent orders
-    dependent_orders = get_orders_by_supplier(conn, supplier_id)
-    if dependent_orders:
-        print(f"\nSupplier ID {supplier_id} has {len(dependent_orders)} order(s) associated with it.")
+    # Count dependent orders without reading them
+    try:
+        order_count = purge_orders.count_orders(conn, "supplier_id = ?", (supplier_id,))
+    except sqlite3.Error as e:
+        print(f"An error occurred while counting orders: {e}\n")
+        return
+    if order_count:
+        print(f"\nSupplier ID {supplier_id} has {order_count} order(s) associated with it.")
         print("1. Cancel Deletion")
         print("2. Delete Supplier and All Associated Orders")
         
@@ -142,26 +220,26 @@ def delete_supplier(conn):
                 print("Deletion canceled.\n")
                 return
             elif choice == '2':
-                # Delete dependent orders first
-                delete_orders_by_supplier(conn, supplier_id)
                 break
             else:
                 print("Invalid choice. Please enter 1 or 2.")
     
-    confirmation = input(f"Are you sure you want to delete supplier ID {supplier_id}? (yes/no): ").strip().lower()
+    also = f" and its {order_count} order(s)" if order_count else ""
+    if order_count > purge_orders.CHUNK_SIZE:
+        print(f"The orders are deleted {purge_orders.CHUNK_SIZE} at a time, so if this is interrupted "
+              "only some of them may be deleted. Deleting the supplier again finishes the job.")
+    confirmation = input(f"Are you sure you want to delete supplier ID {supplier_id}{also}? (yes/no): ").strip().lower()
     if confirmation != 'yes':
         print("Deletion canceled.\n")
         return
     
-    sql = '''DELETE FROM Supplier WHERE supplier_id = ?'''
-    cur = conn.cursor()
     try:
-        cur.execute(sql, (supplier_id,))
-        if cur.rowcount == 0:
+        deleted_orders, deleted = purge_orders.delete_supplier(conn, supplier_id)
+        if deleted == 0:
             print("Supplier ID not found.\n")
         else:
-            conn.commit()
-            print(f"Supplier ID {supplier_id} deleted successfully.\n")
+            with_orders = f" and {deleted_orders} order(s)" if deleted_orders else ""
+            print(f"Supplier ID {supplier_id}{with_orders} deleted successfully.\n")
     except sqlite3.Error as e:
         print(f"An error occurred while deleting supplier: {e}\n")
 
@@ -170,18 +248,25 @@ def delete_order(conn):
     Deletes an order from the Orders table.
     """
     print("\n=== Delete an Order ===")
-    print("\nAvailable Orders:")
-    orders = get_all_orders(conn)
+    # Orders is too large to load in full just to pick one row, so show the
+    # most recent page and check the typed ID with a primary-key lookup.
+    print("\nMost Recent Orders:")
+    try:
+        orders = fetch_page(conn, 'orders')
+    except sqlite3.Error as e:
+        print(f"An error occurred while retrieving orders: {e}\n")
+        return
     if not orders:
         print("No orders found.\n")
         return
     for order in orders:
         print(f"{order[0]}. Order Date: {order[1]}, Supplier: {order[2]}, Product: {order[3]}, Quantity: {order[4]}, Supplied By: {order[6]}")
+    print("(Use Browse Records to see older orders.)")
     
     while True:
         try:
             order_id = int(input("Enter order ID to delete: ").strip())
-            if any(ordr[0] == order_id for ordr in orders):
+            if order_exists(conn, order_id):
                 break
             else:
                 print("Invalid order ID. Please choose a valid ID from the list.")
@@ -193,11 +278,8 @@ def delete_order(conn):
         print("Deletion canceled.\n")
         return
     
-    sql = '''DELETE FROM Orders WHERE order_id = ?'''
-    cur = conn.cursor()
     try:
-        cur.execute(sql, (order_id,))
-        if cur.rowcount == 0:
+        if remove_order(conn, order_id) == 0:
             print("Order ID not found.\n")
         else:
             conn.commit()
@@ -210,79 +292,27 @@ def view_sales_report(conn):
     Displays total sales per product.
     """
     print("\n=== Sales Report ===")
-    sql = '''
-    SELECT 
-        p.product_id,
-        p.product_name,
-        SUM(s.quantity_sold) AS total_quantity_sold
-    FROM 
-        Sales s
-    JOIN 
-        Product p ON s.product_id = p.product_id
-    GROUP BY 
-        p.product_id, p.product_name
-    ORDER BY 
-        total_quantity_sold DESC
-    '''
-    cur = conn.cursor()
-    try:
-        cur.execute(sql)
-        rows = cur.fetchall()
-        
-        if not rows:
-            print("No sales data available.\n")
-            return
-        
-        print("\nSales Report:")
-        print("{:<10} {:<25} {:<20}".format("Product ID", "Product Name", "Total Quantity Sold"))
-        print("-" * 60)
-        for row in rows:
-            print("{:<10} {:<25} {:<20}".format(row[0], row[1], row[2]))
-        print()
-    except sqlite3.Error as e:
-        print(f"An error occurred while retrieving sales report: {e}\n")
+    show_rows(conn, 'sales', "Sales Report", PAGED_VIEWS['sales']['headers'],
+              empty_message="No sales data available.")
 
 def add_order(conn):
     """
     Adds a new order to the Orders table.
     """
     print("\n=== Add a New Order ===")
+    for kind in ('supplier', 'product', 'employee'):
+        if not has_records(conn, kind):
+            print(f"No {kind}s found. Please add {'an' if kind == 'employee' else 'a'} {kind} first.\n")
+            return
     
-    print("\nAvailable Suppliers:")
-    suppliers = get_suppliers(conn)
-    if not suppliers:
-        print("No suppliers found. Please add a supplier first.\n")
+    supplier_id = pick_record(conn, 'supplier', "Enter supplier ID")
+    if supplier_id is None:
+        print("Order canceled.\n")
         return
-    for supplier in suppliers:
-        print(f"{supplier[0]}. {supplier[1]}")
-    
-    while True:
-        try:
-            supplier_id = int(input("Enter supplier ID from the list above: ").strip())
-            if any(sup[0] == supplier_id for sup in suppliers):
-                break
-            else:
-                print("Invalid supplier ID. Please choose a valid ID from the list.")
-        except ValueError:
-            print("Invalid input for supplier ID. Please enter a numeric value.")
-    
-    print("\nAvailable Products:")
-    products = get_products(conn)
-    if not products:
-        print("No products found. Please add a product first.\n")
+    product_id = pick_record(conn, 'product', "Enter product ID")
+    if product_id is None:
+        print("Order canceled.\n")
         return
-    for product in products:
-        print(f"{product[0]}. {product[1]}")
-    
-    while True:
-        try:
-            product_id = int(input("Enter product ID from the list above: ").strip())
-            if any(prod[0] == product_id for prod in products):
-                break
-            else:
-                print("Invalid product ID. Please choose a valid ID from the list.")
-        except ValueError:
-            print("Invalid input for product ID. Please enter a numeric value.")
     
     while True:
         try:
@@ -296,33 +326,17 @@ def add_order(conn):
     
     product_ordered = input("Enter product ordered: ").strip()
     
-    print("\nAvailable Employees:")
-    employees = get_employees(conn)
-    if not employees:
-        print("No employees found. Please add an employee first.\n")
+    supplied_by = pick_record(conn, 'employee', "Enter employee ID who supplied the order")
+    if supplied_by is None:
+        print("Order canceled.\n")
         return
-    for emp in employees:
-        print(f"{emp[0]}. {emp[1]}")
-    
-    while True:
-        try:
-            supplied_by = int(input("Enter employee ID who supplied the order: ").strip())
-            if any(emp[0] == supplied_by for emp in employees):
-                break
-            else:
-                print("Invalid employee ID. Please choose a valid ID from the list.")
-        except ValueError:
-            print("Invalid input for employee ID. Please enter a numeric value.")
     
     order_date = datetime.now().strftime("%Y-%m-%d")
     
-    sql = '''INSERT INTO Orders(order_date, supplier_id, product_id, order_quantity, product_ordered, supplied_by)
-             VALUES(?, ?, ?, ?, ?, ?)'''
-    cur = conn.cursor()
     try:
-        cur.execute(sql, (order_date, supplier_id, product_id, order_quantity, product_ordered, supplied_by))
+        order_id = insert_order(conn, order_date, supplier_id, product_id, order_quantity, product_ordered, supplied_by)
         conn.commit()
-        print(f"Order added successfully with Order ID {cur.lastrowid}.\n")
+        print(f"Order added successfully with Order ID {order_id}.\n")
     except sqlite3.Error as e:
         print(f"An error occurred while adding order: {e}\n")
 
@@ -331,214 +345,310 @@ def view_employees(conn):
     Displays all employees with their details.
     """
     print("\n=== View Employees ===")
-    sql = '''
-    SELECT 
-        e.employee_id,
-        e.employee_name,
-        e.employee_position,
-        e.employee_salary,
-        d.dept_name
-    FROM 
-        Employee e
-    JOIN 
-        Department d ON e.employee_dept = d.dept_id
-    ORDER BY 
-        e.employee_id;
-    '''
-    cur = conn.cursor()
-    try:
-        cur.execute(sql)
-        rows = cur.fetchall()
-        
-        if not rows:
-            print("No employees found.\n")
-            return
-        
-        print("\nEmployees:")
-        print("{:<12} {:<25} {:<20} {:<15} {:<15}".format("Employee ID", "Name", "Position", "Salary", "Department"))
-        print("-" * 90)
-        for row in rows:
-            print("{:<12} {:<25} {:<20} {:<15} {:<15}".format(row[0], row[1], row[2], row[3], row[4]))
-        print()
-    except sqlite3.Error as e:
-        print(f"An error occurred while retrieving employees: {e}\n")
+    show_rows(conn, 'employees', "Employees", PAGED_VIEWS['employees']['headers'])
 
 def view_products(conn):
     """
     Displays all products with their details and inventory quantities.
     """
     print("\n=== View Products ===")
-    sql = '''
-    SELECT 
-        p.product_id,
-        p.product_name,
-        p.product_price,
-        p.product_quantity,
-        d.dept_name,
-        i.quantity_in_stock
-    FROM 
-        Product p
-    LEFT JOIN 
-        Department d ON p.product_dept = d.dept_id
-    LEFT JOIN 
-        Inventory i ON p.product_id = i.product_id
-    ORDER BY 
-        p.product_id;
-    '''
-    cur = conn.cursor()
-    try:
-        cur.execute(sql)
-        rows = cur.fetchall()
-        
-        if not rows:
-            print("No products found.\n")
-            return
-        
-        print("\nProducts:")
-        print("{:<10} {:<25} {:<15} {:<18} {:<15} {:<20}".format(
-            "Product ID", "Product Name", "Price", "Total Quantity", "Department", "Quantity in Stock"))
-        print("-" * 100)
-        for row in rows:
-            qty_in_stock = row[5] if row[5] is not None else "N/A"
-            print("{:<10} {:<25} {:<15} {:<18} {:<15} {:<20}".format(
-                row[0], row[1], row[2], row[3], row[4], qty_in_stock))
-        print()
-    except sqlite3.Error as e:
-        print(f"An error occurred while retrieving products: {e}\n")
+    show_rows(conn, 'products', "Products", PAGED_VIEWS['products']['headers'])
 
 def view_departments(conn):
     """
     Displays all departments.
     """
     print("\n=== View Departments ===")
-    sql = '''
-    SELECT 
-        dept_id,
-        dept_name
-    FROM 
-        Department
-    ORDER BY 
-        dept_id;
-    '''
-    cur = conn.cursor()
-    try:
-        cur.execute(sql)
-        rows = cur.fetchall()
-        
-        if not rows:
-            print("No departments found.\n")
-            return
-        
-        print("\nDepartments:")
-        print("{:<10} {:<25}".format("Dept ID", "Department Name"))
-        print("-" * 35)
-        for row in rows:
-            print("{:<10} {:<25}".format(row[0], row[1]))
-        print()
-    except sqlite3.Error as e:
-        print(f"An error occurred while retrieving departments: {e}\n")
+    show_rows(conn, 'departments', "Departments", ("Dept ID", "Department Name"))
 
 def view_suppliers(conn):
     """
     Displays all suppliers with their details.
     """
     print("\n=== View Suppliers ===")
-    sql = '''
-    SELECT 
-        supplier_id,
-        supplier_name,
-        contact_number,
-        supplier_address
-    FROM 
-        Supplier
-    ORDER BY 
-        supplier_id;
-    '''
-    cur = conn.cursor()
-    try:
-        cur.execute(sql)
-        rows = cur.fetchall()
-        
-        if not rows:
-            print("No suppliers found.\n")
-            return
-        
-        print("\nSuppliers:")
-        print("{:<12} {:<25} {:<15} {:<30}".format("Supplier ID", "Supplier Name", "Contact Number", "Address"))
-        print("-" * 85)
-        for row in rows:
-            contact = row[2] if row[2] is not None else "N/A"
-            address = row[3] if row[3] is not None else "N/A"
-            print("{:<12} {:<25} {:<15} {:<30}".format(row[0], row[1], contact, address))
-        print()
-    except sqlite3.Error as e:
-        print(f"An error occurred while retrieving suppliers: {e}\n")
+    show_rows(conn, 'suppliers', "Suppliers", PAGED_VIEWS['suppliers']['headers'])
 
 def view_orders(conn):
     """
     Displays all orders with their details.
     """
     print("\n=== View Orders ===")
-    sql = '''
-    SELECT 
-        o.order_id,
-        o.order_date,
-        s.supplier_name,
-        p.product_name,
-        o.order_quantity,
-        o.product_ordered,
-        e.employee_name
-    FROM 
-        Orders o
-    LEFT JOIN 
-        Supplier s ON o.supplier_id = s.supplier_id
-    LEFT JOIN 
-        Product p ON o.product_id = p.product_id
-    LEFT JOIN 
-        Employee e ON o.supplied_by = e.employee_id
-    ORDER BY 
-        o.order_date DESC;
-    '''
-    cur = conn.cursor()
+    show_rows(conn, 'orders', "Orders", PAGED_VIEWS['orders']['headers'])
+
+def show_rows(conn, query, label, headers, empty_message=None):
+    """
+    Prints every row of a registered list query as a table (see
+    table_renderer.py). Rows come from the connection's report cache
+    while the database is unchanged, and are otherwise streamed from the
+    cursor (see report_cache.py).
+    """
     try:
-        cur.execute(sql)
-        rows = cur.fetchall()
-        
-        if not rows:
-            print("No orders found.\n")
-            return
-        
-        print("\nOrders:")
-        print("{:<10} {:<12} {:<25} {:<25} {:<15} {:<20} {:<25}".format(
-            "Order ID", "Order Date", "Supplier Name", "Product Name",
-            "Quantity", "Product Ordered", "Supplied By"))
-        print("-" * 130)
-        for row in rows:
-            supplier = row[2] if row[2] is not None else "N/A"
-            product = row[3] if row[3] is not None else "N/A"
-            supplied_by = row[6] if row[6] is not None else "N/A"
-            print("{:<10} {:<12} {:<25} {:<25} {:<15} {:<20} {:<25}".format(
-                row[0], row[1], supplier, product, row[4], row[5], supplied_by))
+        rows = report_cache.cached_rows(conn, query)
+        if not table_renderer.render(headers, rows, title=f"\n{label}:"):
+            print(empty_message or f"No {label.lower()} found.")
         print()
     except sqlite3.Error as e:
-        print(f"An error occurred while retrieving orders: {e}\n")
+        print(f"An error occurred while retrieving {label.lower()}: {e}\n")
+
+# Number of rows shown per page in the paged (browse) views.
+PAGE_SIZE = 20
+
+# Keyset-paginated versions of the view_* screens. Each entry gives the base
+# query (without ORDER BY, from queries.py), the columns that make up the sort
+# key, where those key values sit in a result row, and the column headers of
+# a printed page. A page is the next PAGE_SIZE rows after the last key shown,
+# found with a row-value comparison such as (o.order_date, o.order_id) <
+# (?, ?) in the "filter" clause (WHERE), so every sort key is covered by an
+# index and a page costs the same however deep into the list it is.
+PAGED_VIEWS = {
+    'orders': {
+        'title': 'Orders',
+        'sql': queries.VIEW_BASES['orders'],
+        'filter': 'WHERE',
+        'keys': ('o.order_date', 'o.order_id'),
+        'key_positions': (1, 0),
+        'descending': True,
+        'headers': ("Order ID", "Order Date", "Supplier Name", "Product Name",
+                    "Quantity", "Product Ordered", "Supplied By"),
+    },
+    'employees': {
+        'title': 'Employees',
+        'sql': queries.VIEW_BASES['employees'],
+        'filter': 'WHERE',
+        'keys': ('e.employee_id',),
+        'key_positions': (0,),
+        'descending': False,
+        'headers': ("Employee ID", "Name", "Position", "Salary", "Department"),
+    },
+    'products': {
+        'title': 'Products',
+        'sql': queries.VIEW_BASES['products'],
+        'filter': 'WHERE',
+        'keys': ('p.product_id',),
+        'key_positions': (0,),
+        'descending': False,
+        'headers': ("Product ID", "Product Name", "Price", "Total Quantity",
+                    "Department", "Quantity in Stock"),
+    },
+    'suppliers': {
+        'title': 'Suppliers',
+        'sql': queries.VIEW_BASES['suppliers'],
+        'filter': 'WHERE',
+        'keys': ('supplier_id',),
+        'key_positions': (0,),
+        'descending': False,
+        'headers': ("Supplier ID", "Supplier Name", "Contact Number", "Address"),
+    },
+    'sales': {
+        'title': 'Sales Report',
+        'sql': queries.VIEW_BASES['sales'],
+        'filter': 'WHERE',
+        'keys': ('ss.total_quantity_sold', 'ss.product_id'),
+        'key_positions': (2, 0),
+        'descending': True,
+        'headers': ("Product ID", "Product Name", "Total Quantity Sold"),
+    },
+}
+
+# Orders from both the live database and the archive (see archive_orders.py),
+# laid out like the Orders view. Only available with the archive attached.
+PAGED_VIEWS['order-history'] = dict(PAGED_VIEWS['orders'],
+                                    title='Order History',
+                                    sql=queries.VIEW_BASES['order-history'],
+                                    archive=True)
+
+def fetch_page(conn, view, boundary=None, backward=False, page_size=PAGE_SIZE, conditions=(), params=()):
+    """
+    Fetches one page of a paged view using keyset pagination.
+
+    boundary is the sort key of the row the page starts after (or, when
+    backward is True, the row it ends before). Only page_size rows are ever
+    read from the cursor, so memory use does not depend on the table size.
+    conditions and params narrow the view further (see order_filters).
+    """
+    spec = PAGED_VIEWS[view]
+    # Walking backward scans in the opposite direction and flips the result.
+    descending = spec['descending'] != backward
+    direction = 'DESC' if descending else 'ASC'
+
+    sql = spec['sql']
+    conditions = list(conditions)
+    params = list(params)
+    if boundary is not None:
+        keys = ", ".join(spec['keys'])
+        placeholders = ", ".join("?" for _ in spec['keys'])
+        operator = '<' if descending else '>'
+        conditions.append(f"({keys}) {operator} ({placeholders})")
+        params.extend(boundary)
+    if conditions:
+        sql += f"{spec['filter']} " + " AND ".join(conditions) + "\n"
+    sql += "ORDER BY " + ", ".join(f"{key} {direction}" for key in spec['keys'])
+    sql += "\nLIMIT ?"
+    params.append(page_size)
+
+    cur = conn.cursor()
+    cur.execute(sql, params)
+    rows = cur.fetchmany(page_size)
+    cur.close()
+    if backward:
+        rows.reverse()
+    return rows
+
+def page_key(view, row):
+    """
+    Returns the keyset pagination key of a row from the given paged view.
+    """
+    return tuple(row[i] for i in PAGED_VIEWS[view]['key_positions'])
+
+def print_page(view, rows, page_number):
+    """
+    Prints one page of a paged view.
+    """
+    spec = PAGED_VIEWS[view]
+    # A page is short, so it is never sent to the pager.
+    table_renderer.render(spec['headers'], rows, title=f"\n{spec['title']} (page {page_number}):", pager=False)
+    print()
+
+def stream_view(conn, view, batch_size=1000):
+    """
+    Yields every row of a paged view (or any registered list query) in its
+    sort order, reading the cursor batch_size rows at a time. Returns the
+    column names as the first item.
+    """
+    # The registered full-list query of each view has the same sort order.
+    cur = queries.execute(conn, view)
+    yield [column[0] for column in cur.description]
+    while True:
+        rows = cur.fetchmany(batch_size)
+        if not rows:
+            break
+        yield from rows
+    cur.close()
+
+def browse_paged(conn, view, conditions=(), params=(), title=None):
+    """
+    Shows a view one page at a time with next/previous navigation,
+    optionally narrowed by conditions and params (see fetch_page).
+    """
+    spec = PAGED_VIEWS[view]
+    print(f"\n=== {title or 'Browse ' + spec['title']} ===")
+    if spec.get('archive') and not archive_orders.attach_default_archive(conn):
+        print("No archive database found. Run archive_orders.py to create one.\n")
+        return
+    try:
+        rows = fetch_page(conn, view, conditions=conditions, params=params)
+    except sqlite3.Error as e:
+        print(f"An error occurred while retrieving {spec['title'].lower()}: {e}\n")
+        return
+
+    if not rows:
+        print(f"No {spec['title'].lower()} found.\n")
+        return
+
+    page_number = 1
+    while True:
+        print_page(view, rows, page_number)
+        choice = input("[n]ext page, [p]revious page, [q]uit: ").strip().lower()
+        if choice == 'q':
+            print()
+            return
+        elif choice in ('n', 'p'):
+            backward = choice == 'p'
+            boundary = page_key(view, rows[0] if backward else rows[-1])
+            try:
+                new_rows = fetch_page(conn, view, boundary, backward, conditions=conditions, params=params)
+            except sqlite3.Error as e:
+                print(f"An error occurred while retrieving {spec['title'].lower()}: {e}\n")
+                return
+            if not new_rows:
+                print("Already on the first page." if backward else "No more rows.")
+                continue
+            rows = new_rows
+            page_number += -1 if backward else 1
+        else:
+            print("Invalid choice. Please enter n, p or q.")
+
+def browse_menu(conn):
+    """
+    Asks which view to browse and opens it in paged mode.
+    """
+    print("\n=== Browse Records (Paged) ===")
+    print("1. Orders")
+    print("2. Employees")
+    print("3. Products")
+    print("4. Suppliers")
+    print("5. Sales Report")
+    print("6. Order History (Live and Archived)")
+    views = {'1': 'orders', '2': 'employees', '3': 'products', '4': 'suppliers', '5': 'sales',
+             '6': 'order-history'}
+    choice = input("Enter your choice (1-6): ").strip()
+    if choice not in views:
+        print("Invalid choice.\n")
+        return
+    browse_paged(conn, views[choice])
+
+# Conditions of the order search, by filter name. Each ID filter is served by
+# one of the (column, order_date) indexes, so results come back in the
+# listing's order without sorting.
+ORDER_FILTERS = {
+    'supplier_id': "o.supplier_id = ?",
+    'product_id': "o.product_id = ?",
+    'employee_id': "o.supplied_by = ?",
+    'date_from': "o.order_date >= ?",
+    'date_to': "o.order_date <= ?",
+}
+
+def order_filters(**filters):
+    """
+    Returns (conditions, params) for fetch_page from the order search
+    filters that are set, e.g. order_filters(supplier_id=401, date_from='2024-01-01').
+    """
+    conditions = []
+    params = []
+    for name, value in filters.items():
+        if name not in ORDER_FILTERS:
+            raise ValueError(f"Unknown order filter '{name}'")
+        if value is not None:
+            conditions.append(ORDER_FILTERS[name])
+            params.append(value)
+    return conditions, params
+
+def search_orders(conn):
+    """
+    Searches orders by date range, supplier, product and employee and shows
+    the matches one page at a time.
+    """
+    print("\n=== Search Orders ===")
+    print("Leave a filter blank to match any value.")
+    filters = {}
+    for name, label, kind in (('supplier_id', "Supplier ID", 'supplier'),
+                              ('product_id', "Product ID", 'product'),
+                              ('employee_id', "Employee ID (supplied by)", 'employee')):
+        value = pick_record(conn, kind, label, optional=True)
+        if value is not None:
+            filters[name] = value
+
+    for name, label in (('date_from', "From date (YYYY-MM-DD)"), ('date_to', "To date (YYYY-MM-DD)")):
+        while True:
+            value = input(f"{label}: ").strip()
+            if not value:
+                break
+            try:
+                datetime.strptime(value, "%Y-%m-%d")
+                filters[name] = value
+                break
+            except ValueError:
+                print("Invalid date format. Please use YYYY-MM-DD.")
+
+    conditions, params = order_filters(**filters)
+    browse_paged(conn, 'orders', conditions, params, title="Order Search Results")
 
 def get_departments(conn):
     """
     Retrieves all departments.
     """
-    sql = '''
-    SELECT 
-        dept_id,
-        dept_name
-    FROM 
-        Department
-    ORDER BY 
-        dept_id;
-    '''
-    cur = conn.cursor()
     try:
-        cur.execute(sql)
+        cur = queries.execute(conn, 'departments')
         return cur.fetchall()
     except sqlite3.Error as e:
         print(f"An error occurred while retrieving departments: {e}\n")
@@ -548,26 +658,8 @@ def get_products(conn):
     """
     Retrieves all products along with inventory quantities.
     """
-    sql = '''
-    SELECT 
-        p.product_id,
-        p.product_name,
-        p.product_price,
-        p.product_quantity,
-        d.dept_name,
-        i.quantity_in_stock
-    FROM 
-        Product p
-    LEFT JOIN 
-        Department d ON p.product_dept = d.dept_id
-    LEFT JOIN 
-        Inventory i ON p.product_id = i.product_id
-    ORDER BY 
-        p.product_id;
-    '''
-    cur = conn.cursor()
     try:
-        cur.execute(sql)
+        cur = queries.execute(conn, 'products')
         return cur.fetchall()
     except sqlite3.Error as e:
         print(f"An error occurred while retrieving products: {e}\n")
@@ -577,20 +669,8 @@ def get_suppliers(conn):
     """
     Retrieves all suppliers.
     """
-    sql = '''
-    SELECT 
-        supplier_id,
-        supplier_name,
-        contact_number,
-        supplier_address
-    FROM 
-        Supplier
-    ORDER BY 
-        supplier_id;
-    '''
-    cur = conn.cursor()
     try:
-        cur.execute(sql)
+        cur = queries.execute(conn, 'suppliers')
         return cur.fetchall()
     except sqlite3.Error as e:
         print(f"An error occurred while retrieving suppliers: {e}\n")
@@ -600,18 +680,8 @@ def get_employees(conn):
     """
     Retrieves all employees.
     """
-    sql = '''
-    SELECT 
-        employee_id,
-        employee_name
-    FROM 
-        Employee
-    ORDER BY 
-        employee_id;
-    '''
-    cur = conn.cursor()
     try:
-        cur.execute(sql)
+        cur = queries.execute(conn, 'employee_names')
         return cur.fetchall()
     except sqlite3.Error as e:
         print(f"An error occurred while retrieving employees: {e}\n")
@@ -621,35 +691,84 @@ def get_orders_by_supplier(conn, supplier_id):
     """
     Retrieves all orders associated with a given supplier ID.
     """
-    sql = '''
-    SELECT 
-        order_id,
-        order_date,
-        product_ordered,
-        order_quantity
-    FROM 
-        Orders
-    WHERE 
-        supplier_id = ?
-    '''
-    cur = conn.cursor()
     try:
-        cur.execute(sql, (supplier_id,))
+        cur = queries.execute(conn, 'orders_by_supplier', (supplier_id,))
         return cur.fetchall()
     except sqlite3.Error as e:
         print(f"An error occurred while retrieving orders: {e}\n")
         return []
 
-def delete_orders_by_supplier(conn, supplier_id):
+# Data-layer versions of the add/update/delete operations. They run a single
+# statement and leave committing to the caller, so the interactive screens,
+# the command mode and batch files can all share them.
+
+def insert_employee(conn, employee_name, employee_position, employee_salary, employee_dept):
+    """
+    Inserts an employee without committing. Returns the new employee ID.
+    """
+    cur = queries.execute(conn, 'insert_employee',
+                          (employee_name, employee_position, employee_salary, employee_dept))
+    return cur.lastrowid
+
+def insert_order(conn, order_date, supplier_id, product_id, order_quantity, product_ordered, supplied_by):
+    """
+    Inserts an order without committing. Returns the new order ID.
+    """
+    cur = queries.execute(conn, 'insert_order',
+                          (order_date, supplier_id, product_id, order_quantity, product_ordered, supplied_by))
+    return cur.lastrowid
+
+def set_stock_quantity(conn, product_id, quantity):
     """
-    Deletes all orders associated with a given supplier ID.
+    Sets quantity_in_stock for a product without committing.
+    Returns the number of Inventory rows updated.
+    """
+    cur = queries.execute(conn, 'set_stock_quantity', (quantity, product_id))
+    return cur.rowcount
+
+def remove_order(conn, order_id):
+    """
+    Deletes an order without committing. Returns the number of rows deleted.
+    """
+    cur = queries.execute(conn, 'delete_order', (order_id,))
+    return cur.rowcount
+
+def remove_orders_by_supplier(conn, supplier_id):
+    """
+    Deletes every order of a supplier without committing.
+    Returns the number of rows deleted.
+    """
+    cur = queries.execute(conn, 'delete_orders_by_supplier', (supplier_id,))
+    return cur.rowcount
+
+def remove_supplier(conn, supplier_id):
+    """
+    Deletes a supplier without committing. Returns the number of rows deleted.
+    """
+    cur = queries.execute(conn, 'delete_supplier', (supplier_id,))
+    return cur.rowcount
+
+def record_exists(conn, table, key_column, key):
+    """
+    Checks whether a row with the given key exists, using an index lookup.
     """
-    sql = '''DELETE FROM Orders WHERE supplier_id = ?'''
     cur = conn.cursor()
+    cur.execute(f"SELECT 1 FROM {table} WHERE {key_column} = ? LIMIT 1", (key,))
+    return cur.fetchone() is not None
+
+def order_exists(conn, order_id):
+    """
+    Checks whether an order exists, using the primary key.
+    """
+    return record_exists(conn, 'Orders', 'order_id', order_id)
+
+def delete_orders_by_supplier(conn, supplier_id):
+    """
+    Deletes all orders associated with a given supplier ID, a chunk per
+    transaction (see purge_orders.py).
+    """
     try:
-        cur.execute(sql, (supplier_id,))
-        deleted_count = cur.rowcount
-        conn.commit()
+        deleted_count, _ = purge_orders.purge_orders(conn, "supplier_id = ?", (supplier_id,))
         print(f"{deleted_count} order(s) associated with supplier ID {supplier_id} deleted successfully.\n")
     except sqlite3.Error as e:
         print(f"An error occurred while deleting orders: {e}\n")
@@ -658,34 +777,116 @@ def get_all_orders(conn):
     """
     Retrieves all orders with detailed information.
     """
-    sql = '''
-    SELECT 
-        o.order_id,
-        o.order_date,
-        s.supplier_name,
-        p.product_name,
-        o.order_quantity,
-        o.product_ordered,
-        e.employee_name
-    FROM 
-        Orders o
-    LEFT JOIN 
-        Supplier s ON o.supplier_id = s.supplier_id
-    LEFT JOIN 
-        Product p ON o.product_id = p.product_id
-    LEFT JOIN 
-        Employee e ON o.supplied_by = e.employee_id
-    ORDER BY 
-        o.order_date DESC;
-    '''
-    cur = conn.cursor()
     try:
-        cur.execute(sql)
+        cur = queries.execute(conn, 'orders')
         return cur.fetchall()
     except sqlite3.Error as e:
         print(f"An error occurred while retrieving orders: {e}\n")
         return []
 
+def export_menu(conn):
+    """
+    Exports a table or listing to a CSV, JSONL or Parquet file, optionally
+    limited to a date range or to rows after a given ID.
+    """
+    print("\n=== Export Data ===")
+    sources = list(export_data.SOURCES)
+    for number, source in enumerate(sources, 1):
+        print(f"{number}. {source}")
+    try:
+        source = sources[int(input(f"Enter your choice (1-{len(sources)}): ").strip()) - 1]
+    except (ValueError, IndexError):
+        print("Invalid choice.\n")
+        return
+
+    file_format = input("Format (csv, jsonl or parquet) [csv]: ").strip().lower() or 'csv'
+    if file_format not in export_data.FORMATS:
+        print("Invalid format.\n")
+        return
+    default_file = export_data.default_output(source, file_format)
+    output = input(f"Output file [{default_file}]: ").strip() or default_file
+
+    date_from = date_to = None
+    if export_data.SOURCES[source]['date']:
+        date_from = input("From date (YYYY-MM-DD, blank for no limit): ").strip() or None
+        date_to = input("To date (YYYY-MM-DD, blank for no limit): ").strip() or None
+        try:
+            for value in (date_from, date_to):
+                if value:
+                    datetime.strptime(value, "%Y-%m-%d")
+        except ValueError:
+            print("Invalid date format. Please use YYYY-MM-DD.\n")
+            return
+    since_id = input("Only rows with an ID greater than (blank for all): ").strip()
+    try:
+        since_id = int(since_id) if since_id else None
+    except ValueError:
+        print("Invalid input for ID. Please enter a numeric value.\n")
+        return
+
+    try:
+        count, last_id = export_data.export(conn, source, output, file_format, since_id, date_from, date_to)
+        print(f"Exported {count} row(s) to {output}"
+              + (f" (last ID {last_id}).\n" if last_id is not None else ".\n"))
+    except (sqlite3.Error, ValueError, OSError) as e:
+        print(f"An error occurred while exporting data: {e}\n")
+
+def analytics_menu(conn):
+    """
+    Asks which analytics report to show, and for the order reports the
+    period and date range, then shows it.
+    """
+    print("\n=== Analytics Reports ===")
+    reports = list(analytics.REPORTS)
+    for number, report in enumerate(reports, 1):
+        print(f"{number}. {analytics.REPORTS[report]['title'].format(grain='period')}")
+    try:
+        report = reports[int(input(f"Enter your choice (1-{len(reports)}): ").strip()) - 1]
+    except (ValueError, IndexError):
+        print("Invalid choice.\n")
+        return
+
+    grain = 'month'
+    date_from = date_to = None
+    if analytics.REPORTS[report]['periods']:
+        grain = input(f"Period ({', '.join(analytics.GRAINS)}) [month]: ").strip().lower() or 'month'
+        if grain not in analytics.GRAINS:
+            print("Invalid period.\n")
+            return
+        date_from = input("From date (YYYY-MM-DD, blank for no limit): ").strip() or None
+        date_to = input("To date (YYYY-MM-DD, blank for no limit): ").strip() or None
+        try:
+            for value in (date_from, date_to):
+                if value:
+                    datetime.strptime(value, "%Y-%m-%d")
+        except ValueError:
+            print("Invalid date format. Please use YYYY-MM-DD.\n")
+            return
+    top = None
+    if analytics.REPORTS[report]['top']:
+        top = input("Show only the top N (blank for all): ").strip()
+        try:
+            top = int(top) if top else None
+        except ValueError:
+            print("Invalid input for N. Please enter a numeric value.\n")
+            return
+
+    try:
+        analytics.show_report(conn, report, grain, date_from, date_to, top)
+        print()
+    except sqlite3.Error as e:
+        print(f"An error occurred while running the report: {e}\n")
+
+def view_query_stats():
+    """
+    Displays the timing of every statement run in this session, and
+    optionally clears it.
+    """
+    instrumentation.print_stats()
+    if input("Reset the statistics? (yes/no): ").strip().lower() == 'yes':
+        instrumentation.stats.reset()
+        print("Statistics reset.\n")
+
 def main_menu():
     """
     Displays the main menu.
@@ -703,17 +904,35 @@ def main_menu():
     print("9. View Suppliers")
     print("10. View Orders")
     print("11. Delete an Order")
-    print("12. Exit")
+    print("12. Browse Records (Paged)")
+    print("13. Query Statistics")
+    print("14. Export Data")
+    print("15. Search Orders")
+    print("16. Analytics Reports")
+    print("17. Exit")
 
 def main():
+    # Any command-line arguments run the non-interactive command mode instead
+    # of the menu (see cli_commands.py).
+    if len(sys.argv) > 1:
+        import cli_commands
+        sys.exit(cli_commands.main(sys.argv[1:]))
+
     database = "business.db"
     conn = create_connection(database)
     if not conn:
         return
 
+    # Upgrade older database files in place before using them, then make
+    # sure every query still matches the schema
+    migrations.migrate(conn)
+    if not queries.warm_up(conn):
+        conn.close()
+        return
+
     while True:
         main_menu()
-        choice = input("Enter your choice (1-12): ").strip()
+        choice = input("Enter your choice (1-17): ").strip()
 
         if choice == '1':
             # Add a New Employee
@@ -760,12 +979,34 @@ def main():
             delete_order(conn)
 
         elif choice == '12':
+            # Browse Records (Paged)
+            browse_menu(conn)
+
+        elif choice == '13':
+            # Query Statistics
+            view_query_stats()
+
+        elif choice == '14':
+            # Export Data
+            export_menu(conn)
+
+        elif choice == '15':
+            # Search Orders
+            search_orders(conn)
+
+        elif choice == '16':
+            # Analytics Reports
+            analytics_menu(conn)
+
+        elif choice == '17':
             print("Exiting the application. Goodbye!")
             break
 
         else:
             print("Invalid choice. Please select a valid option.\n")
 
+    lookup_cache.discard(conn)
+    report_cache.discard(conn)
     conn.close()
 
 if __name__ == "__main__":
@@ -0,0 +1,388 @@
+# cli_commands.py
+
+import argparse
+import csv
+import json
+import shlex
+import sqlite3
+import sys
+from datetime import datetime
+
+import archive_orders
+import cli_application as cli
+import db_profiles
+import instrumentation
+import migrations
+import purge_orders
+import queries
+
+# Columns of the record written for every operation.
+RESULT_FIELDS = ('line', 'command', 'status', 'id', 'rowcount', 'error')
+
+# Operations per transaction in batch mode.
+BATCH_SIZE = 1000
+
+# Columns of an order search result, as in the orders listing.
+SEARCH_FIELDS = ('order_id', 'order_date', 'supplier_name', 'product_name',
+                 'order_quantity', 'product_ordered', 'employee_name')
+
+class OperationParser(argparse.ArgumentParser):
+    """
+    Argument parser for the lines of a batch file: reports errors by raising
+    ValueError instead of exiting, so one bad line does not end the batch.
+    """
+
+    def error(self, message):
+        raise ValueError(message)
+
+def add_operation_parsers(subparsers):
+    """
+    Adds the add/update/delete subcommands to a subparsers object.
+    """
+    sub = subparsers.add_parser('add-employee', help="add a new employee")
+    sub.add_argument('--name', required=True)
+    sub.add_argument('--position', required=True)
+    sub.add_argument('--salary', type=float, required=True)
+    sub.add_argument('--dept', type=int, required=True, help="department ID")
+
+    sub = subparsers.add_parser('add-order', help="add a new order")
+    sub.add_argument('--supplier', type=int, required=True, help="supplier ID")
+    sub.add_argument('--product', type=int, required=True, help="product ID")
+    sub.add_argument('--quantity', type=int, required=True)
+    sub.add_argument('--product-ordered', required=True)
+    sub.add_argument('--employee', type=int, required=True, help="ID of the employee who supplied the order")
+    sub.add_argument('--date', help="order date, YYYY-MM-DD (default: today)")
+
+    sub = subparsers.add_parser('update-stock', help="set a product's quantity in stock")
+    sub.add_argument('--product', type=int, required=True, help="product ID")
+    sub.add_argument('--quantity', type=int, required=True)
+
+    sub = subparsers.add_parser('delete-order', help="delete an order")
+    sub.add_argument('--order', type=int, required=True, help="order ID")
+
+    sub = subparsers.add_parser('delete-supplier', help="delete a supplier")
+    sub.add_argument('--supplier', type=int, required=True, help="supplier ID")
+    sub.add_argument('--with-orders', action='store_true', help="also delete the supplier's orders")
+    sub.add_argument('--dry-run', action='store_true',
+                     help="only report how many rows would be deleted (supplier and orders)")
+
+def build_parser():
+    """
+    Returns the parser for the command line.
+    """
+    parser = argparse.ArgumentParser(
+        prog="cli_application.py",
+        description="Run one business database operation, or a file of them, without the menu.")
+    parser.add_argument('--database', default="business.db", help="database file (default: business.db)")
+    parser.add_argument('--profile', help="connection profile from db_profiles.py")
+    parser.add_argument('--format', choices=('json', 'csv'), default='json',
+                        help="output format: JSON Lines or CSV (default: json)")
+    parser.add_argument('--stats', action='store_true',
+                        help="time every statement and print the query statistics to standard error")
+    parser.add_argument('--slow-ms', type=float,
+                        help=f"log statements slower than this to {instrumentation.SLOW_QUERY_LOG} "
+                             f"(implies --stats; default: {instrumentation.SLOW_QUERY_MS})")
+    subparsers = parser.add_subparsers(dest='command', required=True)
+    add_operation_parsers(subparsers)
+
+    sub = subparsers.add_parser('report', help="print a report")
+    sub.add_argument('view', choices=tuple(cli.PAGED_VIEWS), help="which report to print")
+
+    sub = subparsers.add_parser('search', help="search orders, newest first, one page at a time")
+    sub.add_argument('--supplier', type=int, help="supplier ID")
+    sub.add_argument('--product', type=int, help="product ID")
+    sub.add_argument('--employee', type=int, help="ID of the employee who supplied the order")
+    sub.add_argument('--from', dest='date_from', help="first order date, YYYY-MM-DD")
+    sub.add_argument('--to', dest='date_to', help="last order date, YYYY-MM-DD")
+    sub.add_argument('--limit', type=int, default=cli.PAGE_SIZE,
+                     help=f"orders per page (default: {cli.PAGE_SIZE})")
+    sub.add_argument('--after', help="DATE,ORDER_ID key printed after the previous page")
+
+    sub = subparsers.add_parser('batch', help="run every operation in a file")
+    sub.add_argument('file', help="file with one operation per line ('-' for standard input)")
+    sub.add_argument('--batch-size', type=int, default=BATCH_SIZE,
+                     help=f"operations per transaction (default: {BATCH_SIZE})")
+    sub.add_argument('--stop-on-error', action='store_true', help="stop at the first failed operation")
+    return parser
+
+def build_operation_parser():
+    """
+    Returns the parser for one line of a batch file.
+    """
+    parser = OperationParser(prog="batch line", add_help=False)
+    subparsers = parser.add_subparsers(dest='command', required=True, parser_class=OperationParser)
+    add_operation_parsers(subparsers)
+    return parser
+
+def require(conn, table, key_column, key, label):
+    """
+    Raises ValueError if the referenced row does not exist.
+    """
+    if not cli.record_exists(conn, table, key_column, key):
+        raise ValueError(f"{label} {key} does not exist")
+
+def run_operation(conn, args):
+    """
+    Runs one add/update/delete operation without committing.
+    Returns (new row ID, rows affected); raises ValueError or sqlite3.Error.
+    """
+    if args.command == 'add-employee':
+        require(conn, 'Department', 'dept_id', args.dept, "Department ID")
+        return cli.insert_employee(conn, args.name, args.position, args.salary, args.dept), 1
+
+    if args.command == 'add-order':
+        if args.quantity <= 0:
+            raise ValueError("Order quantity must be greater than zero")
+        require(conn, 'Supplier', 'supplier_id', args.supplier, "Supplier ID")
+        require(conn, 'Product', 'product_id', args.product, "Product ID")
+        require(conn, 'Employee', 'employee_id', args.employee, "Employee ID")
+        order_date = args.date or datetime.now().strftime("%Y-%m-%d")
+        datetime.strptime(order_date, "%Y-%m-%d")
+        return cli.insert_order(conn, order_date, args.supplier, args.product,
+                                args.quantity, args.product_ordered, args.employee), 1
+
+    if args.command == 'update-stock':
+        if args.quantity < 0:
+            raise ValueError("Quantity cannot be negative")
+        rowcount = cli.set_stock_quantity(conn, args.product, args.quantity)
+        if rowcount == 0:
+            raise ValueError(f"Product ID {args.product} not found in Inventory")
+        return None, rowcount
+
+    if args.command == 'delete-order':
+        rowcount = cli.remove_order(conn, args.order)
+        if rowcount == 0:
+            raise ValueError(f"Order ID {args.order} not found")
+        return None, rowcount
+
+    if args.command == 'delete-supplier':
+        orders = purge_orders.count_orders(conn, "supplier_id = ?", (args.supplier,))
+        if getattr(args, 'dry_run', False):
+            # Counts the supplier and its orders, whether or not the real
+            # delete would be allowed.
+            return None, orders + int(cli.record_exists(conn, 'Supplier', 'supplier_id', args.supplier))
+        require(conn, 'Supplier', 'supplier_id', args.supplier, "Supplier ID")
+        if orders and not args.with_orders:
+            raise ValueError(f"Supplier ID {args.supplier} has {orders} order(s); "
+                             f"use --with-orders to delete them too")
+        # The orders and the supplier go in the caller's one transaction. For
+        # suppliers with very many orders, purge_orders.py deletes in chunks.
+        rowcount = cli.remove_orders_by_supplier(conn, args.supplier) if orders else 0
+        rowcount += cli.remove_supplier(conn, args.supplier)
+        return None, rowcount
+
+    raise ValueError(f"Unknown operation '{args.command}'")
+
+def result_record(line, command, new_id=None, rowcount=None, error=None):
+    """
+    Builds the output record for one operation.
+    """
+    return {
+        'line': line,
+        'command': command,
+        'status': 'error' if error else 'ok',
+        'id': new_id,
+        'rowcount': rowcount,
+        'error': error,
+    }
+
+class RecordWriter:
+    """
+    Writes records (dicts) to a stream as JSON Lines or CSV.
+    """
+
+    def __init__(self, output_format, fields, stream=None):
+        self.output_format = output_format
+        self.fields = list(fields)
+        self.stream = stream or sys.stdout
+        self.csv_writer = None
+        if output_format == 'csv':
+            self.csv_writer = csv.writer(self.stream)
+            self.csv_writer.writerow(self.fields)
+
+    def write(self, values):
+        """
+        Writes one record given as a sequence of values in field order.
+        """
+        if self.csv_writer:
+            self.csv_writer.writerow(values)
+        else:
+            self.stream.write(json.dumps(dict(zip(self.fields, values))) + "\n")
+
+    def write_record(self, record):
+        """
+        Writes one record given as a dict.
+        """
+        self.write([record.get(field) for field in self.fields])
+
+def parse_batch_line(parser, text):
+    """
+    Parses one line of a batch file into operation arguments.
+
+    A line is either written like the command line
+        add-order --supplier 401 --product 202 --quantity 5 --product-ordered Laptop --employee 101
+    or a JSON object with a "command" key and the option names as keys
+        {"command": "update-stock", "product": 201, "quantity": 40}
+    """
+    if text.startswith('{'):
+        try:
+            fields = json.loads(text)
+        except json.JSONDecodeError as e:
+            raise ValueError(f"invalid JSON: {e}")
+        argv = [str(fields.pop('command', ''))]
+        for key, value in fields.items():
+            option = "--" + key.replace('_', '-')
+            if value is True:
+                argv.append(option)
+            elif value is not False and value is not None:
+                argv.extend([option, str(value)])
+    else:
+        argv = shlex.split(text)
+    return parser.parse_args(argv)
+
+def run_batch(conn, lines, writer, batch_size=BATCH_SIZE, stop_on_error=False):
+    """
+    Runs the operations of a batch file in one process, committing every
+    batch_size operations. Each operation runs in its own savepoint, so a
+    failed one is rolled back without undoing the rest of its batch.
+    Returns (operations run, operations failed).
+    """
+    parser = build_operation_parser()
+    if conn.in_transaction:
+        conn.commit()
+    total = failed = pending = 0
+
+    for line_number, text in enumerate(lines, 1):
+        text = text.strip()
+        if not text or text.startswith('#'):
+            continue
+        total += 1
+        if not conn.in_transaction:
+            conn.execute("BEGIN")
+        conn.execute("SAVEPOINT operation")
+        command = None
+        try:
+            args = parse_batch_line(parser, text)
+            command = args.command
+            new_id, rowcount = run_operation(conn, args)
+            conn.execute("RELEASE operation")
+            writer.write_record(result_record(line_number, command, new_id, rowcount))
+        except (ValueError, sqlite3.Error) as e:
+            conn.execute("ROLLBACK TO operation")
+            conn.execute("RELEASE operation")
+            failed += 1
+            writer.write_record(result_record(line_number, command, error=str(e)))
+            if stop_on_error:
+                break
+        pending += 1
+        if pending >= batch_size:
+            conn.commit()
+            pending = 0
+
+    if conn.in_transaction:
+        conn.commit()
+    return total, failed
+
+def run_report(conn, view, writer_format):
+    """
+    Streams one of the reports to standard output.
+    """
+    if cli.PAGED_VIEWS[view].get('archive') and not archive_orders.attach_default_archive(conn):
+        raise ValueError("no archive database found; run archive_orders.py to create one")
+    rows = cli.stream_view(conn, view)
+    writer = RecordWriter(writer_format, next(rows))
+    for row in rows:
+        writer.write(row)
+
+def parse_order_key(text):
+    """
+    Parses a "DATE,ORDER_ID" page key such as "2024-01-15,501".
+    """
+    try:
+        order_date, order_id = text.split(',')
+        return order_date, int(order_id)
+    except ValueError:
+        raise ValueError(f"invalid page key '{text}' (use DATE,ORDER_ID)")
+
+def run_search(conn, args, writer_format):
+    """
+    Writes one page of an order search to standard output and the key of
+    the next page, if there is one, to standard error.
+    """
+    for value in (args.date_from, args.date_to):
+        if value:
+            datetime.strptime(value, "%Y-%m-%d")
+    conditions, params = cli.order_filters(supplier_id=args.supplier, product_id=args.product,
+                                           employee_id=args.employee, date_from=args.date_from,
+                                           date_to=args.date_to)
+    after = parse_order_key(args.after) if args.after else None
+    rows = cli.fetch_page(conn, 'orders', after, page_size=args.limit, conditions=conditions, params=params)
+    writer = RecordWriter(writer_format, SEARCH_FIELDS)
+    for row in rows:
+        writer.write(row)
+    if len(rows) == args.limit:
+        order_date, order_id = cli.page_key('orders', rows[-1])
+        print(f"More results: --after {order_date},{order_id}", file=sys.stderr)
+
+def main(argv=None):
+    """
+    Entry point of the command mode. Returns the process exit code.
+    """
+    args = build_parser().parse_args(argv)
+    options = {}
+    if args.stats or args.slow_ms is not None:
+        options['factory'] = instrumentation.InstrumentedConnection
+        if args.slow_ms is not None:
+            instrumentation.stats.slow_ms = args.slow_ms
+
+    try:
+        conn, _, _ = db_profiles.connect(args.database, args.profile, **options)
+    except (sqlite3.Error, ValueError) as e:
+        print(f"Error connecting to database: {e}", file=sys.stderr)
+        return 1
+    if not migrations.migrate(conn, verbose=False):
+        conn.close()
+        return 1
+    problems = queries.check_queries(conn)
+    if problems:
+        for name, message in problems:
+            print(f"Error: query '{name}' does not match the schema: {message}", file=sys.stderr)
+        conn.close()
+        return 1
+
+    status = 0
+    try:
+        if args.command == 'report':
+            run_report(conn, args.view, args.format)
+        elif args.command == 'search':
+            run_search(conn, args, args.format)
+        elif args.command == 'batch':
+            writer = RecordWriter(args.format, RESULT_FIELDS)
+            if args.file == '-':
+                total, failed = run_batch(conn, sys.stdin, writer, args.batch_size, args.stop_on_error)
+            else:
+                with open(args.file) as lines:
+                    total, failed = run_batch(conn, lines, writer, args.batch_size, args.stop_on_error)
+            print(f"{total - failed} of {total} operation(s) succeeded.", file=sys.stderr)
+            status = 1 if failed else 0
+        else:
+            writer = RecordWriter(args.format, RESULT_FIELDS)
+            try:
+                new_id, rowcount = run_operation(conn, args)
+                conn.commit()
+                writer.write_record(result_record(None, args.command, new_id, rowcount))
+            except (ValueError, sqlite3.Error) as e:
+                conn.rollback()
+                writer.write_record(result_record(None, args.command, error=str(e)))
+                status = 1
+    except (OSError, ValueError, sqlite3.Error) as e:
+        print(f"An error occurred: {e}", file=sys.stderr)
+        status = 1
+
+    conn.close()
+    if options:
+        instrumentation.print_stats(stream=sys.stderr)
+    return status
+
+if __name__ == "__main__":
+    sys.exit(main())
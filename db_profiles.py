@@ -0,0 +1,213 @@
+# db_profiles.py
+
+import configparser
+import os
+import sqlite3
+import sys
+
+import queries
+
+# Named SQLite settings. page_size and journal_mode are stored in the database
+# file and only need changing once; the rest apply to each new connection.
+# A value of None leaves that setting as it is.
+PROFILES = {
+    # A full fsync on every commit (SQLite's defaults). Keeps whatever journal
+    # mode the file already uses; both are durable with synchronous=FULL.
+    'durable': {
+        'page_size': None,
+        'journal_mode': None,
+        'synchronous': 'FULL',
+        'cache_size': -2000,
+        'mmap_size': 0,
+        'temp_store': 'DEFAULT',
+        'busy_timeout': 5000,
+    },
+    # WAL lets readers run alongside the writer, and synchronous=NORMAL only
+    # fsyncs at checkpoints. Still safe against application crashes.
+    'throughput': {
+        'page_size': 8192,
+        'journal_mode': 'WAL',
+        'synchronous': 'NORMAL',
+        'cache_size': -65536,
+        'mmap_size': 268435456,
+        'temp_store': 'MEMORY',
+        'busy_timeout': 5000,
+    },
+    # For one-off imports and data generation: no fsyncs and a large cache.
+    # A crash during the load can corrupt the file, so only use it on data
+    # that can be loaded again.
+    'bulk-load': {
+        'page_size': None,
+        'journal_mode': None,
+        'synchronous': 'OFF',
+        'cache_size': -262144,
+        'mmap_size': 268435456,
+        'temp_store': 'MEMORY',
+        'busy_timeout': 5000,
+    },
+}
+
+DEFAULT_PROFILE = 'durable'
+
+# Environment variables and config file used to pick the profile.
+PROFILE_ENV = "BUSINESS_DB_PROFILE"
+CONFIG_ENV = "BUSINESS_DB_CONFIG"
+CONFIG_FILE = "business_db.ini"
+
+# Settings applied on every connection, in this order.
+CONNECTION_PRAGMAS = ('synchronous', 'cache_size', 'mmap_size', 'temp_store', 'busy_timeout')
+
+def load_config(path=None):
+    """
+    Reads the config file, if there is one.
+
+    [database]
+    profile = throughput
+
+    [profile:throughput]
+    cache_size = -131072
+
+    A [profile:NAME] section overrides settings of a built-in profile or
+    defines a new one based on the default profile.
+    """
+    path = path or os.environ.get(CONFIG_ENV, CONFIG_FILE)
+    config = configparser.ConfigParser()
+    if os.path.exists(path):
+        config.read(path)
+    return config
+
+def get_profiles(config=None):
+    """
+    Returns the built-in profiles merged with any defined in the config file.
+    """
+    config = config if config is not None else load_config()
+    profiles = {name: dict(settings) for name, settings in PROFILES.items()}
+    for section in config.sections():
+        if not section.startswith('profile:'):
+            continue
+        name = section[len('profile:'):].strip()
+        settings = profiles.setdefault(name, dict(PROFILES[DEFAULT_PROFILE]))
+        for key, value in config[section].items():
+            if key not in settings:
+                raise ValueError(f"Unknown setting '{key}' in [{section}] of the config file")
+            settings[key] = None if value.lower() == 'none' else value
+    return profiles
+
+def select_profile(name=None, config=None):
+    """
+    Picks the profile to use: the given name, then the BUSINESS_DB_PROFILE
+    environment variable, then the config file, then the default.
+    Returns (name, settings).
+    """
+    config = config if config is not None else load_config()
+    profiles = get_profiles(config)
+    name = (name or os.environ.get(PROFILE_ENV)
+            or config.get('database', 'profile', fallback=None) or DEFAULT_PROFILE)
+    if name not in profiles:
+        raise ValueError(f"Unknown connection profile '{name}'. Choose from: {', '.join(profiles)}")
+    return name, profiles[name]
+
+def apply_profile(conn, settings, allow_vacuum=False):
+    """
+    Applies a profile's settings to a connection.
+
+    page_size can only change on an empty database or by rebuilding the file
+    with VACUUM, which is only done when allow_vacuum is True. Returns a list
+    of notes about settings that could not be applied.
+    """
+    notes = []
+    if conn.in_transaction:
+        conn.commit()
+
+    page_size = settings.get('page_size')
+    if page_size is not None and conn.execute("PRAGMA page_size").fetchone()[0] != int(page_size):
+        is_empty = conn.execute("PRAGMA page_count").fetchone()[0] == 0
+        if is_empty:
+            conn.execute(f"PRAGMA page_size = {int(page_size)}")
+        elif allow_vacuum:
+            # The page size of a WAL database cannot change, so leave WAL
+            # for the rebuild; journal_mode is set again below.
+            if conn.execute("PRAGMA journal_mode").fetchone()[0] == 'wal':
+                conn.execute("PRAGMA journal_mode = DELETE")
+            conn.execute(f"PRAGMA page_size = {int(page_size)}")
+            conn.execute("VACUUM")
+        else:
+            notes.append(f"page_size {page_size} needs a VACUUM; run 'python3 db_profiles.py apply' to change it")
+
+    journal_mode = settings.get('journal_mode')
+    if journal_mode is not None:
+        current = conn.execute("PRAGMA journal_mode").fetchone()[0]
+        if current.lower() != str(journal_mode).lower():
+            try:
+                result = conn.execute(f"PRAGMA journal_mode = {journal_mode}").fetchone()[0]
+                if result.lower() != str(journal_mode).lower():
+                    notes.append(f"journal_mode stayed {result}")
+            except sqlite3.OperationalError as e:
+                # Leaving WAL needs exclusive access to the file.
+                notes.append(f"journal_mode not changed: {e}")
+
+    for pragma in CONNECTION_PRAGMAS:
+        value = settings.get(pragma)
+        if value is not None:
+            conn.execute(f"PRAGMA {pragma} = {value}")
+    return notes
+
+def connect(db_file, profile=None, allow_vacuum=False, **kwargs):
+    """
+    Opens a connection with foreign keys on and the selected profile applied.
+    Returns (connection, profile name, notes).
+    """
+    name, settings = select_profile(profile)
+    kwargs.setdefault('cached_statements', queries.STATEMENT_CACHE_SIZE)
+    conn = sqlite3.connect(db_file, **kwargs)
+    conn.execute("PRAGMA foreign_keys = 1")
+    notes = apply_profile(conn, settings, allow_vacuum)
+    return conn, name, notes
+
+def show_settings(conn):
+    """
+    Prints the current value of every setting a profile controls.
+    """
+    for pragma in ('page_size', 'journal_mode') + CONNECTION_PRAGMAS:
+        print(f"    {pragma:<14} {conn.execute(f'PRAGMA {pragma}').fetchone()[0]}")
+
+def main():
+    database = "business.db"
+    usage = "Usage: python3 db_profiles.py [list | show [PROFILE] | apply [PROFILE]]"
+    command = sys.argv[1] if len(sys.argv) > 1 else "show"
+    profile = sys.argv[2] if len(sys.argv) > 2 else None
+
+    if command == "list":
+        for name, settings in get_profiles().items():
+            print(f"{name}:")
+            for key, value in settings.items():
+                print(f"    {key:<14} {value if value is not None else '(unchanged)'}")
+        return
+    if command not in ("show", "apply"):
+        print(usage)
+        return
+
+    if not os.path.exists(database):
+        print(f"Error: {database} does not exist. Run setup_database.py first.")
+        return
+
+    try:
+        if command == "apply":
+            # Also makes the one-time changes, rebuilding the file if needed.
+            conn, name, notes = connect(database, profile, allow_vacuum=True)
+        else:
+            name, _ = select_profile(profile)
+            conn, notes = sqlite3.connect(database), []
+    except (sqlite3.Error, ValueError) as e:
+        print(f"Error connecting to database: {e}")
+        return
+
+    print(f"Selected profile: {name}")
+    for note in notes:
+        print(f"Note: {note}")
+    print("Settings of this connection:" if command == "apply" else "Settings of a plain connection:")
+    show_settings(conn)
+    conn.close()
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,375 @@
+# export_data.py
+
+import argparse
+import csv
+import gzip
+import json
+import os
+import sqlite3
+import sys
+import time
+from datetime import datetime
+
+import bulk_import
+import db_profiles
+import queries
+
+# pyarrow is optional: without it the parquet format is simply unavailable.
+try:
+    import pyarrow
+    import pyarrow.parquet
+except ImportError:
+    pyarrow = None
+
+# Rows read from the cursor (and written) at a time.
+BATCH_SIZE = 10000
+
+# Last exported ID of each source, for --incremental exports.
+STATE_FILE = "export_state.json"
+
+FORMATS = ('csv', 'jsonl', 'parquet')
+EXTENSIONS = {'csv': '.csv', 'jsonl': '.jsonl', 'parquet': '.parquet'}
+
+def table_source(table, date_column=None):
+    """
+    Returns the SOURCES entry for exporting a whole table.
+    """
+    columns = bulk_import.TABLE_COLUMNS[table]
+    return {'sql': f"SELECT {', '.join(columns)} FROM {table}\n", 'id': columns[0], 'date': date_column}
+
+# What can be exported: every table (with the columns bulk_import.py loads,
+# so an export can be imported again) and the joined listings shown by
+# View Orders and View Products. "id" is the increasing key used for
+# incremental exports and "date" the column date ranges apply to.
+SOURCES = {
+    'Department': table_source('Department'),
+    'Employee': table_source('Employee'),
+    'Product': table_source('Product'),
+    'Inventory': table_source('Inventory'),
+    'Supplier': table_source('Supplier'),
+    'Orders': table_source('Orders', 'order_date'),
+    'Sales': table_source('Sales'),
+    'order-listing': {'sql': queries.VIEW_BASES['orders'], 'id': 'o.order_id', 'date': 'o.order_date'},
+    'product-listing': {'sql': queries.VIEW_BASES['products'], 'id': 'p.product_id', 'date': None},
+}
+
+def resolve_source(name):
+    """
+    Returns the source name as spelled in SOURCES, matching case-insensitively.
+    """
+    for source in SOURCES:
+        if source.lower() == name.lower():
+            return source
+    raise ValueError(f"Unknown source '{name}'. Choose from: {', '.join(SOURCES)}")
+
+def parse_date(value):
+    """
+    Checks a YYYY-MM-DD date given on the command line.
+    """
+    try:
+        datetime.strptime(value, "%Y-%m-%d")
+    except ValueError:
+        raise argparse.ArgumentTypeError(f"invalid date '{value}' (use YYYY-MM-DD)")
+    return value
+
+def build_query(source, since_id=None, date_from=None, date_to=None):
+    """
+    Returns (sql, parameters) for exporting a source with the given filters.
+
+    Rows come out in ID order, or in (date, ID) order when a date range is
+    given, so the query can walk an index instead of sorting the result.
+    """
+    spec = SOURCES[source]
+    if (date_from or date_to) and not spec['date']:
+        raise ValueError(f"{source} has no date column to filter on")
+
+    conditions = []
+    params = []
+    if since_id is not None:
+        conditions.append(f"{spec['id']} > ?")
+        params.append(since_id)
+    if date_from:
+        conditions.append(f"{spec['date']} >= ?")
+        params.append(date_from)
+    if date_to:
+        conditions.append(f"{spec['date']} <= ?")
+        params.append(date_to)
+
+    sql = spec['sql']
+    if conditions:
+        sql += "WHERE " + " AND ".join(conditions) + "\n"
+    order = [spec['date'], spec['id']] if (date_from or date_to) else [spec['id']]
+    sql += "ORDER BY " + ", ".join(order)
+    return sql, params
+
+def stream_rows(conn, sql, params, batch_size=BATCH_SIZE):
+    """
+    Yields the column names, then lists of at most batch_size rows. Only one
+    batch is held in memory at a time.
+    """
+    cur = conn.cursor()
+    cur.execute(sql, params)
+    yield [column[0] for column in cur.description]
+    try:
+        while True:
+            rows = cur.fetchmany(batch_size)
+            if not rows:
+                break
+            yield rows
+    finally:
+        cur.close()
+
+def open_text(path):
+    """
+    Opens a text output file, gzip-compressed if the name ends in .gz.
+    '-' is standard output.
+    """
+    if path == '-':
+        return sys.stdout
+    if path.endswith('.gz'):
+        return gzip.open(path, 'wt', newline='')
+    return open(path, 'w', newline='')
+
+class CsvWriter:
+    """
+    Writes batches of rows as CSV with a header line.
+    """
+
+    def __init__(self, path, columns):
+        self.stream = open_text(path)
+        self.writer = csv.writer(self.stream)
+        self.writer.writerow(columns)
+
+    def write_batch(self, rows):
+        self.writer.writerows(rows)
+
+    def close(self):
+        if self.stream is not sys.stdout:
+            self.stream.close()
+
+class JsonlWriter:
+    """
+    Writes batches of rows as JSON Lines, one object per row.
+    """
+
+    def __init__(self, path, columns):
+        self.stream = open_text(path)
+        self.columns = columns
+
+    def write_batch(self, rows):
+        self.stream.writelines(json.dumps(dict(zip(self.columns, row))) + "\n" for row in rows)
+
+    def close(self):
+        if self.stream is not sys.stdout:
+            self.stream.close()
+
+def declared_types(conn, source):
+    """
+    Returns the declared SQLite type of each column of a source, or '' for a
+    column computed by an expression. A temporary view over the source's
+    query reports the types of the table columns it selects.
+    """
+    conn.execute(f"CREATE TEMP VIEW export_columns AS {SOURCES[source]['sql']}")
+    try:
+        return [row[2] for row in conn.execute("PRAGMA temp.table_info(export_columns)")]
+    finally:
+        conn.execute("DROP VIEW temp.export_columns")
+
+def arrow_type(declared):
+    """
+    Returns the Parquet column type for a declared SQLite type, following
+    SQLite's type affinity rules. Columns with NUMERIC affinity or no type
+    can hold values of any kind, so they are written as text.
+    """
+    declared = declared.upper()
+    if "INT" in declared:
+        return pyarrow.int64()
+    if any(name in declared for name in ("CHAR", "CLOB", "TEXT")):
+        return pyarrow.string()
+    if "BLOB" in declared:
+        return pyarrow.binary()
+    if any(name in declared for name in ("REAL", "FLOA", "DOUB")):
+        return pyarrow.float64()
+    return pyarrow.string()
+
+def convert_value(value, arrow_type, column):
+    """
+    Converts a value SQLite stored with another type than its column's
+    declared one, where that loses nothing.
+    """
+    if value is None:
+        return None
+    if arrow_type == pyarrow.string():
+        return value.decode('utf-8', 'replace') if isinstance(value, bytes) else str(value)
+    if arrow_type == pyarrow.binary():
+        return value if isinstance(value, bytes) else str(value).encode('utf-8')
+    if arrow_type == pyarrow.int64():
+        if isinstance(value, int) or isinstance(value, float) and value.is_integer():
+            return int(value)
+    elif isinstance(value, (int, float)):
+        return float(value)
+    raise ValueError(f"column {column} holds {value!r}, which does not fit its declared type; "
+                     "export it as csv or jsonl instead")
+
+class ParquetWriter:
+    """
+    Writes each batch as one row group of a compressed Parquet file. Column
+    types come from the columns' declared SQLite types (see arrow_type), so
+    every batch has the same schema whatever values it holds.
+    """
+
+    def __init__(self, path, columns, types=None):
+        if pyarrow is None:
+            raise ValueError("the parquet format needs pyarrow (pip install pyarrow)")
+        if path == '-':
+            raise ValueError("parquet output needs a file name")
+        self.path = path
+        self.schema = pyarrow.schema([(name, arrow_type(declared))
+                                      for name, declared in zip(columns, types or [''] * len(columns))])
+        self.writer = pyarrow.parquet.ParquetWriter(path, self.schema, compression='zstd')
+
+    def write_batch(self, rows):
+        arrays = []
+        for column, field in zip(zip(*rows), self.schema):
+            try:
+                # Converting straight to an int64 array would truncate a REAL
+                # in an INTEGER column; a checked cast refuses to.
+                arrays.append(pyarrow.array(column).cast(field.type))
+            except (pyarrow.ArrowInvalid, pyarrow.ArrowTypeError):
+                # Some values are stored with another type than the column's.
+                arrays.append(pyarrow.array([convert_value(value, field.type, field.name) for value in column],
+                                            type=field.type))
+        self.writer.write_table(pyarrow.Table.from_arrays(arrays, schema=self.schema))
+
+    def close(self):
+        self.writer.close()
+
+WRITERS = {'csv': CsvWriter, 'jsonl': JsonlWriter, 'parquet': ParquetWriter}
+
+def export(conn, source, output, file_format, since_id=None, date_from=None, date_to=None,
+           batch_size=BATCH_SIZE):
+    """
+    Streams one source to a file (or '-' for standard output).
+
+    A file is written under a temporary name and renamed when complete, so a
+    failed export never leaves a partial file behind. Returns (rows written,
+    highest ID written or None).
+    """
+    sql, params = build_query(source, since_id, date_from, date_to)
+    id_column = SOURCES[source]['id'].split('.')[-1]
+    # The temporary name keeps the extension, so Orders.csv.gz is still compressed.
+    root, extension = os.path.splitext(output)
+    target = output if output == '-' else f"{root}.part{extension}"
+
+    options = {'types': declared_types(conn, source)} if file_format == 'parquet' else {}
+    batches = stream_rows(conn, sql, params, batch_size)
+    columns = next(batches)
+    id_position = columns.index(id_column)
+    try:
+        writer = WRITERS[file_format](target, columns, **options)
+    except BaseException:
+        batches.close()
+        raise
+    count = 0
+    last_id = None
+    try:
+        for rows in batches:
+            writer.write_batch(rows)
+            count += len(rows)
+            batch_max = max(row[id_position] for row in rows)
+            last_id = batch_max if last_id is None else max(last_id, batch_max)
+        writer.close()
+    except BaseException:
+        batches.close()
+        if target != output:
+            writer.close()
+            os.remove(target)
+        raise
+    if target != output:
+        os.replace(target, output)
+    return count, last_id
+
+def load_state(path=STATE_FILE):
+    """
+    Returns the last exported ID of each source from the state file.
+    """
+    if not os.path.exists(path):
+        return {}
+    with open(path) as file:
+        return json.load(file)
+
+def save_state(state, path=STATE_FILE):
+    """
+    Records the last exported ID of each source.
+    """
+    with open(path, 'w') as file:
+        json.dump(state, file, indent=2, sort_keys=True)
+
+def default_output(source, file_format):
+    """
+    Returns the file name used when no output is given.
+    """
+    return f"{source}{EXTENSIONS[file_format]}"
+
+def main():
+    parser = argparse.ArgumentParser(
+        description="Stream a table or listing of the business database to CSV, JSONL or Parquet.")
+    parser.add_argument("source", help=f"what to export: {', '.join(SOURCES)}")
+    parser.add_argument("--format", choices=FORMATS, default='csv', help="output format (default: csv)")
+    parser.add_argument("--output", help="output file, '-' for standard output, a .gz name to compress "
+                                         "CSV/JSONL (default: SOURCE.FORMAT)")
+    parser.add_argument("--from", dest="date_from", type=parse_date, help="first date to include (YYYY-MM-DD)")
+    parser.add_argument("--to", dest="date_to", type=parse_date, help="last date to include (YYYY-MM-DD)")
+    parser.add_argument("--since-id", type=int, help="only rows with an ID greater than this")
+    parser.add_argument("--incremental", action="store_true",
+                        help=f"only rows added since the last incremental export (tracked in {STATE_FILE})")
+    parser.add_argument("--state", default=STATE_FILE, help=f"state file for --incremental (default: {STATE_FILE})")
+    parser.add_argument("--batch-size", type=int, default=BATCH_SIZE, help="rows fetched at a time")
+    parser.add_argument("--database", default="business.db", help="database file (default: business.db)")
+    parser.add_argument("--profile", help="connection profile from db_profiles.py")
+    args = parser.parse_args()
+
+    try:
+        source = resolve_source(args.source)
+    except ValueError as e:
+        print(f"Error: {e}", file=sys.stderr)
+        return
+    output = args.output or default_output(source, args.format)
+
+    since_id = args.since_id
+    state = {}
+    if args.incremental:
+        try:
+            state = load_state(args.state)
+        except (OSError, ValueError) as e:
+            print(f"Error reading {args.state}: {e}", file=sys.stderr)
+            return
+        if since_id is None:
+            since_id = state.get(source)
+
+    try:
+        conn, _, _ = db_profiles.connect(args.database, args.profile)
+    except (sqlite3.Error, ValueError) as e:
+        print(f"Error connecting to database: {e}", file=sys.stderr)
+        return
+
+    start = time.perf_counter()
+    try:
+        count, last_id = export(conn, source, output, args.format, since_id,
+                                args.date_from, args.date_to, args.batch_size)
+    except (sqlite3.Error, ValueError, OSError) as e:
+        print(f"An error occurred while exporting {source}: {e}", file=sys.stderr)
+        conn.close()
+        return
+    conn.close()
+
+    elapsed = time.perf_counter() - start
+    rate = count / elapsed if elapsed > 0 else 0
+    print(f"Exported {count} {source} rows to {output} in {elapsed:.2f}s ({rate:,.0f} rows/sec)"
+          + (f", last ID {last_id}." if last_id is not None else "."), file=sys.stderr)
+    if args.incremental and last_id is not None:
+        state[source] = last_id
+        save_state(state, args.state)
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,224 @@
+# generate_data.py
+
+import argparse
+import bisect
+import itertools
+import os
+import random
+import sqlite3
+import time
+from datetime import date, timedelta
+
+import bulk_import
+import db_profiles
+import migrations
+from setup_database import execute_script
+
+# Named scales: number of Orders rows and Sales rows to generate.
+SCALES = {
+    '10k': 10_000,
+    '1m': 1_000_000,
+    '10m': 10_000_000,
+}
+
+DEFAULT_SEED = 42
+
+# Exponent of the Zipf-like distribution used to pick suppliers and products.
+# Around 1 gives the usual "a few best sellers, a long tail" shape.
+SKEW = 1.1
+
+DEPARTMENTS = ('Sales', 'Engineering', 'HR', 'Marketing', 'Finance',
+               'Operations', 'Support', 'Logistics', 'Legal', 'Research')
+FIRST_NAMES = ('Alice', 'Bob', 'Carol', 'David', 'Erin', 'Frank', 'Grace', 'Henry',
+               'Irene', 'Jack', 'Karen', 'Leo', 'Maria', 'Nathan', 'Olivia', 'Paul')
+LAST_NAMES = ('Johnson', 'Smith', 'Williams', 'Brown', 'Jones', 'Garcia', 'Miller',
+              'Davis', 'Wilson', 'Moore', 'Taylor', 'Anderson', 'Thomas', 'Walls')
+POSITIONS = ('Manager', 'Engineer', 'Specialist', 'Analyst', 'Clerk', 'Coordinator', 'Director')
+PRODUCT_WORDS = ('Laptop', 'Smartphone', 'Office Chair', 'Monitor', 'Keyboard', 'Desk',
+                 'Printer', 'Headset', 'Tablet', 'Router', 'Webcam', 'Lamp')
+PRODUCT_ADJECTIVES = ('Pro', 'Basic', 'Deluxe', 'Compact', 'Ergonomic', 'Wireless', 'Ultra')
+SUPPLIER_WORDS = ('Tech Supplies', 'Office Essentials', 'Global Parts', 'Prime Goods',
+                  'Metro Wholesale', 'Summit Trading', 'Harbor Distribution')
+STREETS = ('Tech Lane', 'Office Blvd', 'Main St', 'Market Ave', 'Industrial Way', 'Harbor Rd')
+
+# Orders are spread over this many days ending on END_DATE.
+END_DATE = date(2024, 12, 31)
+DAYS_OF_HISTORY = 3 * 365
+
+def parse_scale(value):
+    """
+    Returns the row count for a scale name (10k, 1M, 10M) or a plain number.
+    """
+    key = value.lower()
+    if key in SCALES:
+        return SCALES[key]
+    try:
+        count = int(value)
+    except ValueError:
+        raise argparse.ArgumentTypeError(
+            f"invalid scale '{value}' (use {', '.join(SCALES)} or a number)")
+    if count <= 0:
+        raise argparse.ArgumentTypeError("scale must be a positive number")
+    return count
+
+def reference_sizes(rows):
+    """
+    Returns how many products, suppliers and employees go with a given number
+    of orders/sales rows, so the reference tables grow with the scale.
+    """
+    return {
+        'products': min(50_000, max(100, rows // 100)),
+        'suppliers': min(5_000, max(10, rows // 1_000)),
+        'employees': min(20_000, max(20, rows // 500)),
+    }
+
+def zipf_cum_weights(count, skew=SKEW):
+    """
+    Returns cumulative weights for picking item ranks 1..count with Zipf skew.
+    """
+    return list(itertools.accumulate(1.0 / (rank ** skew) for rank in range(1, count + 1)))
+
+def skewed_picker(rng, ids, skew=SKEW):
+    """
+    Returns a function that picks from ids with Zipf skew. The ids are
+    shuffled first so the popular ones are not simply the lowest IDs.
+    """
+    ids = list(ids)
+    rng.shuffle(ids)
+    cum_weights = zipf_cum_weights(len(ids), skew)
+    total = cum_weights[-1]
+
+    def pick():
+        return ids[bisect.bisect_left(cum_weights, rng.random() * total)]
+
+    return pick
+
+def generate(conn, rows, seed=DEFAULT_SEED, batch_size=bulk_import.BATCH_SIZE):
+    """
+    Fills an empty database with deterministic synthetic data.
+
+    The same rows and seed always produce the same database contents.
+    Returns a dict with the number of rows generated per table.
+    """
+    rng = random.Random(seed)
+    sizes = reference_sizes(rows)
+    counts = {}
+
+    def load(table, columns, table_rows):
+        deferred = bulk_import.drop_indexes(conn, table)
+        counts[table] = bulk_import.load_rows(conn, table, columns, table_rows, batch_size, verbose=False)
+        bulk_import.create_indexes(conn, deferred)
+        print(f"  {table}: {counts[table]} rows")
+
+    dept_ids = range(1, len(DEPARTMENTS) + 1)
+    load('Department', ('dept_id', 'dept_name'),
+         ((dept_id, name) for dept_id, name in zip(dept_ids, DEPARTMENTS)))
+
+    pick_dept = skewed_picker(rng, dept_ids, skew=0.8)
+    load('Employee', ('employee_id', 'employee_name', 'employee_position', 'employee_salary', 'employee_dept'),
+         ((employee_id,
+           f"{rng.choice(FIRST_NAMES)} {rng.choice(LAST_NAMES)}",
+           f"{rng.choice(DEPARTMENTS)} {rng.choice(POSITIONS)}",
+           float(rng.randrange(40_000, 150_000, 500)),
+           pick_dept())
+          for employee_id in range(1, sizes['employees'] + 1)))
+
+    product_names = [f"{rng.choice(PRODUCT_ADJECTIVES)} {rng.choice(PRODUCT_WORDS)} {product_id}"
+                     for product_id in range(1, sizes['products'] + 1)]
+    load('Product', ('product_id', 'product_name', 'product_price', 'product_quantity', 'product_dept'),
+         ((product_id,
+           product_names[product_id - 1],
+           round(rng.uniform(5, 2500), 2),
+           rng.randint(0, 500),
+           pick_dept())
+          for product_id in range(1, sizes['products'] + 1)))
+
+    load('Inventory', ('inventory_id', 'product_id', 'quantity_in_stock'),
+         ((product_id, product_id, rng.randint(0, 400)) for product_id in range(1, sizes['products'] + 1)))
+
+    load('Supplier', ('supplier_id', 'supplier_name', 'contact_number', 'supplier_address'),
+         ((supplier_id,
+           f"{rng.choice(SUPPLIER_WORDS)} {supplier_id}",
+           f"555-{rng.randint(0, 9999):04d}",
+           f"{rng.randint(1, 9999)} {rng.choice(STREETS)}")
+          for supplier_id in range(1, sizes['suppliers'] + 1)))
+
+    pick_supplier = skewed_picker(rng, range(1, sizes['suppliers'] + 1))
+    pick_product = skewed_picker(rng, range(1, sizes['products'] + 1))
+    first_day = END_DATE - timedelta(days=DAYS_OF_HISTORY - 1)
+    day_strings = [(first_day + timedelta(days=offset)).isoformat() for offset in range(DAYS_OF_HISTORY)]
+
+    def order_rows():
+        for order_id in range(1, rows + 1):
+            product_id = pick_product()
+            yield (order_id,
+                   day_strings[rng.randrange(DAYS_OF_HISTORY)],
+                   pick_supplier(),
+                   product_id,
+                   rng.randint(1, 100),
+                   product_names[product_id - 1],
+                   rng.randint(1, sizes['employees']))
+
+    load('Orders', ('order_id', 'order_date', 'supplier_id', 'product_id', 'order_quantity',
+                    'product_ordered', 'supplied_by'), order_rows())
+
+    def sale_rows():
+        for sale_id in range(1, rows + 1):
+            product_id = pick_product()
+            yield (sale_id, product_id, rng.randint(1, 20), product_names[product_id - 1])
+
+    load('Sales', ('sale_id', 'product_id', 'quantity_sold', 'products_sold'), sale_rows())
+
+    conn.execute("ANALYZE")
+    conn.commit()
+    return counts
+
+def build_database(path, rows, seed=DEFAULT_SEED, force=False, profile='bulk-load'):
+    """
+    Creates a new database at path with the full schema and generated data.
+    Returns the per-table row counts, or None if the database was not built.
+    """
+    if os.path.exists(path):
+        if not force:
+            print(f"Error: {path} already exists. Use --force to replace it.")
+            return None
+        os.remove(path)
+        print(f"Existing database '{path}' removed.")
+
+    script_dir = os.path.dirname(os.path.abspath(__file__))
+    try:
+        conn, _, _ = db_profiles.connect(path, profile, allow_vacuum=True)
+    except (sqlite3.Error, ValueError) as e:
+        print(f"Error connecting to database: {e}")
+        return None
+
+    execute_script(conn, os.path.join(script_dir, "create_tables.sql"))
+    if not migrations.migrate(conn, verbose=False):
+        conn.close()
+        return None
+
+    print(f"Generating {rows} orders and sales (seed {seed}) into {path}...")
+    start = time.perf_counter()
+    try:
+        counts = generate(conn, rows, seed)
+    except sqlite3.Error as e:
+        print(f"An error occurred while generating data: {e}")
+        counts = None
+    conn.close()
+    if counts is not None:
+        print(f"Generated {sum(counts.values())} rows in {time.perf_counter() - start:.1f}s.")
+    return counts
+
+def main():
+    parser = argparse.ArgumentParser(description="Generate a synthetic business database.")
+    parser.add_argument("--scale", type=parse_scale, default=SCALES['10k'],
+                        help=f"orders/sales rows: {', '.join(SCALES)} or a number (default: 10k)")
+    parser.add_argument("--seed", type=int, default=DEFAULT_SEED, help="random seed (default: 42)")
+    parser.add_argument("--output", default="business.db", help="database file (default: business.db)")
+    parser.add_argument("--force", action="store_true", help="replace the output file if it exists")
+    args = parser.parse_args()
+
+    build_database(args.output, args.scale, args.seed, args.force)
+
+if __name__ == "__main__":
+    main()
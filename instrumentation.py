@@ -0,0 +1,292 @@
+# instrumentation.py
+
+import os
+import re
+import sqlite3
+import sys
+import threading
+import time
+from datetime import datetime
+
+from latency_stats import LatencyRecorder
+
+# Statements that take at least this many milliseconds go to the slow-query
+# log together with their query plan. BUSINESS_DB_SLOW_MS overrides it.
+SLOW_QUERY_MS = 100
+SLOW_QUERY_LOG = "slow_queries.log"
+
+# Statement text shown in the statistics table is cut to this many characters.
+SQL_DISPLAY_WIDTH = 60
+
+def normalize_sql(sql):
+    """
+    Collapses whitespace so the same statement is always counted under one key.
+    """
+    return re.sub(r"\s+", " ", sql).strip()
+
+def is_full_scan(detail):
+    """
+    True for a query plan step that reads a whole table rather than an index.
+    """
+    return detail.startswith("SCAN ") and " USING " not in detail and detail != "SCAN CONSTANT ROW"
+
+class QueryStats:
+    """
+    Per-statement timings collected by instrumented connections: latency
+    percentiles, rows returned (or changed, for statements without a result),
+    commits, and a log of slow statements with their EXPLAIN QUERY PLAN.
+    """
+
+    def __init__(self, slow_ms=SLOW_QUERY_MS, log_path=SLOW_QUERY_LOG):
+        self.slow_ms = slow_ms
+        self.log_path = log_path
+        self.latency = LatencyRecorder()
+        self.lock = threading.Lock()
+        self.rows = {}
+        self.total_seconds = {}
+        self.full_scans = set()
+        self.slow_count = 0
+        self.commits = 0
+        self.commit_seconds = 0.0
+
+    def record(self, conn, sql, parameters, seconds, rows, error=False):
+        """
+        Adds one statement execution and logs it if it was slow.
+        """
+        key = normalize_sql(sql)
+        self.latency.record(key, seconds, error)
+        with self.lock:
+            self.rows[key] = self.rows.get(key, 0) + max(rows, 0)
+            self.total_seconds[key] = self.total_seconds.get(key, 0.0) + seconds
+        if not error and self.slow_ms is not None and seconds * 1000 >= self.slow_ms:
+            self.log_slow(conn, key, parameters, seconds, rows)
+
+    def record_commit(self, seconds):
+        """
+        Adds one COMMIT that ended a write transaction (and so synced to disk).
+        """
+        with self.lock:
+            self.commits += 1
+            self.commit_seconds += seconds
+
+    def query_plan(self, conn, sql, parameters):
+        """
+        Returns the EXPLAIN QUERY PLAN steps of a statement, or [] if it has none.
+        """
+        try:
+            # The plain sqlite3 method, so the EXPLAIN itself is not recorded.
+            cur = sqlite3.Connection.execute(conn, "EXPLAIN QUERY PLAN " + sql, parameters)
+            return [row[3] for row in sqlite3.Cursor.fetchall(cur)]
+        except (sqlite3.Error, sqlite3.Warning):
+            return []
+
+    def log_slow(self, conn, sql, parameters, seconds, rows):
+        """
+        Appends a slow statement and its query plan to the slow-query log.
+        """
+        plan = self.query_plan(conn, sql, parameters)
+        with self.lock:
+            self.slow_count += 1
+            if any(is_full_scan(step) for step in plan):
+                self.full_scans.add(sql)
+            if not self.log_path:
+                return
+            try:
+                with open(self.log_path, "a") as log:
+                    log.write(f"{datetime.now().isoformat(timespec='seconds')} "
+                              f"{seconds * 1000:.1f} ms, {rows} rows\n")
+                    log.write(f"    {sql}\n")
+                    if parameters:
+                        log.write(f"    parameters: {parameters!r}\n")
+                    for step in plan:
+                        marker = "  <-- full scan" if is_full_scan(step) else ""
+                        log.write(f"    plan: {step}{marker}\n")
+                    log.write("\n")
+            except OSError as e:
+                print(f"An error occurred while writing the slow-query log: {e}", file=sys.stderr)
+
+    def summary(self):
+        """
+        Returns the statistics as a dict: one entry per statement, slowest
+        total time first, plus commit and slow-query totals.
+        """
+        latency = self.latency.summary()
+        with self.lock:
+            statements = []
+            for sql, values in latency.items():
+                statements.append(dict(values,
+                                       sql=sql,
+                                       rows=self.rows.get(sql, 0),
+                                       total_ms=round(self.total_seconds.get(sql, 0.0) * 1000, 3),
+                                       full_scan=sql in self.full_scans))
+            statements.sort(key=lambda entry: entry['total_ms'], reverse=True)
+            return {
+                'statements': statements,
+                'commits': self.commits,
+                'avg_commit_ms': round(self.commit_seconds / self.commits * 1000, 3) if self.commits else 0,
+                'slow_queries': self.slow_count,
+                'slow_query_ms': self.slow_ms,
+                'slow_query_log': self.log_path,
+            }
+
+    def reset(self):
+        """
+        Forgets everything recorded so far (the log file is kept).
+        """
+        self.latency.reset()
+        with self.lock:
+            self.rows.clear()
+            self.total_seconds.clear()
+            self.full_scans.clear()
+            self.slow_count = 0
+            self.commits = 0
+            self.commit_seconds = 0.0
+
+def slow_ms_from_environment():
+    """
+    Returns the slow-query threshold from BUSINESS_DB_SLOW_MS, or the default.
+    """
+    value = os.environ.get("BUSINESS_DB_SLOW_MS")
+    try:
+        return float(value) if value else SLOW_QUERY_MS
+    except ValueError:
+        print(f"Warning: ignoring BUSINESS_DB_SLOW_MS={value!r}; using {SLOW_QUERY_MS} ms.")
+        return SLOW_QUERY_MS
+
+# Statistics of every instrumented connection in this process.
+stats = QueryStats(slow_ms_from_environment())
+
+class InstrumentedCursor(sqlite3.Cursor):
+    """
+    Cursor that times each statement, including the time spent fetching its
+    rows, and reports it to the module's QueryStats once the rows are read.
+    """
+
+    def __init__(self, connection):
+        super().__init__(connection)
+        self._pending = None
+
+    def _finish(self):
+        pending, self._pending = self._pending, None
+        if pending:
+            sql, parameters, seconds, rows = pending
+            stats.record(self.connection, sql, parameters, seconds, rows)
+
+    def _timed(self, method, sql, parameters, plan_parameters):
+        self._finish()
+        start = time.perf_counter()
+        try:
+            method(self, sql, parameters)
+        except sqlite3.Error:
+            stats.record(self.connection, sql, (), time.perf_counter() - start, 0, error=True)
+            raise
+        seconds = time.perf_counter() - start
+        if self.description is None:
+            stats.record(self.connection, sql, plan_parameters, seconds, self.rowcount)
+        else:
+            self._pending = [sql, plan_parameters, seconds, 0]
+        return self
+
+    def execute(self, sql, parameters=()):
+        return self._timed(sqlite3.Cursor.execute, sql, parameters, parameters)
+
+    def executemany(self, sql, seq_of_parameters):
+        # The parameters may be a one-shot iterable, so they are not kept for the plan.
+        return self._timed(sqlite3.Cursor.executemany, sql, seq_of_parameters, ())
+
+    def _fetched(self, start, count, done):
+        if self._pending:
+            self._pending[2] += time.perf_counter() - start
+            self._pending[3] += count
+            if done:
+                self._finish()
+
+    def fetchone(self):
+        start = time.perf_counter()
+        row = super().fetchone()
+        self._fetched(start, 0 if row is None else 1, row is None)
+        return row
+
+    def fetchmany(self, size=None):
+        size = self.arraysize if size is None else size
+        start = time.perf_counter()
+        rows = super().fetchmany(size)
+        self._fetched(start, len(rows), len(rows) < size)
+        return rows
+
+    def fetchall(self):
+        start = time.perf_counter()
+        rows = super().fetchall()
+        self._fetched(start, len(rows), True)
+        return rows
+
+    def __next__(self):
+        row = self.fetchone()
+        if row is None:
+            raise StopIteration
+        return row
+
+    def close(self):
+        self._finish()
+        super().close()
+
+    def __del__(self):
+        # Statements whose rows were not all read are reported when the cursor goes away.
+        try:
+            self._finish()
+        except Exception:
+            pass
+
+class InstrumentedConnection(sqlite3.Connection):
+    """
+    Connection whose statements and commits are recorded in the module's
+    QueryStats. Pass it as the factory argument of sqlite3.connect (or of
+    db_profiles.connect).
+    """
+
+    def cursor(self, factory=None):
+        return super().cursor(factory or InstrumentedCursor)
+
+    def execute(self, sql, parameters=()):
+        return self.cursor().execute(sql, parameters)
+
+    def executemany(self, sql, seq_of_parameters):
+        return self.cursor().executemany(sql, seq_of_parameters)
+
+    def commit(self):
+        if not self.in_transaction:
+            return super().commit()
+        start = time.perf_counter()
+        super().commit()
+        stats.record_commit(time.perf_counter() - start)
+
+def print_stats(summary=None, limit=20, stream=None):
+    """
+    Prints the statement statistics, slowest total time first.
+    """
+    summary = summary or stats.summary()
+    stream = stream or sys.stdout
+    statements = summary['statements']
+    print(f"\n=== Query Statistics ({len(statements)} statements) ===", file=stream)
+    if statements:
+        print("{:<60} {:>7} {:>9} {:>9} {:>9} {:>9} {:>10}".format(
+            "Statement", "Count", "Rows", "p50 ms", "p95 ms", "p99 ms", "Total ms"), file=stream)
+        print("-" * 119, file=stream)
+        for entry in statements[:limit]:
+            sql = entry['sql']
+            if len(sql) > SQL_DISPLAY_WIDTH:
+                sql = sql[:SQL_DISPLAY_WIDTH - 3] + "..."
+            print("{:<60} {:>7} {:>9} {:>9} {:>9} {:>9} {:>10}".format(
+                sql, entry['count'], entry['rows'], entry['p50_ms'], entry['p95_ms'],
+                entry['p99_ms'], entry['total_ms']), file=stream)
+        if len(statements) > limit:
+            print(f"... and {len(statements) - limit} more", file=stream)
+    print(f"\nCommits: {summary['commits']} (avg {summary['avg_commit_ms']} ms)", file=stream)
+    print(f"Slow queries (>= {summary['slow_query_ms']} ms): {summary['slow_queries']}"
+          f", logged to {summary['slow_query_log']}", file=stream)
+    full_scans = [entry['sql'] for entry in statements if entry['full_scan']]
+    if full_scans:
+        print("Slow statements with a full table scan:", file=stream)
+        for sql in full_scans:
+            print(f"    {sql}", file=stream)
+    print(file=stream)
@@ -0,0 +1,72 @@
+# latency_stats.py
+
+import threading
+from collections import deque
+
+def percentile(sorted_values, pct):
+    """
+    Returns the pct-th percentile of an already sorted list, interpolating
+    linearly between the closest ranks.
+    """
+    if not sorted_values:
+        return None
+    position = (len(sorted_values) - 1) * pct / 100
+    lower = int(position)
+    upper = min(lower + 1, len(sorted_values) - 1)
+    return sorted_values[lower] + (sorted_values[upper] - sorted_values[lower]) * (position - lower)
+
+class LatencyRecorder:
+    """
+    Thread-safe latency samples grouped by name. Counts cover every call;
+    percentiles are computed over the most recent `window` samples of each name.
+    """
+
+    def __init__(self, window=10000):
+        self.window = window
+        self.lock = threading.Lock()
+        self.samples = {}
+        self.counts = {}
+        self.errors = {}
+
+    def record(self, name, seconds, error=False):
+        """
+        Adds one timing, in seconds.
+        """
+        with self.lock:
+            if name not in self.samples:
+                self.samples[name] = deque(maxlen=self.window)
+                self.counts[name] = 0
+                self.errors[name] = 0
+            self.samples[name].append(seconds)
+            self.counts[name] += 1
+            if error:
+                self.errors[name] += 1
+
+    def summary(self):
+        """
+        Returns {name: {count, errors, p50_ms, p95_ms, p99_ms, max_ms}}.
+        """
+        with self.lock:
+            snapshot = {name: (sorted(samples), self.counts[name], self.errors[name])
+                        for name, samples in self.samples.items()}
+        result = {}
+        for name, (values, count, errors) in snapshot.items():
+            values = [value * 1000 for value in values]
+            result[name] = {
+                'count': count,
+                'errors': errors,
+                'p50_ms': round(percentile(values, 50), 3),
+                'p95_ms': round(percentile(values, 95), 3),
+                'p99_ms': round(percentile(values, 99), 3),
+                'max_ms': round(values[-1], 3),
+            }
+        return result
+
+    def reset(self):
+        """
+        Forgets every sample.
+        """
+        with self.lock:
+            self.samples.clear()
+            self.counts.clear()
+            self.errors.clear()
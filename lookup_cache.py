@@ -0,0 +1,96 @@
+# lookup_cache.py
+
+import queries
+
+# Reference data the interactive prompts list and validate IDs against,
+# as names of registered queries. Each query returns the ID first so rows
+# can be indexed by it. Suppliers, products and employees are picked by
+# name search instead (see pick_record in cli_application.py).
+LOOKUP_QUERIES = {
+    'departments': 'departments',
+}
+
+def data_version(conn):
+    """
+    Returns PRAGMA data_version, which changes whenever another connection
+    commits to the database file.
+    """
+    return conn.execute("PRAGMA data_version").fetchone()[0]
+
+class LookupCache:
+    """
+    Caches the reference tables of one connection, with a dict index per
+    table so ID validation is a constant-time lookup.
+
+    Entries are dropped when a local write calls invalidate(), and all of
+    them are dropped when PRAGMA data_version shows another connection wrote
+    to the file.
+    """
+
+    def __init__(self, conn):
+        self.conn = conn
+        self.entries = {}
+        self.version = data_version(conn)
+
+    def _load(self, name):
+        current = data_version(self.conn)
+        if current != self.version:
+            self.entries.clear()
+            self.version = current
+        if name not in self.entries:
+            rows = queries.execute(self.conn, LOOKUP_QUERIES[name]).fetchall()
+            self.entries[name] = (rows, {row[0]: row for row in rows})
+        return self.entries[name]
+
+    def rows(self, name):
+        """
+        Returns all rows of a lookup, in ID order.
+        """
+        return self._load(name)[0]
+
+    def get(self, name, key):
+        """
+        Returns the row with the given ID, or None if there is no such row.
+        """
+        return self._load(name)[1].get(key)
+
+    def contains(self, name, key):
+        """
+        Returns True if the lookup has a row with the given ID.
+        """
+        return key in self._load(name)[1]
+
+    def invalidate(self, *names):
+        """
+        Drops the given lookups (or all of them) so the next use reloads them.
+        """
+        if not names:
+            self.entries.clear()
+        for name in names:
+            self.entries.pop(name, None)
+
+# One cache per open connection.
+_caches = {}
+
+def get_lookup_cache(conn):
+    """
+    Returns the lookup cache for a connection, creating it on first use.
+    """
+    cache = _caches.get(conn)
+    if cache is None:
+        cache = _caches[conn] = LookupCache(conn)
+    return cache
+
+def invalidate(conn, *names):
+    """
+    Drops cached lookups after this connection changed the underlying tables.
+    """
+    cache = _caches.get(conn)
+    if cache is not None:
+        cache.invalidate(*names)
+
+def discard(conn):
+    """
+    Forgets the cache of a connection that is being closed.
+    """
+    _caches.pop(conn, None)
@@ -0,0 +1,302 @@
+# migrations.py
+
+import sqlite3
+import os
+import sys
+
+def search_index_statements(index, table, key, columns):
+    """
+    Returns the statements that create an FTS5 index over some text columns
+    of a table, fill it, and keep it in sync through triggers.
+
+    The index is external-content: it stores only the search terms and reads
+    the text itself from the table, by rowid (the table's INTEGER PRIMARY KEY).
+    """
+    names = ', '.join(columns)
+    new_values = ', '.join(f"NEW.{column}" for column in columns)
+    old_values = ', '.join(f"OLD.{column}" for column in columns)
+    insert = f"INSERT INTO {index}(rowid, {names}) VALUES (NEW.{key}, {new_values});"
+    delete = f"INSERT INTO {index}({index}, rowid, {names}) VALUES ('delete', OLD.{key}, {old_values});"
+    return [
+        # prefix='2 3' adds index entries for two- and three-letter prefixes,
+        # so type-ahead searches such as "lap*" are single lookups.
+        f'''CREATE VIRTUAL TABLE IF NOT EXISTS {index} USING fts5(
+               {names}, content='{table}', content_rowid='{key}',
+               tokenize='unicode61 remove_diacritics 2', prefix='2 3')''',
+        f"CREATE TRIGGER IF NOT EXISTS trg_{index}_insert AFTER INSERT ON {table} BEGIN {insert} END",
+        f"CREATE TRIGGER IF NOT EXISTS trg_{index}_delete AFTER DELETE ON {table} BEGIN {delete} END",
+        f"CREATE TRIGGER IF NOT EXISTS trg_{index}_update AFTER UPDATE OF {key}, {names} ON {table} "
+        f"BEGIN {delete} {insert} END",
+        f"INSERT INTO {index}({index}) VALUES ('rebuild')",
+    ]
+
+# The periods and dimensions OrderRollup adds orders up by, as expressions
+# over an Orders row. Weeks start on Monday. 0 stands for a missing supplier
+# or department, since NULLs would not match in the ON CONFLICT key.
+ROLLUP_PERIODS = {
+    'day': "{row}.order_date",
+    'week': "COALESCE(date({row}.order_date, '-6 days', 'weekday 1'), {row}.order_date)",
+    'month': "COALESCE(date({row}.order_date, 'start of month'), {row}.order_date)",
+}
+ROLLUP_DIMENSIONS = {
+    'supplier': "COALESCE({row}.supplier_id, 0)",
+    'department': "COALESCE((SELECT product_dept FROM Product WHERE product_id = {row}.product_id), 0)",
+}
+
+def rollup_upserts(row, sign):
+    """
+    Returns the trigger statements that add (sign 1) or take away (sign -1)
+    one Orders row, NEW or OLD, in every OrderRollup bucket it belongs to.
+    """
+    statements = []
+    for grain, period in ROLLUP_PERIODS.items():
+        for dimension, key in ROLLUP_DIMENSIONS.items():
+            statements.append(
+                f"INSERT INTO OrderRollup (grain, dimension, period_start, key, order_count, total_quantity) "
+                f"VALUES ('{grain}', '{dimension}', {period.format(row=row)}, {key.format(row=row)}, "
+                f"{sign}, {sign} * {row}.order_quantity) "
+                f"ON CONFLICT (grain, dimension, period_start, key) DO UPDATE SET "
+                f"order_count = order_count + excluded.order_count, "
+                f"total_quantity = total_quantity + excluded.total_quantity;")
+    return " ".join(statements)
+
+def rollup_queries(source="Orders", condition=None):
+    """
+    Returns the SELECTs that compute the OrderRollup rows of each grain and
+    dimension from scratch out of Orders (or another source with the same
+    columns, such as the order_history view), aliased o and limited to
+    condition if given.
+    """
+    where = f" WHERE {condition}" if condition else ""
+    return [
+        f"SELECT '{grain}', '{dimension}', {period.format(row='o')}, {key.format(row='o')}, "
+        f"COUNT(*), SUM(o.order_quantity) FROM {source} o{where} GROUP BY 3, 4"
+        for grain, period in ROLLUP_PERIODS.items()
+        for dimension, key in ROLLUP_DIMENSIONS.items()
+    ]
+
+def rollup_fill_statements(source="Orders"):
+    """
+    Returns the statements that fill an empty OrderRollup out of Orders.
+    """
+    return ["INSERT INTO OrderRollup (grain, dimension, period_start, key, order_count, total_quantity) " + query
+            for query in rollup_queries(source)]
+
+def rollup_add_statements(condition, source="Orders"):
+    """
+    Returns the statements that add the orders matching condition (on
+    source aliased o) to OrderRollup once more, as the insert trigger would.
+    """
+    return ["INSERT INTO OrderRollup (grain, dimension, period_start, key, order_count, total_quantity) "
+            + query + " ON CONFLICT (grain, dimension, period_start, key) DO UPDATE SET "
+            "order_count = order_count + excluded.order_count, "
+            "total_quantity = total_quantity + excluded.total_quantity"
+            for query in rollup_queries(source, condition)]
+
+# Schema migrations, applied in order on top of create_tables.sql.
+# Each entry is (version, description, statements). The database records the
+# last version applied in PRAGMA user_version, so existing business.db files
+# can be upgraded in place without being recreated.
+MIGRATIONS = [
+    (1, "Index foreign-key and sort columns", [
+        "CREATE INDEX IF NOT EXISTS idx_employee_dept ON Employee(employee_dept)",
+        "CREATE INDEX IF NOT EXISTS idx_product_dept ON Product(product_dept)",
+        "CREATE INDEX IF NOT EXISTS idx_inventory_product_id ON Inventory(product_id)",
+        "CREATE INDEX IF NOT EXISTS idx_orders_supplier_id ON Orders(supplier_id)",
+        "CREATE INDEX IF NOT EXISTS idx_orders_product_id ON Orders(product_id)",
+        "CREATE INDEX IF NOT EXISTS idx_orders_supplied_by ON Orders(supplied_by)",
+        # Includes quantity_sold so the sales report never has to visit the table.
+        "CREATE INDEX IF NOT EXISTS idx_sales_product_id ON Sales(product_id, quantity_sold)",
+        # Covering index for the order listing: sorted by (order_date, order_id)
+        # to match the keyset order and holding every column the listing reads.
+        '''CREATE INDEX IF NOT EXISTS idx_orders_listing ON Orders(
+               order_date, order_id, supplier_id, product_id, supplied_by,
+               order_quantity, product_ordered)''',
+    ]),
+    (2, "Add SalesSummary kept in sync with Sales by triggers", [
+        '''CREATE TABLE IF NOT EXISTS SalesSummary (
+               product_id INTEGER PRIMARY KEY,
+               total_quantity_sold INTEGER NOT NULL,
+               sale_count INTEGER NOT NULL
+           )''',
+        "CREATE INDEX IF NOT EXISTS idx_sales_summary_total ON SalesSummary(total_quantity_sold, product_id)",
+        '''INSERT INTO SalesSummary (product_id, total_quantity_sold, sale_count)
+           SELECT product_id, SUM(quantity_sold), COUNT(*)
+           FROM Sales
+           WHERE product_id IS NOT NULL
+           GROUP BY product_id''',
+        '''CREATE TRIGGER IF NOT EXISTS trg_sales_summary_insert AFTER INSERT ON Sales
+           WHEN NEW.product_id IS NOT NULL
+           BEGIN
+               INSERT INTO SalesSummary (product_id, total_quantity_sold, sale_count)
+               VALUES (NEW.product_id, NEW.quantity_sold, 1)
+               ON CONFLICT(product_id) DO UPDATE SET
+                   total_quantity_sold = total_quantity_sold + excluded.total_quantity_sold,
+                   sale_count = sale_count + 1;
+           END''',
+        '''CREATE TRIGGER IF NOT EXISTS trg_sales_summary_delete AFTER DELETE ON Sales
+           WHEN OLD.product_id IS NOT NULL
+           BEGIN
+               UPDATE SalesSummary
+               SET total_quantity_sold = total_quantity_sold - OLD.quantity_sold,
+                   sale_count = sale_count - 1
+               WHERE product_id = OLD.product_id;
+               DELETE FROM SalesSummary WHERE product_id = OLD.product_id AND sale_count = 0;
+           END''',
+        '''CREATE TRIGGER IF NOT EXISTS trg_sales_summary_update AFTER UPDATE OF product_id, quantity_sold ON Sales
+           BEGIN
+               UPDATE SalesSummary
+               SET total_quantity_sold = total_quantity_sold - OLD.quantity_sold,
+                   sale_count = sale_count - 1
+               WHERE product_id = OLD.product_id;
+               DELETE FROM SalesSummary WHERE product_id = OLD.product_id AND sale_count = 0;
+               INSERT INTO SalesSummary (product_id, total_quantity_sold, sale_count)
+               SELECT NEW.product_id, NEW.quantity_sold, 1
+               WHERE NEW.product_id IS NOT NULL
+               ON CONFLICT(product_id) DO UPDATE SET
+                   total_quantity_sold = total_quantity_sold + excluded.total_quantity_sold,
+                   sale_count = sale_count + 1;
+           END''',
+    ]),
+    (3, "Index Orders for searches by supplier, product and employee", [
+        # Each index serves one search filter in the listing's (order_date,
+        # order_id) order (order_id is the rowid, stored at the end of every
+        # index entry). They also cover the single-column lookups of
+        # migration 1, whose indexes they replace.
+        "CREATE INDEX IF NOT EXISTS idx_orders_supplier_date ON Orders(supplier_id, order_date)",
+        "CREATE INDEX IF NOT EXISTS idx_orders_product_date ON Orders(product_id, order_date)",
+        "CREATE INDEX IF NOT EXISTS idx_orders_supplied_by_date ON Orders(supplied_by, order_date)",
+        "DROP INDEX IF EXISTS idx_orders_supplier_id",
+        "DROP INDEX IF EXISTS idx_orders_product_id",
+        "DROP INDEX IF EXISTS idx_orders_supplied_by",
+    ]),
+    (4, "Add full-text indexes for picking products, suppliers and employees by name",
+        search_index_statements('product_fts', 'Product', 'product_id', ['product_name'])
+        + search_index_statements('supplier_fts', 'Supplier', 'supplier_id', ['supplier_name', 'supplier_address'])
+        + search_index_statements('employee_fts', 'Employee', 'employee_id', ['employee_name', 'employee_position'])),
+    (5, "Add reorder thresholds to Inventory", [
+        # reorder_level: restock when quantity_in_stock falls below it (NULL: never).
+        # reorder_quantity: how much to order (NULL: enough for twice the level).
+        # preferred_supplier_id: who to order from (NULL: the last supplier of the product).
+        # reorder_order_id: the open reorder, cleared when stock goes up again.
+        "ALTER TABLE Inventory ADD COLUMN reorder_level INTEGER",
+        "ALTER TABLE Inventory ADD COLUMN reorder_quantity INTEGER",
+        "ALTER TABLE Inventory ADD COLUMN preferred_supplier_id INTEGER",
+        "ALTER TABLE Inventory ADD COLUMN reorder_order_id INTEGER",
+        # Holds only the products that need a reorder, so finding them never
+        # reads the rest of Inventory.
+        '''CREATE INDEX IF NOT EXISTS idx_inventory_low_stock ON Inventory(product_id)
+           WHERE quantity_in_stock < reorder_level AND reorder_order_id IS NULL''',
+        '''CREATE INDEX IF NOT EXISTS idx_inventory_reorder_order ON Inventory(reorder_order_id)
+           WHERE reorder_order_id IS NOT NULL''',
+        '''CREATE TRIGGER IF NOT EXISTS trg_inventory_restocked AFTER UPDATE OF quantity_in_stock ON Inventory
+           WHEN NEW.quantity_in_stock > OLD.quantity_in_stock AND NEW.reorder_order_id IS NOT NULL
+           BEGIN
+               UPDATE Inventory SET reorder_order_id = NULL WHERE inventory_id = NEW.inventory_id;
+           END''',
+        # A deleted (or archived) reorder no longer blocks the next one.
+        '''CREATE TRIGGER IF NOT EXISTS trg_orders_reorder_deleted AFTER DELETE ON Orders
+           BEGIN
+               UPDATE Inventory SET reorder_order_id = NULL
+               WHERE reorder_order_id = OLD.order_id AND reorder_order_id IS NOT NULL;
+           END''',
+    ]),
+    (6, "Add OrderRollup kept in sync with Orders by triggers", [
+        # Orders and quantities per day, week and month, by supplier and by
+        # department, so the analytics reports read a few rows per period
+        # instead of every order. Buckets emptied by deletes keep a count of 0.
+        '''CREATE TABLE IF NOT EXISTS OrderRollup (
+               grain TEXT NOT NULL,
+               dimension TEXT NOT NULL,
+               period_start TEXT NOT NULL,
+               key INTEGER NOT NULL,
+               order_count INTEGER NOT NULL,
+               total_quantity INTEGER NOT NULL,
+               PRIMARY KEY (grain, dimension, period_start, key)
+           ) WITHOUT ROWID''',
+        *rollup_fill_statements(),
+        f"CREATE TRIGGER IF NOT EXISTS trg_order_rollup_insert AFTER INSERT ON Orders "
+        f"BEGIN {rollup_upserts('NEW', 1)} END",
+        f"CREATE TRIGGER IF NOT EXISTS trg_order_rollup_delete AFTER DELETE ON Orders "
+        f"BEGIN {rollup_upserts('OLD', -1)} END",
+        f"CREATE TRIGGER IF NOT EXISTS trg_order_rollup_update "
+        f"AFTER UPDATE OF order_date, supplier_id, product_id, order_quantity ON Orders "
+        f"BEGIN {rollup_upserts('OLD', -1)} {rollup_upserts('NEW', 1)} END",
+    ]),
+]
+
+LATEST_VERSION = MIGRATIONS[-1][0]
+
+def get_schema_version(conn):
+    """
+    Returns the schema version recorded in the database.
+    """
+    return conn.execute("PRAGMA user_version").fetchone()[0]
+
+def migrate(conn, verbose=True):
+    """
+    Applies every migration newer than the database's schema version.
+
+    Each migration runs in its own transaction together with the user_version
+    update, so a failed migration leaves the database at the previous version.
+    Returns True if the database is up to date afterwards.
+    """
+    current = get_schema_version(conn)
+    if current > LATEST_VERSION:
+        print(f"Warning: database schema version {current} is newer than this "
+              f"application (version {LATEST_VERSION}).\n")
+        return False
+
+    if conn.in_transaction:
+        conn.commit()
+
+    for version, description, statements in MIGRATIONS:
+        if version <= current:
+            continue
+        try:
+            conn.execute("BEGIN")
+            for statement in statements:
+                conn.execute(statement)
+            conn.execute(f"PRAGMA user_version = {version}")
+            conn.commit()
+            if verbose:
+                print(f"Applied migration {version}: {description}")
+        except sqlite3.Error as e:
+            conn.rollback()
+            print(f"An error occurred while applying migration {version} ({description}): {e}\n")
+            return False
+    return True
+
+def print_status(conn):
+    """
+    Prints which migrations have been applied to the database.
+    """
+    current = get_schema_version(conn)
+    print(f"Schema version: {current} (latest: {LATEST_VERSION})")
+    for version, description, _ in MIGRATIONS:
+        status = "applied" if version <= current else "pending"
+        print(f"{version:>3}. {description} [{status}]")
+
+def main():
+    database = "business.db"
+
+    if not os.path.exists(database):
+        print(f"Error: {database} does not exist. Run setup_database.py first.")
+        return
+
+    try:
+        conn = sqlite3.connect(database)
+        conn.execute("PRAGMA foreign_keys = 1")
+    except sqlite3.Error as e:
+        print(f"Error connecting to database: {e}")
+        return
+
+    if len(sys.argv) > 1 and sys.argv[1] == "status":
+        print_status(conn)
+    elif migrate(conn):
+        print(f"Database '{database}' is at schema version {get_schema_version(conn)}.")
+
+    conn.close()
+
+if __name__ == "__main__":
+    main()
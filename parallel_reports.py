@@ -0,0 +1,255 @@
+# parallel_reports.py
+
+import argparse
+import os
+import random
+import sqlite3
+import sys
+import time
+from concurrent.futures import ProcessPoolExecutor
+
+import table_renderer
+
+# Aggregates over the whole history that can be split into ranges of one
+# column, run side by side and merged. Each column is an aggregate and how
+# partial results of it combine ('sum', 'min' or 'max'); the split column
+# has an index that covers the query, so a range reads only its own part.
+REPORTS = {
+    'sales-by-product': {
+        'table': 'Sales',
+        'split': 'product_id',
+        'group': 'product_id',
+        'filter': 'product_id IS NOT NULL',
+        'columns': (('SUM(quantity_sold)', 'sum'), ('COUNT(*)', 'sum')),
+        'headers': ("Product ID", "Quantity Sold", "Sales"),
+    },
+    'orders-by-supplier': {
+        'table': 'Orders',
+        'split': 'order_date',
+        'group': 'supplier_id',
+        'filter': None,
+        'columns': (('COUNT(*)', 'sum'), ('SUM(order_quantity)', 'sum'),
+                    ('MIN(order_date)', 'min'), ('MAX(order_date)', 'max')),
+        'headers': ("Supplier ID", "Orders", "Quantity", "First Order", "Last Order"),
+    },
+    'orders-by-product': {
+        'table': 'Orders',
+        'split': 'order_date',
+        'group': 'product_id',
+        'filter': None,
+        'columns': (('COUNT(*)', 'sum'), ('SUM(order_quantity)', 'sum')),
+        'headers': ("Product ID", "Orders", "Quantity"),
+    },
+    'orders-by-month': {
+        'table': 'Orders',
+        'split': 'order_date',
+        'group': 'substr(order_date, 1, 7)',
+        'filter': None,
+        'columns': (('COUNT(*)', 'sum'), ('SUM(order_quantity)', 'sum')),
+        'headers': ("Month", "Orders", "Quantity"),
+    },
+}
+
+# Tables smaller than this (by rowid span) are aggregated with one query;
+# starting the worker processes would take longer than the query itself.
+PARALLEL_MIN_ROWS = 100_000
+
+# Rows sampled to place the range boundaries, so each range holds about
+# the same number of rows however skewed the split column is.
+BOUNDARY_SAMPLE = 2000
+
+def report_sql(report, condition=None):
+    """
+    Returns the GROUP BY query of a report, limited to condition if given.
+    """
+    spec = REPORTS[report]
+    conditions = [c for c in (spec['filter'], condition) if c]
+    where = f" WHERE {' AND '.join(conditions)}" if conditions else ""
+    columns = ", ".join(column for column, _ in spec['columns'])
+    return f"SELECT {spec['group']}, {columns} FROM {spec['table']}{where} GROUP BY 1"
+
+def split_ranges(conn, report, count, seed=0):
+    """
+    Returns (condition, params) pairs that together cover every row of the
+    report's table once: count ranges of the split column, with boundaries
+    at the quantiles of a random sample of rows, plus its NULLs.
+    """
+    spec = REPORTS[report]
+    table, column = spec['table'], spec['split']
+    low, high = conn.execute(f"SELECT MIN(rowid), MAX(rowid) FROM {table}").fetchone()
+    boundaries = []
+    if low is not None and count > 1:
+        # Rowids picked at random are found through the table's b-tree, so
+        # the sample costs the same at any table size.
+        rng = random.Random(seed)
+        rowids = [rng.randint(low, high) for _ in range(BOUNDARY_SAMPLE)]
+        placeholders = ", ".join("?" * len(rowids))
+        sample = sorted(row[0] for row in conn.execute(
+            f"SELECT {column} FROM {table} WHERE rowid IN ({placeholders}) AND {column} IS NOT NULL", rowids))
+        if sample:
+            boundaries = sorted({sample[len(sample) * i // count] for i in range(1, count)})
+
+    ranges = [(f"{column} IS NULL", [])]
+    lower = None
+    for boundary in boundaries + [None]:
+        if lower is None and boundary is None:
+            ranges.append((f"{column} IS NOT NULL", []))
+        elif lower is None:
+            ranges.append((f"{column} < ?", [boundary]))
+        elif boundary is None:
+            ranges.append((f"{column} >= ?", [lower]))
+        else:
+            ranges.append((f"{column} >= ? AND {column} < ?", [lower, boundary]))
+        lower = boundary
+    return ranges
+
+def run_range(database, sql, params):
+    """
+    Runs one range of a report on its own read-only connection. Runs in a
+    worker process, so it takes the database path rather than a connection.
+    """
+    conn = sqlite3.connect(f"file:{database}?mode=ro", uri=True)
+    try:
+        return conn.execute(sql, params).fetchall()
+    finally:
+        conn.close()
+
+def merge_rows(report, partials):
+    """
+    Combines the partial results of the ranges into one row per group,
+    sorted by group.
+    """
+    operations = [operation for _, operation in REPORTS[report]['columns']]
+    merged = {}
+    for rows in partials:
+        for key, *values in rows:
+            current = merged.get(key)
+            if current is None:
+                merged[key] = values
+                continue
+            for i, (operation, value) in enumerate(zip(operations, values)):
+                if value is None:
+                    continue
+                if current[i] is None:
+                    current[i] = value
+                elif operation == 'sum':
+                    current[i] += value
+                elif operation == 'min':
+                    current[i] = min(current[i], value)
+                else:
+                    current[i] = max(current[i], value)
+    return [(key, *merged[key]) for key in sorted(merged, key=lambda key: (key is not None, key))]
+
+def run_serial(database, report):
+    """
+    Runs a report as a single GROUP BY query. Returns its rows sorted by group.
+    """
+    rows = run_range(database, report_sql(report), [])
+    return sorted(rows, key=lambda row: (row[0] is not None, row[0]))
+
+def run_parallel(database, report, workers=None, executor=None):
+    """
+    Runs a report as one query per range of its split column on a pool of
+    worker processes, each with its own read-only connection, and merges
+    the results. Each range is read in its own transaction, so a write
+    committed while the report runs may show up in some ranges only.
+
+    Small tables (see PARALLEL_MIN_ROWS) and a single worker run the plain
+    query instead. Returns the rows sorted by group.
+    """
+    workers = workers or os.cpu_count() or 1
+    conn = sqlite3.connect(f"file:{database}?mode=ro", uri=True)
+    try:
+        table = REPORTS[report]['table']
+        low, high = conn.execute(f"SELECT MIN(rowid), MAX(rowid) FROM {table}").fetchone()
+        if workers == 1 or low is None or high - low < PARALLEL_MIN_ROWS:
+            return run_serial(database, report)
+        ranges = split_ranges(conn, report, workers)
+    finally:
+        conn.close()
+
+    own_executor = executor is None
+    executor = executor or ProcessPoolExecutor(max_workers=workers)
+    try:
+        futures = [executor.submit(run_range, database, report_sql(report, condition), params)
+                   for condition, params in ranges]
+        return merge_rows(report, [future.result() for future in futures])
+    finally:
+        if own_executor:
+            executor.shutdown()
+
+def benchmark(database, reports, worker_counts, repeat=3):
+    """
+    Times every report as a single query and in parallel with each worker
+    count, checking that both give the same rows. Returns a list of
+    (report, workers or None for the single query, best seconds, speedup).
+    """
+    results = []
+    for report in reports:
+        expected = run_serial(database, report)
+        serial = min(timed(run_serial, database, report) for _ in range(repeat))
+        results.append((report, None, serial, 1.0))
+        for workers in worker_counts:
+            # The pool is started outside the timing, as a long-running
+            # service would keep it, and warmed with one run.
+            with ProcessPoolExecutor(max_workers=workers) as executor:
+                if run_parallel(database, report, workers, executor) != expected:
+                    raise AssertionError(f"{report} with {workers} workers differs from the single query")
+                best = min(timed(run_parallel, database, report, workers, executor) for _ in range(repeat))
+            results.append((report, workers, best, serial / best))
+    return results
+
+def timed(func, *args):
+    """
+    Returns how long one call took, in seconds.
+    """
+    start = time.perf_counter()
+    func(*args)
+    return time.perf_counter() - start
+
+def main():
+    parser = argparse.ArgumentParser(
+        description="Run history-wide aggregates split into ranges over several processes.")
+    parser.add_argument("--database", default="business.db", help="database file (default: business.db)")
+    subparsers = parser.add_subparsers(dest="command", required=True)
+
+    sub = subparsers.add_parser("run", help="run one report")
+    sub.add_argument("report", choices=REPORTS)
+    sub.add_argument("--workers", type=int, help="worker processes (default: one per CPU core)")
+    sub.add_argument("--serial", action="store_true", help="run the single-query version instead")
+
+    sub = subparsers.add_parser("benchmark", help="compare the single query with 1, 2, 4... workers")
+    sub.add_argument("--reports", nargs="+", choices=REPORTS, default=list(REPORTS))
+    sub.add_argument("--workers", type=int, nargs="+", help="worker counts (default: powers of 2 up to the core count)")
+    sub.add_argument("--repeat", type=int, default=3, help="runs per measurement; the best is kept (default: 3)")
+    args = parser.parse_args()
+
+    if not os.path.exists(args.database):
+        print(f"Error: {args.database} does not exist. Run setup_database.py first.")
+        return
+
+    try:
+        if args.command == "run":
+            start = time.perf_counter()
+            if args.serial:
+                rows = run_serial(args.database, args.report)
+            else:
+                rows = run_parallel(args.database, args.report, args.workers)
+            table_renderer.render(REPORTS[args.report]['headers'], rows, title=f"{args.report}:")
+            print(f"{len(rows)} row(s) in {time.perf_counter() - start:.2f}s.", file=sys.stderr)
+        else:
+            cores = os.cpu_count() or 1
+            worker_counts = args.workers or [2 ** i for i in range(cores.bit_length()) if 2 ** i <= cores] + (
+                [cores] if cores & (cores - 1) else [])
+            print(f"Benchmarking on {cores} CPU core(s):")
+            results = benchmark(args.database, args.reports, worker_counts, args.repeat)
+            table_renderer.render(
+                ("Report", "Workers", "Best (ms)", "Speedup"),
+                [(report, "single query" if workers is None else workers, round(seconds * 1000, 1),
+                  round(speedup, 2)) for report, workers, seconds, speedup in results],
+                pager=False)
+    except sqlite3.Error as e:
+        print(f"An error occurred while running the report: {e}")
+
+if __name__ == "__main__":
+    main()
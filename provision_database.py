@@ -0,0 +1,244 @@
+# provision_database.py
+
+import argparse
+import glob
+import hashlib
+import os
+import shutil
+import sqlite3
+import time
+
+import db_profiles
+import generate_data
+import migrations
+from setup_database import execute_script
+
+# Where the template databases are kept.
+TEMPLATE_DIR = "templates"
+
+# The files a template is built from. A change to any of them gives the
+# templates a new name, so stale ones are never cloned.
+SOURCE_FILES = ("create_tables.sql", "insert_sample_data.sql", "migrations.py", "generate_data.py")
+
+# How a new database is copied from its template:
+#   backup  the sqlite3 backup API, which copies the template page by page
+#           through SQLite and gives a consistent copy even while another
+#           process reads it
+#   copy    a plain file copy, slightly faster, for templates nothing else opens
+CLONE_METHODS = ('backup', 'copy')
+
+# Page size of templates built for profiles that leave it unset (SQLite's default).
+DEFAULT_PAGE_SIZE = 4096
+
+SCRIPT_DIR = os.path.dirname(os.path.abspath(__file__))
+
+def parse_data(value):
+    """
+    Checks the data a template holds: 'empty' (the schema only), 'sample'
+    (insert_sample_data.sql) or a scale of generated data (see generate_data.py).
+    """
+    if value.lower() in ('empty', 'sample'):
+        return value.lower()
+    return str(generate_data.parse_scale(value))
+
+def source_fingerprint():
+    """
+    Returns a short hash of the files templates are built from.
+    """
+    digest = hashlib.sha256()
+    for name in SOURCE_FILES:
+        with open(os.path.join(SCRIPT_DIR, name), 'rb') as file:
+            digest.update(file.read())
+    return digest.hexdigest()[:10]
+
+def profile_page_size(profile=None):
+    """
+    Returns the page size databases of a connection profile should have.
+    """
+    _, settings = db_profiles.select_profile(profile)
+    return int(settings.get('page_size') or DEFAULT_PAGE_SIZE)
+
+def template_path(data='sample', seed=generate_data.DEFAULT_SEED, template_dir=TEMPLATE_DIR,
+                  page_size=DEFAULT_PAGE_SIZE):
+    """
+    Returns the file name of the template for the given data and page size,
+    versioned by schema version and the fingerprint of its source files.
+    """
+    kind = data if data in ('empty', 'sample') else f"generated_{data}_seed{seed}"
+    return os.path.join(template_dir,
+                        f"{kind}_p{page_size}_v{migrations.LATEST_VERSION}_{source_fingerprint()}.db")
+
+def build_template(data='sample', seed=generate_data.DEFAULT_SEED, template_dir=TEMPLATE_DIR, force=False,
+                   page_size=DEFAULT_PAGE_SIZE):
+    """
+    Builds the template database for the given data and page size, unless
+    it already exists (or force is True). The template is built under a
+    temporary name and renamed when complete, so a half-built one is never
+    cloned. Returns the template's path, or None if it could not be built.
+    """
+    path = template_path(data, seed, template_dir, page_size)
+    if os.path.exists(path) and not force:
+        return path
+    os.makedirs(template_dir, exist_ok=True)
+    building = f"{path}.{os.getpid()}.building"
+    for leftover in (building, building + "-journal"):
+        if os.path.exists(leftover):
+            os.remove(leftover)
+
+    print(f"Building template {path}...")
+    start = time.perf_counter()
+    if data in ('empty', 'sample'):
+        try:
+            conn, _, _ = db_profiles.connect(building, 'bulk-load', allow_vacuum=True)
+        except (sqlite3.Error, ValueError) as e:
+            print(f"Error connecting to database: {e}")
+            return None
+        execute_script(conn, os.path.join(SCRIPT_DIR, "create_tables.sql"))
+        if data == 'sample':
+            execute_script(conn, os.path.join(SCRIPT_DIR, "insert_sample_data.sql"))
+        ok = migrations.migrate(conn, verbose=False)
+        conn.close()
+    else:
+        ok = generate_data.build_database(building, int(data), seed, force=True) is not None
+    if not ok:
+        os.remove(building)
+        return None
+
+    # The template is written once and copied many times: store it as one
+    # compact, checked file with statistics for the query planner. The
+    # VACUUM also gives it the page size, which a copy cannot change cheaply.
+    try:
+        conn = sqlite3.connect(building)
+        conn.execute("PRAGMA journal_mode = DELETE")
+        conn.execute("ANALYZE")
+        conn.execute(f"PRAGMA page_size = {int(page_size)}")
+        conn.execute("VACUUM")
+        problem = conn.execute("PRAGMA quick_check").fetchone()[0]
+        conn.close()
+    except sqlite3.Error as e:
+        problem = str(e)
+    if problem != "ok":
+        print(f"An error occurred while building the template: {problem}")
+        os.remove(building)
+        return None
+    os.replace(building, path)
+    print(f"Template built in {time.perf_counter() - start:.1f}s "
+          f"({os.path.getsize(path) / 1024 / 1024:.1f} MB).")
+    return path
+
+def clone_database(template, target, method='backup', force=False):
+    """
+    Creates target as a copy of a template database. The copy is written
+    under a temporary name and renamed into place, so target is either
+    missing or complete. Returns True if the database was created.
+    """
+    if method not in CLONE_METHODS:
+        raise ValueError(f"unknown clone method '{method}' (use one of {', '.join(CLONE_METHODS)})")
+    if os.path.exists(target):
+        if not force:
+            print(f"Error: {target} already exists. Use --force to replace it.")
+            return False
+    partial = f"{target}.{os.getpid()}.partial"
+    if os.path.exists(partial):
+        os.remove(partial)
+
+    try:
+        if method == 'copy':
+            shutil.copyfile(template, partial)
+            with open(partial, 'rb+') as copy:
+                os.fsync(copy.fileno())
+        else:
+            source = sqlite3.connect(f"file:{template}?mode=ro", uri=True)
+            copy = sqlite3.connect(partial)
+            try:
+                source.backup(copy)
+            finally:
+                copy.close()
+                source.close()
+    except (sqlite3.Error, OSError) as e:
+        print(f"An error occurred while copying the template: {e}")
+        if os.path.exists(partial):
+            os.remove(partial)
+        return False
+
+    # A replaced database must not be paired with its old WAL file.
+    for leftover in (target + "-wal", target + "-shm", target + "-journal"):
+        if os.path.exists(leftover):
+            os.remove(leftover)
+    os.replace(partial, target)
+    return True
+
+def provision(target, data='sample', seed=generate_data.DEFAULT_SEED, method='backup', force=False,
+              profile=None, template_dir=TEMPLATE_DIR):
+    """
+    Creates target from the template for the given data, building the
+    template first if there is none yet, then applies the connection
+    profile's file settings (such as WAL) to it. The template used has the
+    profile's page size. Returns True on success.
+    """
+    try:
+        page_size = profile_page_size(profile)
+    except ValueError as e:
+        print(f"Error: {e}")
+        return False
+    template = build_template(data, seed, template_dir, page_size=page_size)
+    if template is None:
+        return False
+    start = time.perf_counter()
+    if not clone_database(template, target, method, force):
+        return False
+    try:
+        conn, name, notes = db_profiles.connect(target, profile)
+        conn.close()
+    except (sqlite3.Error, ValueError) as e:
+        print(f"Error connecting to database: {e}")
+        return False
+    print(f"Created {target} from {template} in {(time.perf_counter() - start) * 1000:.0f} ms "
+          f"(profile: {name}).")
+    for note in notes:
+        print(f"Note: {note}")
+    return True
+
+def main():
+    parser = argparse.ArgumentParser(description="Create databases by copying a prebuilt template.")
+    parser.add_argument("--data", type=parse_data, default="sample",
+                        help="empty, sample (insert_sample_data.sql) or a scale of generated data "
+                             "such as 10k or 1m (default: sample)")
+    parser.add_argument("--seed", type=int, default=generate_data.DEFAULT_SEED,
+                        help="random seed of generated data (default: 42)")
+    parser.add_argument("--template-dir", default=TEMPLATE_DIR, help=f"template directory (default: {TEMPLATE_DIR})")
+    subparsers = parser.add_subparsers(dest="command", required=True)
+
+    sub = subparsers.add_parser("new", help="create a database from the template, building the template if needed")
+    sub.add_argument("output", nargs="?", default="business.db", help="database file (default: business.db)")
+    sub.add_argument("--method", choices=CLONE_METHODS, default="backup", help="how to copy the template (default: backup)")
+    sub.add_argument("--force", action="store_true", help="replace the output file if it exists")
+    sub.add_argument("--profile", help="connection profile from db_profiles.py")
+
+    sub = subparsers.add_parser("build", help="build the template now")
+    sub.add_argument("--force", action="store_true", help="rebuild the template even if it exists")
+    sub.add_argument("--profile", help="build it with this connection profile's page size")
+
+    subparsers.add_parser("list", help="list the templates, marking the ones out of date")
+    args = parser.parse_args()
+
+    if args.command == "build":
+        try:
+            page_size = profile_page_size(args.profile)
+        except ValueError as e:
+            print(f"Error: {e}")
+            return
+        build_template(args.data, args.seed, args.template_dir, args.force, page_size)
+    elif args.command == "new":
+        provision(args.output, args.data, args.seed, args.method, args.force, args.profile, args.template_dir)
+    else:
+        current = f"_v{migrations.LATEST_VERSION}_{source_fingerprint()}.db"
+        paths = sorted(glob.glob(os.path.join(args.template_dir, "*.db")))
+        if not paths:
+            print("No templates yet.")
+        for path in paths:
+            status = "" if path.endswith(current) else "   (out of date)"
+            print(f"{path}   {os.path.getsize(path) / 1024 / 1024:.1f} MB{status}")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,190 @@
+# purge_orders.py
+
+import argparse
+import os
+import sqlite3
+import sys
+import time
+from datetime import date
+
+import db_profiles
+import migrations
+import queries
+
+# Orders deleted per transaction.
+CHUNK_SIZE = 5000
+
+# Pause between chunks, so other connections waiting for the write lock
+# (their busy handlers retry every few milliseconds) get their turn.
+PAUSE_MS = 50
+
+def order_condition(supplier_id=None, date_from=None, date_to=None, allow_all=False):
+    """
+    Returns (condition, params) selecting the orders of a supplier and/or a
+    date range. Each is served by idx_orders_supplier_date or idx_orders_listing.
+    Without either, the condition matches every order if allow_all is set
+    (for counting) and raises ValueError otherwise.
+    """
+    conditions = []
+    params = []
+    if supplier_id is not None:
+        conditions.append("supplier_id = ?")
+        params.append(supplier_id)
+    if date_from:
+        conditions.append("order_date >= ?")
+        params.append(date_from)
+    if date_to:
+        conditions.append("order_date <= ?")
+        params.append(date_to)
+    if not conditions and allow_all:
+        return "1", params
+    if not conditions:
+        raise ValueError("refusing to purge every order: give a supplier or a date range")
+    return " AND ".join(conditions), params
+
+def count_orders(conn, condition, params):
+    """
+    Returns how many orders match a condition, without reading the orders.
+    """
+    return conn.execute(f"SELECT COUNT(*) FROM Orders WHERE {condition}", params).fetchone()[0]
+
+def purge_orders(conn, condition, params, chunk_size=CHUNK_SIZE, pause_ms=PAUSE_MS,
+                 final_statement=None, verbose=False):
+    """
+    Deletes the orders matching a condition, chunk_size orders per
+    transaction, pausing pause_ms between transactions so the write lock is
+    never held for long. chunk_size None deletes everything in one transaction.
+
+    final_statement, an optional (sql, params), runs in the same transaction
+    as the last chunk, so it only takes effect once every matching order is
+    gone. Returns (orders deleted, rows changed by final_statement).
+
+    Every chunk commits on its own, so the caller must commit or roll back
+    its own transaction first: with one open this raises
+    sqlite3.ProgrammingError rather than committing it.
+    """
+    if chunk_size is None:
+        delete_sql, delete_params = f"DELETE FROM Orders WHERE {condition}", list(params)
+    else:
+        delete_sql = (f"DELETE FROM Orders WHERE order_id IN "
+                      f"(SELECT order_id FROM Orders WHERE {condition} LIMIT ?)")
+        delete_params = list(params) + [chunk_size]
+    if conn.in_transaction:
+        raise sqlite3.ProgrammingError(
+            "purge_orders commits as it goes: commit or roll back the open transaction first")
+
+    deleted = 0
+    while True:
+        # IMMEDIATE takes the write lock up front, so a chunk never fails
+        # halfway because another connection started writing first.
+        conn.execute("BEGIN IMMEDIATE")
+        try:
+            count = conn.execute(delete_sql, delete_params).rowcount
+            last = chunk_size is None or count < chunk_size
+            changed = 0
+            if last and final_statement:
+                changed = conn.execute(*final_statement).rowcount
+            conn.commit()
+        except sqlite3.Error:
+            conn.rollback()
+            raise
+        deleted += count
+        if last:
+            return deleted, changed
+        if verbose:
+            print(f"  deleted {deleted} orders...")
+        time.sleep(pause_ms / 1000)
+
+def delete_supplier(conn, supplier_id, chunk_size=CHUNK_SIZE, pause_ms=PAUSE_MS, verbose=False):
+    """
+    Deletes a supplier together with all of its orders.
+
+    A supplier with up to chunk_size orders is deleted in one transaction.
+    A larger one has its orders purged chunk by chunk first; the supplier
+    row goes in the same transaction as the last chunk, so it is never
+    deleted while it still has orders, and an interrupted purge can simply
+    be run again. Returns (orders deleted, suppliers deleted).
+    """
+    return purge_orders(conn, "supplier_id = ?", [supplier_id], chunk_size, pause_ms,
+                        final_statement=(queries.sql('delete_supplier'), (supplier_id,)),
+                        verbose=verbose)
+
+def parse_date(value):
+    """
+    Checks a YYYY-MM-DD date given on the command line.
+    """
+    try:
+        date.fromisoformat(value)
+    except ValueError:
+        raise argparse.ArgumentTypeError(f"invalid date '{value}' (use YYYY-MM-DD)")
+    return value
+
+def main():
+    parser = argparse.ArgumentParser(
+        description="Delete the orders of a supplier or a date range in small transactions.")
+    parser.add_argument("--supplier", type=int, help="delete this supplier's orders")
+    parser.add_argument("--delete-supplier", action="store_true",
+                        help="also delete the supplier itself, together with its last orders")
+    parser.add_argument("--from", dest="date_from", type=parse_date, help="first order date to delete (YYYY-MM-DD)")
+    parser.add_argument("--to", dest="date_to", type=parse_date, help="last order date to delete (YYYY-MM-DD)")
+    parser.add_argument("--dry-run", action="store_true", help="only show how many orders would be deleted")
+    parser.add_argument("--chunk-size", type=int, default=CHUNK_SIZE,
+                        help=f"orders deleted per transaction (default: {CHUNK_SIZE})")
+    parser.add_argument("--pause-ms", type=float, default=PAUSE_MS,
+                        help=f"pause between transactions in milliseconds (default: {PAUSE_MS})")
+    parser.add_argument("--database", default="business.db", help="database file (default: business.db)")
+    parser.add_argument("--profile", help="connection profile from db_profiles.py")
+    args = parser.parse_args()
+
+    if args.delete_supplier and (args.supplier is None or args.date_from or args.date_to):
+        print("Error: --delete-supplier needs --supplier and no date range.", file=sys.stderr)
+        return
+    try:
+        condition, params = order_condition(args.supplier, args.date_from, args.date_to, allow_all=args.dry_run)
+    except ValueError as e:
+        print(f"Error: {e}", file=sys.stderr)
+        return
+    if not os.path.exists(args.database):
+        print(f"Error: {args.database} does not exist. Run setup_database.py first.")
+        return
+
+    try:
+        conn, _, _ = db_profiles.connect(args.database, args.profile)
+    except (sqlite3.Error, ValueError) as e:
+        print(f"Error connecting to database: {e}")
+        return
+    if not migrations.migrate(conn, verbose=False):
+        conn.close()
+        return
+
+    try:
+        supplier_exists = not args.delete_supplier or conn.execute(
+            "SELECT 1 FROM Supplier WHERE supplier_id = ?", (args.supplier,)).fetchone() is not None
+        if not supplier_exists and not args.dry_run:
+            print(f"Supplier ID {args.supplier} does not exist.")
+            return
+        matching = count_orders(conn, condition, params)
+        target = f"supplier ID {args.supplier} and its orders" if args.delete_supplier else "orders"
+        print(f"{matching} order(s) match.")
+        if args.dry_run:
+            if supplier_exists:
+                print(f"Dry run: nothing deleted. Without --dry-run this deletes {target}.")
+            else:
+                print(f"Dry run: supplier ID {args.supplier} does not exist, so nothing would be deleted.")
+            return
+
+        start = time.perf_counter()
+        if args.delete_supplier:
+            deleted, _ = delete_supplier(conn, args.supplier, args.chunk_size, args.pause_ms, verbose=True)
+            print(f"Deleted supplier ID {args.supplier} and {deleted} order(s) "
+                  f"in {time.perf_counter() - start:.1f}s.")
+        else:
+            deleted, _ = purge_orders(conn, condition, params, args.chunk_size, args.pause_ms, verbose=True)
+            print(f"Deleted {deleted} order(s) in {time.perf_counter() - start:.1f}s.")
+    except sqlite3.Error as e:
+        print(f"An error occurred while deleting orders: {e}")
+    finally:
+        conn.close()
+
+if __name__ == "__main__":
+    main()
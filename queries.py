@@ -0,0 +1,425 @@
+# queries.py
+
+import sqlite3
+import sys
+
+# Every SQL statement the application runs by name. The sqlite3 module keeps
+# prepared statements in a per-connection cache keyed by the exact SQL text,
+# so sharing one string per query means each is parsed once per connection,
+# when it first runs or when warm_up prepares it ahead of time.
+
+# SELECT ... FROM ... of the list views, without ORDER BY. The paged views
+# (see PAGED_VIEWS in cli_application.py) add their own keyset condition.
+VIEW_BASES = {
+    'orders': '''
+    SELECT
+        o.order_id,
+        o.order_date,
+        s.supplier_name,
+        p.product_name,
+        o.order_quantity,
+        o.product_ordered,
+        e.employee_name
+    FROM
+        Orders o
+    LEFT JOIN
+        Supplier s ON o.supplier_id = s.supplier_id
+    LEFT JOIN
+        Product p ON o.product_id = p.product_id
+    LEFT JOIN
+        Employee e ON o.supplied_by = e.employee_id
+    ''',
+    'employees': '''
+    SELECT
+        e.employee_id,
+        e.employee_name,
+        e.employee_position,
+        e.employee_salary,
+        d.dept_name
+    FROM
+        Employee e
+    JOIN
+        Department d ON e.employee_dept = d.dept_id
+    ''',
+    'products': '''
+    SELECT
+        p.product_id,
+        p.product_name,
+        p.product_price,
+        p.product_quantity,
+        d.dept_name,
+        i.quantity_in_stock
+    FROM
+        Product p
+    LEFT JOIN
+        Department d ON p.product_dept = d.dept_id
+    LEFT JOIN
+        Inventory i ON p.product_id = i.product_id
+    ''',
+    'suppliers': '''
+    SELECT
+        supplier_id,
+        supplier_name,
+        contact_number,
+        supplier_address
+    FROM
+        Supplier
+    ''',
+    # SalesSummary holds one row per product and is kept up to date by
+    # triggers on Sales, so the report never has to aggregate all sales.
+    'sales': '''
+    SELECT
+        p.product_id,
+        p.product_name,
+        ss.total_quantity_sold
+    FROM
+        SalesSummary ss
+    JOIN
+        Product p ON ss.product_id = p.product_id
+    ''',
+}
+
+# Live and archived orders together: order_history is a temporary view
+# defined by archive_orders.attach_archive.
+VIEW_BASES['order-history'] = VIEW_BASES['orders'].replace("Orders o", "order_history o")
+
+# Queries that only compile while the archive database is attached.
+ARCHIVE_QUERIES = {'order-history'}
+
+QUERIES = {
+    # Full lists, in the same order as the paged views.
+    'orders': VIEW_BASES['orders'] + "ORDER BY o.order_date DESC, o.order_id DESC",
+    'employees': VIEW_BASES['employees'] + "ORDER BY e.employee_id",
+    'products': VIEW_BASES['products'] + "ORDER BY p.product_id",
+    'suppliers': VIEW_BASES['suppliers'] + "ORDER BY supplier_id",
+    'sales': VIEW_BASES['sales'] + "ORDER BY ss.total_quantity_sold DESC, ss.product_id DESC",
+    'order-history': VIEW_BASES['order-history'] + "ORDER BY o.order_date DESC, o.order_id DESC",
+    'departments': '''
+    SELECT dept_id, dept_name
+    FROM Department
+    ORDER BY dept_id
+    ''',
+
+    # Employee IDs and names, for get_employees.
+    'employee_names': '''
+    SELECT employee_id, employee_name
+    FROM Employee
+    ORDER BY employee_id
+    ''',
+
+    # Type-ahead name searches for the interactive prompts: an FTS5 MATCH
+    # expression and the number of matches to return, best match first.
+    # The subquery lets FTS5 rank and limit on its own before the join.
+    'search_products': '''
+    SELECT p.product_id, p.product_name, i.quantity_in_stock
+    FROM (SELECT rowid, rank FROM product_fts WHERE product_fts MATCH ? ORDER BY rank LIMIT ?) f
+    JOIN Product p ON p.product_id = f.rowid
+    LEFT JOIN Inventory i ON p.product_id = i.product_id
+    ORDER BY f.rank
+    ''',
+    'search_suppliers': '''
+    SELECT s.supplier_id, s.supplier_name, s.supplier_address
+    FROM (SELECT rowid, rank FROM supplier_fts WHERE supplier_fts MATCH ? ORDER BY rank LIMIT ?) f
+    JOIN Supplier s ON s.supplier_id = f.rowid
+    ORDER BY f.rank
+    ''',
+    'search_employees': '''
+    SELECT e.employee_id, e.employee_name, e.employee_position
+    FROM (SELECT rowid, rank FROM employee_fts WHERE employee_fts MATCH ? ORDER BY rank LIMIT ?) f
+    JOIN Employee e ON e.employee_id = f.rowid
+    ORDER BY f.rank
+    ''',
+
+    # Products whose stock is below their reorder level and that have no
+    # open reorder (the condition of idx_inventory_low_stock), with what to
+    # order from whom. Without a preferred supplier, the product's most
+    # recent supplier is used (found through idx_orders_product_date).
+    'low_stock': '''
+    SELECT
+        i.product_id,
+        p.product_name,
+        i.quantity_in_stock,
+        i.reorder_level,
+        COALESCE(i.reorder_quantity, 2 * i.reorder_level - i.quantity_in_stock) AS order_quantity,
+        COALESCE(
+            (SELECT s.supplier_id FROM Supplier s WHERE s.supplier_id = i.preferred_supplier_id),
+            (SELECT o.supplier_id FROM Orders o
+             WHERE o.product_id = i.product_id AND o.supplier_id IS NOT NULL
+             ORDER BY o.order_date DESC
+             LIMIT 1)
+        ) AS supplier_id
+    FROM
+        Inventory i
+    JOIN
+        Product p ON p.product_id = i.product_id
+    WHERE
+        i.quantity_in_stock < i.reorder_level AND i.reorder_order_id IS NULL
+    ORDER BY
+        i.product_id
+    ''',
+
+    'orders_by_supplier': '''
+    SELECT
+        order_id,
+        order_date,
+        product_ordered,
+        order_quantity
+    FROM
+        Orders
+    WHERE
+        supplier_id = ?
+    ''',
+
+    # Changes.
+    'insert_employee': '''INSERT INTO Employee(employee_name, employee_position, employee_salary, employee_dept)
+             VALUES(?, ?, ?, ?)''',
+    'insert_order': '''INSERT INTO Orders(order_date, supplier_id, product_id, order_quantity, product_ordered, supplied_by)
+             VALUES(?, ?, ?, ?, ?, ?)''',
+    'set_stock_quantity': '''UPDATE Inventory
+             SET quantity_in_stock = ?
+             WHERE product_id = ?''',
+    'delete_order': '''DELETE FROM Orders WHERE order_id = ?''',
+    'delete_orders_by_supplier': '''DELETE FROM Orders WHERE supplier_id = ?''',
+    'delete_supplier': '''DELETE FROM Supplier WHERE supplier_id = ?''',
+}
+
+# One order for every product in low_stock that has a supplier. Parameters:
+# the order date, then the ID of the employee placing the orders.
+QUERIES['insert_reorders'] = f'''
+    INSERT INTO Orders (order_date, supplier_id, product_id, order_quantity, product_ordered, supplied_by)
+    SELECT ?, supplier_id, product_id, order_quantity, product_name, ?
+    FROM ({QUERIES['low_stock']})
+    WHERE supplier_id IS NOT NULL AND order_quantity > 0
+    '''
+
+# Records the orders just added by insert_reorders (those with an ID above
+# the given one, twice) as the open reorders of their products.
+QUERIES['link_reorders'] = '''
+    UPDATE Inventory
+    SET reorder_order_id = (SELECT MAX(o.order_id) FROM Orders o
+                            WHERE o.product_id = Inventory.product_id AND o.order_id > ?)
+    WHERE quantity_in_stock < reorder_level AND reorder_order_id IS NULL
+      AND product_id IN (SELECT product_id FROM Orders WHERE order_id > ?)
+    '''
+
+QUERIES['set_reorder_threshold'] = '''UPDATE Inventory
+             SET reorder_level = ?, reorder_quantity = ?, preferred_supplier_id = ?
+             WHERE product_id = ?'''
+
+# Analytics reports (see analytics.py). The order reports read OrderRollup,
+# which triggers on Orders keep up to date, so each reads a few rows per
+# period however many orders there are. Parameters: the grain ('day',
+# 'week' or 'month'), the first and last period start, and (except for
+# order_totals) the number of top entries to keep in each period.
+ROLLUP_RANKING = '''
+    SELECT period_start, key, name, order_count, total_quantity, share_pct, rank
+    FROM (
+        SELECT
+            r.period_start,
+            r.key,
+            COALESCE(t.{name}, '(none)') AS name,
+            r.order_count,
+            r.total_quantity,
+            ROUND(100.0 * r.total_quantity / SUM(r.total_quantity) OVER (PARTITION BY r.period_start), 1) AS share_pct,
+            RANK() OVER (PARTITION BY r.period_start ORDER BY r.total_quantity DESC) AS rank
+        FROM
+            OrderRollup r
+        LEFT JOIN
+            {table} t ON t.{key} = r.key
+        WHERE
+            r.grain = ? AND r.dimension = '{dimension}'
+            AND r.period_start BETWEEN ? AND ? AND r.order_count > 0
+    )
+    WHERE rank <= ?
+    ORDER BY period_start, rank, key
+    '''
+QUERIES['rollup_by_supplier'] = ROLLUP_RANKING.format(
+    dimension='supplier', table='Supplier', key='supplier_id', name='supplier_name')
+QUERIES['rollup_by_department'] = ROLLUP_RANKING.format(
+    dimension='department', table='Department', key='dept_id', name='dept_name')
+
+# Every order is in exactly one department bucket per period (0 when it has
+# no department), so adding those up gives the period's totals.
+QUERIES['order_totals'] = '''
+    SELECT
+        period_start,
+        SUM(order_count) AS order_count,
+        SUM(total_quantity) AS total_quantity,
+        SUM(total_quantity) - LAG(SUM(total_quantity)) OVER (ORDER BY period_start) AS change,
+        SUM(SUM(total_quantity)) OVER (ORDER BY period_start) AS running_total
+    FROM
+        OrderRollup
+    WHERE
+        grain = ? AND dimension = 'department' AND period_start BETWEEN ? AND ?
+    GROUP BY
+        period_start
+    HAVING
+        SUM(order_count) > 0
+    ORDER BY
+        period_start
+    '''
+
+# Revenue at today's prices from the per-product totals in SalesSummary.
+# Parameter: the number of top products or departments to keep.
+QUERIES['revenue_by_product'] = '''
+    SELECT product_id, product_name, dept_name, total_quantity_sold, revenue, share_pct, dept_rank, rank
+    FROM (
+        SELECT
+            p.product_id,
+            p.product_name,
+            COALESCE(d.dept_name, '(none)') AS dept_name,
+            ss.total_quantity_sold,
+            ROUND(p.product_price * ss.total_quantity_sold, 2) AS revenue,
+            ROUND(100.0 * p.product_price * ss.total_quantity_sold
+                  / SUM(p.product_price * ss.total_quantity_sold) OVER (), 2) AS share_pct,
+            RANK() OVER (PARTITION BY p.product_dept ORDER BY p.product_price * ss.total_quantity_sold DESC) AS dept_rank,
+            RANK() OVER (ORDER BY p.product_price * ss.total_quantity_sold DESC) AS rank
+        FROM
+            SalesSummary ss
+        JOIN
+            Product p ON p.product_id = ss.product_id
+        LEFT JOIN
+            Department d ON d.dept_id = p.product_dept
+    )
+    WHERE rank <= ?
+    ORDER BY rank, product_id
+    '''
+QUERIES['revenue_by_department'] = '''
+    SELECT dept_id, dept_name, product_count, total_quantity_sold, revenue, share_pct, rank
+    FROM (
+        SELECT
+            p.product_dept AS dept_id,
+            COALESCE(d.dept_name, '(none)') AS dept_name,
+            COUNT(*) AS product_count,
+            SUM(ss.total_quantity_sold) AS total_quantity_sold,
+            ROUND(SUM(p.product_price * ss.total_quantity_sold), 2) AS revenue,
+            ROUND(100.0 * SUM(p.product_price * ss.total_quantity_sold)
+                  / SUM(SUM(p.product_price * ss.total_quantity_sold)) OVER (), 1) AS share_pct,
+            RANK() OVER (ORDER BY SUM(p.product_price * ss.total_quantity_sold) DESC) AS rank
+        FROM
+            SalesSummary ss
+        JOIN
+            Product p ON p.product_id = ss.product_id
+        LEFT JOIN
+            Department d ON d.dept_id = p.product_dept
+        GROUP BY
+            p.product_dept
+    )
+    WHERE rank <= ?
+    ORDER BY rank, dept_id
+    '''
+
+# Salary totals per department. Parameter: the number of top departments.
+QUERIES['department_payroll'] = '''
+    SELECT dept_id, dept_name, employee_count, payroll, average_salary, highest_salary, share_pct, rank
+    FROM (
+        SELECT
+            d.dept_id,
+            d.dept_name,
+            COUNT(e.employee_id) AS employee_count,
+            ROUND(COALESCE(SUM(e.employee_salary), 0), 2) AS payroll,
+            ROUND(AVG(e.employee_salary), 2) AS average_salary,
+            MAX(e.employee_salary) AS highest_salary,
+            ROUND(100.0 * COALESCE(SUM(e.employee_salary), 0)
+                  / SUM(SUM(e.employee_salary)) OVER (), 1) AS share_pct,
+            RANK() OVER (ORDER BY COALESCE(SUM(e.employee_salary), 0) DESC) AS rank
+        FROM
+            Department d
+        LEFT JOIN
+            Employee e ON e.employee_dept = d.dept_id
+        GROUP BY
+            d.dept_id
+    )
+    WHERE rank <= ?
+    ORDER BY rank, dept_id
+    '''
+
+# Size of the per-connection statement cache (sqlite3.connect's
+# cached_statements), so every registered query stays prepared. Each paged
+# view is run in up to four forms (first page, next page, previous page,
+# full stream); the rest is room for PRAGMAs and ad-hoc SQL.
+STATEMENT_CACHE_SIZE = len(QUERIES) + 4 * len(VIEW_BASES) + 64
+
+def sql(name):
+    """
+    Returns the SQL text of a registered query.
+    """
+    return QUERIES[name]
+
+def execute(conn, name, parameters=()):
+    """
+    Runs a registered query and returns its cursor.
+    """
+    return conn.execute(QUERIES[name], parameters)
+
+def check_queries(conn):
+    """
+    Compiles every registered query against the connected database's schema,
+    without running it. Returns a list of (name, error message) for the
+    queries that no longer match the schema.
+    """
+    problems = []
+    attached = {row[1] for row in conn.execute("PRAGMA database_list")}
+    for name, text in QUERIES.items():
+        if name in ARCHIVE_QUERIES and 'archive' not in attached:
+            continue
+        try:
+            # EXPLAIN prepares the statement (resolving every table and
+            # column) but does not execute it; parameters are bound as NULL.
+            # The plain sqlite3 method keeps the check out of the query
+            # statistics of an instrumented connection.
+            sqlite3.Connection.execute(conn, "EXPLAIN " + text, (None,) * text.count('?')).fetchall()
+        except sqlite3.Error as e:
+            problems.append((name, str(e)))
+    return problems
+
+def prepare_queries(conn):
+    """
+    Puts every registered SELECT in the connection's statement cache. The
+    sqlite3 module only prepares a statement by running it, so each one is
+    stepped to its first row with NULL parameters. Write statements are
+    left to be prepared on first use: running them here would take the
+    write lock and fire triggers just to fill a cache.
+
+    The schema itself is checked by check_queries; a SELECT that cannot run
+    now (e.g. the database is locked) is simply prepared on first use.
+    """
+    attached = {row[1] for row in conn.execute("PRAGMA database_list")}
+    # The plain sqlite3 method keeps this out of the query statistics of an
+    # instrumented connection; it shares the connection's statement cache.
+    execute = sqlite3.Connection.execute
+    for name, text in QUERIES.items():
+        if name in ARCHIVE_QUERIES and 'archive' not in attached:
+            continue
+        if not text.lstrip().upper().startswith(("SELECT", "WITH")):
+            continue
+        try:
+            execute(conn, text, (None,) * text.count('?')).close()
+        except sqlite3.Error:
+            pass
+
+def warm_up(conn, verbose=True):
+    """
+    Checks every registered query against the schema at startup, so a schema
+    that drifted from the code fails before the first screen rather than in
+    the middle of a session, then prepares the SELECTs on the connection
+    (see prepare_queries). Returns True if all of them compiled.
+    """
+    problems = check_queries(conn)
+    if not problems:
+        prepare_queries(conn)
+    if problems and verbose:
+        print("Error: the database schema does not match these queries:")
+        for name, message in problems:
+            print(f"    {name}: {message}")
+    return not problems
+
+def main():
+    database = sys.argv[1] if len(sys.argv) > 1 else "business.db"
+    conn = sqlite3.connect(database)
+    if warm_up(conn):
+        print(f"All {len(QUERIES)} queries match the schema of {database}.")
+    conn.close()
+
+if __name__ == "__main__":
+    main()
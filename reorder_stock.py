@@ -0,0 +1,145 @@
+# reorder_stock.py
+
+import argparse
+import os
+import sqlite3
+import sys
+from datetime import datetime
+
+import db_profiles
+import migrations
+import queries
+import table_renderer
+
+LOW_STOCK_HEADERS = ("Product ID", "Product Name", "In Stock", "Reorder Level", "Order Quantity", "Supplier ID")
+
+def set_threshold(conn, product_id, level, quantity=None, supplier_id=None):
+    """
+    Sets the reorder level, quantity and preferred supplier of one product
+    without committing. Returns the number of Inventory rows changed.
+    """
+    return queries.execute(conn, 'set_reorder_threshold', (level, quantity, supplier_id, product_id)).rowcount
+
+def set_all_thresholds(conn, level, quantity=None, overwrite=False):
+    """
+    Sets the reorder level (and quantity) of every product in one statement,
+    without committing. Products that already have a level keep it unless
+    overwrite is True. Returns the number of Inventory rows changed.
+    """
+    sql = "UPDATE Inventory SET reorder_level = ?, reorder_quantity = ?"
+    if not overwrite:
+        sql += " WHERE reorder_level IS NULL"
+    return conn.execute(sql, (level, quantity)).rowcount
+
+def low_stock(conn):
+    """
+    Returns the products that need a reorder, with the quantity and supplier
+    it would use (supplier None if the product has never been ordered).
+    """
+    return queries.execute(conn, 'low_stock').fetchall()
+
+def generate_reorders(conn, employee_id=None, order_date=None):
+    """
+    Adds an order for every product below its reorder level, in a single
+    INSERT ... SELECT, and marks each as the product's open reorder so the
+    next run does not order it again before stock goes up.
+
+    Everything happens in one transaction. Returns (orders added, low-stock
+    products left without an order because no supplier is known).
+    """
+    order_date = order_date or datetime.now().strftime("%Y-%m-%d")
+    if conn.in_transaction:
+        conn.commit()
+    # IMMEDIATE keeps other writers out between reading the last order ID and
+    # inserting, so the new orders are exactly those above it.
+    conn.execute("BEGIN IMMEDIATE")
+    try:
+        last_id = conn.execute("SELECT COALESCE(MAX(order_id), 0) FROM Orders").fetchone()[0]
+        added = queries.execute(conn, 'insert_reorders', (order_date, employee_id)).rowcount
+        queries.execute(conn, 'link_reorders', (last_id, last_id))
+        skipped = conn.execute(
+            "SELECT COUNT(*) FROM Inventory WHERE quantity_in_stock < reorder_level AND reorder_order_id IS NULL"
+        ).fetchone()[0]
+        conn.commit()
+    except sqlite3.Error:
+        conn.rollback()
+        raise
+    return added, skipped
+
+def main():
+    parser = argparse.ArgumentParser(description="Reorder every product whose stock is below its reorder level.")
+    parser.add_argument("--database", default="business.db", help="database file (default: business.db)")
+    parser.add_argument("--profile", help="connection profile from db_profiles.py")
+    subparsers = parser.add_subparsers(dest="command", required=True)
+
+    sub = subparsers.add_parser("run", help="add the orders for all low-stock products")
+    sub.add_argument("--employee", type=int, help="ID of the employee placing the orders")
+    sub.add_argument("--dry-run", action="store_true", help="only list the orders that would be added")
+
+    subparsers.add_parser("list", help="list the products that need a reorder")
+
+    sub = subparsers.add_parser("set", help="set the reorder threshold of one product")
+    sub.add_argument("--product", type=int, required=True, help="product ID")
+    sub.add_argument("--level", type=int, help="reorder when stock falls below this (omit to stop reordering)")
+    sub.add_argument("--quantity", type=int, help="quantity to order (default: up to twice the level)")
+    sub.add_argument("--supplier", type=int, help="preferred supplier ID (default: the product's last supplier)")
+
+    sub = subparsers.add_parser("set-all", help="set the same reorder threshold for every product")
+    sub.add_argument("--level", type=int, required=True, help="reorder when stock falls below this")
+    sub.add_argument("--quantity", type=int, help="quantity to order (default: up to twice the level)")
+    sub.add_argument("--overwrite", action="store_true", help="also change products that already have a level")
+    args = parser.parse_args()
+
+    if not os.path.exists(args.database):
+        print(f"Error: {args.database} does not exist. Run setup_database.py first.")
+        return
+    try:
+        conn, _, _ = db_profiles.connect(args.database, args.profile)
+    except (sqlite3.Error, ValueError) as e:
+        print(f"Error connecting to database: {e}")
+        return
+    if not migrations.migrate(conn, verbose=False):
+        conn.close()
+        return
+
+    try:
+        if args.command == "set":
+            if args.supplier is not None and not conn.execute(
+                    "SELECT 1 FROM Supplier WHERE supplier_id = ?", (args.supplier,)).fetchone():
+                print(f"Supplier ID {args.supplier} does not exist.")
+            elif set_threshold(conn, args.product, args.level, args.quantity, args.supplier) == 0:
+                print(f"Product ID {args.product} not found in Inventory.")
+            else:
+                conn.commit()
+                print(f"Reorder threshold of product ID {args.product} updated.")
+        elif args.command == "set-all":
+            changed = set_all_thresholds(conn, args.level, args.quantity, args.overwrite)
+            conn.commit()
+            print(f"Reorder threshold set for {changed} product(s).")
+        elif args.command == "list" or args.dry_run:
+            rows = low_stock(conn)
+            if not table_renderer.render(LOW_STOCK_HEADERS, rows, title="Products to reorder:"):
+                print("No products need a reorder.")
+            if args.command == "run":
+                # The same rows insert_reorders would order from.
+                added = sum(1 for row in rows if row[5] is not None and row[4] > 0)
+                print(f"Dry run: nothing added. Without --dry-run this adds {added} reorder(s)"
+                      + (f" and leaves {len(rows) - added} product(s) without one." if len(rows) > added else "."))
+        else:
+            if args.employee is not None and not conn.execute(
+                    "SELECT 1 FROM Employee WHERE employee_id = ?", (args.employee,)).fetchone():
+                print(f"Employee ID {args.employee} does not exist.")
+                return
+            added, skipped = generate_reorders(conn, args.employee)
+            print(f"Added {added} reorder(s).")
+            if skipped:
+                print(f"{skipped} low-stock product(s) have no known supplier; "
+                      f"set one with: python3 reorder_stock.py set --product ID --level N --supplier ID",
+                      file=sys.stderr)
+    except sqlite3.Error as e:
+        print(f"An error occurred while reordering stock: {e}")
+    finally:
+        conn.close()
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,157 @@
+# report_cache.py
+
+import os
+import sys
+from collections import OrderedDict
+
+import queries
+from lookup_cache import data_version
+
+# Most memory the cached results of one connection may take, in megabytes.
+# Set BUSINESS_DB_CACHE_MB to change it; 0 turns the cache off.
+CACHE_MB = 128
+
+# Rows measured to estimate the memory a result takes.
+SIZE_SAMPLE_ROWS = 100
+
+def cache_mb_from_environment():
+    """
+    Returns the cache size from BUSINESS_DB_CACHE_MB, or the default.
+    """
+    value = os.environ.get("BUSINESS_DB_CACHE_MB")
+    try:
+        return float(value) if value else CACHE_MB
+    except ValueError:
+        print(f"Warning: ignoring BUSINESS_DB_CACHE_MB={value!r}; using {CACHE_MB} MB.")
+        return CACHE_MB
+
+def row_size(row):
+    """
+    Returns the approximate memory one result row takes, in bytes.
+    """
+    return sys.getsizeof(row) + sum(sys.getsizeof(value) for value in row)
+
+class ReportCache:
+    """
+    Keeps the full results of registered list queries for one connection,
+    so showing the same report again does not run its joins again. The
+    least recently used results are dropped once they take more than
+    max_bytes; a single result larger than that is never kept.
+
+    Everything is dropped when PRAGMA data_version shows another connection
+    wrote to the file, or when the connection's own total_changes shows it
+    wrote anything itself. Nothing is cached or served while the connection
+    has a transaction open, since its changes might still be rolled back.
+    """
+
+    def __init__(self, conn, max_bytes=None):
+        self.conn = conn
+        self.max_bytes = cache_mb_from_environment() * 1024 * 1024 if max_bytes is None else max_bytes
+        self.entries = OrderedDict()
+        self.size = 0
+        self.hits = 0
+        self.misses = 0
+        self.state = self._state()
+
+    def _state(self):
+        # data_version only changes for commits made by other connections.
+        return data_version(self.conn), self.conn.total_changes
+
+    def _current(self):
+        """
+        Drops every entry if the database changed since they were read.
+        Returns the current state, or None if the cache cannot be used now.
+        """
+        if self.conn.in_transaction or self.max_bytes <= 0:
+            return None
+        state = self._state()
+        if state != self.state:
+            self.invalidate()
+            self.state = state
+        return state
+
+    def _store(self, key, rows, size):
+        if size > self.max_bytes:
+            return
+        self.entries[key] = (rows, size)
+        self.size += size
+        while self.size > self.max_bytes:
+            _, (_, evicted) = self.entries.popitem(last=False)
+            self.size -= evicted
+
+    def rows(self, name, parameters=(), batch_size=1000):
+        """
+        Yields the rows of a registered query, from the cache if they are
+        still current, or else from the database batch_size rows at a time,
+        keeping them for next time once they have all been read.
+        """
+        key = (name, tuple(parameters))
+        state = self._current()
+        if state is not None and key in self.entries:
+            self.entries.move_to_end(key)
+            self.hits += 1
+            yield from self.entries[key][0]
+            return
+
+        self.misses += 1
+        cur = queries.execute(self.conn, name, parameters)
+        kept = [] if state is not None else None
+        sample_size = 0
+        try:
+            while True:
+                batch = cur.fetchmany(batch_size)
+                if not batch:
+                    break
+                if kept is not None:
+                    if len(kept) < SIZE_SAMPLE_ROWS:
+                        sample_size += sum(row_size(row) for row in batch[:SIZE_SAMPLE_ROWS - len(kept)])
+                    kept.extend(batch)
+                    # The size is estimated from the first rows, so a
+                    # result too big to keep is let go as early as possible.
+                    if sample_size * len(kept) / min(len(kept), SIZE_SAMPLE_ROWS) > self.max_bytes:
+                        kept = None
+                yield from batch
+        finally:
+            cur.close()
+        # Only results read from an unchanged database are kept.
+        if kept is not None and self._current() == state:
+            self._store(key, kept, sample_size * len(kept) / max(min(len(kept), SIZE_SAMPLE_ROWS), 1))
+
+    def invalidate(self):
+        """
+        Drops every cached result.
+        """
+        self.entries.clear()
+        self.size = 0
+
+# One cache per open connection.
+_caches = {}
+
+def get_report_cache(conn):
+    """
+    Returns the report cache for a connection, creating it on first use.
+    """
+    cache = _caches.get(conn)
+    if cache is None:
+        cache = _caches[conn] = ReportCache(conn)
+    return cache
+
+def cached_rows(conn, name, parameters=()):
+    """
+    Yields the rows of a registered query through the connection's cache.
+    """
+    return get_report_cache(conn).rows(name, parameters)
+
+def invalidate(conn):
+    """
+    Drops the cached results of a connection.
+    """
+    cache = _caches.get(conn)
+    if cache is not None:
+        cache.invalidate()
+
+def discard(conn):
+    """
+    Forgets the cache of a connection that is being closed.
+    """
+    _caches.pop(conn, None)
@@ -0,0 +1,103 @@
+# sales_summary.py
+
+import os
+import sqlite3
+import sys
+
+import migrations
+
+# Per-product totals computed straight from the Sales table. This is what
+# SalesSummary must always match.
+RECOMPUTE_SQL = '''
+SELECT
+    product_id,
+    SUM(quantity_sold) AS total_quantity_sold,
+    COUNT(*) AS sale_count
+FROM
+    Sales
+WHERE
+    product_id IS NOT NULL
+GROUP BY
+    product_id
+'''
+
+def verify_sales_summary(conn):
+    """
+    Compares SalesSummary with a full recomputation from Sales.
+    Returns a list of (product_id, summary values, recomputed values) for
+    every product that differs; an empty list means the summary is correct.
+    """
+    summary = {row[0]: row[1:] for row in conn.execute(
+        "SELECT product_id, total_quantity_sold, sale_count FROM SalesSummary")}
+    mismatches = []
+    for row in conn.execute(RECOMPUTE_SQL):
+        expected = row[1:]
+        actual = summary.pop(row[0], None)
+        if actual != expected:
+            mismatches.append((row[0], actual, expected))
+    # Whatever is left in the summary has no sales at all.
+    for product_id, actual in summary.items():
+        mismatches.append((product_id, actual, None))
+    return sorted(mismatches)
+
+def rebuild_sales_summary(conn):
+    """
+    Replaces the contents of SalesSummary with a full recomputation from Sales.
+    Returns the number of products in the rebuilt summary.
+    """
+    if conn.in_transaction:
+        conn.commit()
+    try:
+        conn.execute("BEGIN")
+        conn.execute("DELETE FROM SalesSummary")
+        cur = conn.execute(
+            "INSERT INTO SalesSummary (product_id, total_quantity_sold, sale_count) " + RECOMPUTE_SQL)
+        conn.commit()
+        return cur.rowcount
+    except sqlite3.Error:
+        conn.rollback()
+        raise
+
+def main():
+    database = "business.db"
+    command = sys.argv[1] if len(sys.argv) > 1 else "verify"
+    if command not in ("verify", "rebuild"):
+        print("Usage: python3 sales_summary.py [verify|rebuild]")
+        return
+
+    if not os.path.exists(database):
+        print(f"Error: {database} does not exist. Run setup_database.py first.")
+        return
+
+    try:
+        conn = sqlite3.connect(database)
+        conn.execute("PRAGMA foreign_keys = 1")
+    except sqlite3.Error as e:
+        print(f"Error connecting to database: {e}")
+        return
+    if not migrations.migrate(conn):
+        conn.close()
+        return
+
+    try:
+        if command == "rebuild":
+            count = rebuild_sales_summary(conn)
+            print(f"SalesSummary rebuilt with {count} product(s).")
+        else:
+            mismatches = verify_sales_summary(conn)
+            if not mismatches:
+                print("SalesSummary matches the Sales table.")
+            else:
+                print(f"SalesSummary differs from Sales for {len(mismatches)} product(s):")
+                print("{:<12} {:<30} {:<30}".format("Product ID", "Summary (total, count)", "Expected (total, count)"))
+                print("-" * 72)
+                for product_id, actual, expected in mismatches[:20]:
+                    print("{:<12} {:<30} {:<30}".format(product_id, str(actual), str(expected)))
+                print("\nRun 'python3 sales_summary.py rebuild' to repair it.")
+    except sqlite3.Error as e:
+        print(f"An error occurred while checking the sales summary: {e}")
+
+    conn.close()
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,408 @@
+# service.py
+
+import argparse
+import json
+import os
+import queue
+import sqlite3
+import threading
+import time
+from argparse import Namespace
+from contextlib import contextmanager
+from datetime import datetime
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import parse_qs, urlparse
+
+import cli_application as cli
+import cli_commands
+import db_profiles
+import migrations
+import queries
+import write_queue
+from latency_stats import LatencyRecorder
+
+DEFAULT_PORT = 8080
+DEFAULT_READERS = 4
+MAX_PAGE_SIZE = 1000
+
+# Seconds a request waits for its write to be applied.
+WRITE_TIMEOUT = 30
+
+# URL path of each paged view.
+VIEW_PATHS = {
+    '/orders': 'orders',
+    '/employees': 'employees',
+    '/products': 'products',
+    '/suppliers': 'suppliers',
+    '/sales-report': 'sales',
+}
+
+class ReaderPool:
+    """
+    A fixed set of read-only connections shared by the request threads.
+    With the database in WAL mode they read alongside the writer without
+    ever taking a write lock.
+    """
+
+    def __init__(self, database, size, settings):
+        self.connections = queue.Queue()
+        self.size = size
+        self.wait_lock = threading.Lock()
+        self.wait_seconds = 0.0
+        self.waits = 0
+        # Read-only connections cannot change the journal mode or page size.
+        settings = dict(settings, journal_mode=None, page_size=None)
+        for _ in range(size):
+            conn = sqlite3.connect(f"file:{os.path.abspath(database)}?mode=ro", uri=True,
+                                   check_same_thread=False,
+                                   cached_statements=queries.STATEMENT_CACHE_SIZE)
+            db_profiles.apply_profile(conn, settings)
+            conn.row_factory = sqlite3.Row
+            queries.prepare_queries(conn)
+            self.connections.put(conn)
+
+    @contextmanager
+    def connection(self):
+        """
+        Borrows a connection for the duration of a with block.
+        """
+        start = time.perf_counter()
+        conn = self.connections.get()
+        waited = time.perf_counter() - start
+        with self.wait_lock:
+            self.waits += 1
+            self.wait_seconds += waited
+        try:
+            yield conn
+        finally:
+            if conn.in_transaction:
+                conn.rollback()
+            self.connections.put(conn)
+
+    def stats(self):
+        with self.wait_lock:
+            return {
+                'size': self.size,
+                'idle': self.connections.qsize(),
+                'checkouts': self.waits,
+                'avg_wait_ms': round(self.wait_seconds / self.waits * 1000, 3) if self.waits else 0,
+            }
+
+    def close(self):
+        while not self.connections.empty():
+            self.connections.get().close()
+
+class BusinessService:
+    """
+    The operations of the CLI application, backed by a reader pool and a
+    single writer connection, with request statistics. Writes from all
+    request threads go through a group-commit queue on that connection.
+    """
+
+    def __init__(self, database, readers=DEFAULT_READERS, profile='throughput',
+                 window_ms=write_queue.DEFAULT_WINDOW_MS, batch_size=write_queue.DEFAULT_BATCH_SIZE):
+        writer, self.profile, notes = db_profiles.connect(database, profile, check_same_thread=False)
+        for note in notes:
+            print(f"Note: {note}")
+        if not migrations.migrate(writer):
+            writer.close()
+            raise RuntimeError("the database schema could not be brought up to date")
+        problems = queries.check_queries(writer)
+        if problems:
+            writer.close()
+            raise RuntimeError("queries do not match the schema: " +
+                               "; ".join(f"{name}: {message}" for name, message in problems))
+        # Readers only run alongside the writer in WAL mode.
+        journal_mode = writer.execute("PRAGMA journal_mode = WAL").fetchone()[0]
+        if journal_mode != 'wal':
+            print(f"Warning: the database is in {journal_mode} mode; readers may block on writes.")
+
+        self.writer = write_queue.GroupCommitQueue(writer, window_ms, batch_size)
+        self.readers = ReaderPool(database, readers, db_profiles.select_profile(profile)[1])
+        self.latency = LatencyRecorder()
+        self.active_lock = threading.Lock()
+        self.active = 0
+        self.max_active = 0
+        self.started = time.time()
+
+    def begin_request(self):
+        with self.active_lock:
+            self.active += 1
+            self.max_active = max(self.max_active, self.active)
+
+    def end_request(self, route, seconds, error):
+        with self.active_lock:
+            self.active -= 1
+        self.latency.record(route, seconds, error)
+
+    def read_page(self, view, after=None, limit=cli.PAGE_SIZE, filters=None):
+        """
+        Returns one keyset page of a view and the key to pass for the next one.
+        filters are order search filters (see cli_application.order_filters).
+        """
+        conditions, params = cli.order_filters(**(filters or {}))
+        with self.readers.connection() as conn:
+            rows = cli.fetch_page(conn, view, after, page_size=limit, conditions=conditions, params=params)
+        next_key = list(cli.page_key(view, rows[-1])) if len(rows) == limit else None
+        return {'rows': [dict(row) for row in rows], 'next': next_key}
+
+    def read_departments(self):
+        with self.readers.connection() as conn:
+            return {'rows': [{'dept_id': row[0], 'dept_name': row[1]} for row in cli.get_departments(conn)]}
+
+    def write(self, command, **fields):
+        """
+        Runs one of the command-mode operations through the write queue.
+        """
+        future = self.writer.submit(cli_commands.run_operation, Namespace(command=command, **fields))
+        new_id, rowcount = future.result(timeout=WRITE_TIMEOUT)
+        return {'status': 'ok', 'id': new_id, 'rowcount': rowcount}
+
+    def stats(self):
+        with self.active_lock:
+            concurrency = {'active_requests': self.active, 'max_concurrent_requests': self.max_active}
+        return {
+            'uptime_seconds': round(time.time() - self.started, 1),
+            'profile': self.profile,
+            'concurrency': concurrency,
+            'readers': self.readers.stats(),
+            'writer': self.writer.stats(),
+            'latency': self.latency.summary(),
+        }
+
+    def close(self):
+        self.writer.close()
+        self.readers.close()
+
+def parse_key(text):
+    """
+    Parses an "after" keyset value such as "2024-01-15,501" into a tuple.
+    """
+    values = []
+    for part in text.split(','):
+        try:
+            values.append(int(part))
+        except ValueError:
+            try:
+                values.append(float(part))
+            except ValueError:
+                values.append(part)
+    return tuple(values)
+
+def page_limit(query):
+    """
+    Returns the "limit" query parameter: the page size, at most MAX_PAGE_SIZE.
+    Raises ValueError unless it is a positive whole number.
+    """
+    text = query.get('limit', str(cli.PAGE_SIZE))
+    try:
+        limit = int(text)
+    except ValueError:
+        raise ValueError(f"invalid limit '{text}' (use a whole number from 1 to {MAX_PAGE_SIZE})")
+    if limit < 1:
+        raise ValueError(f"invalid limit {limit} (use a whole number from 1 to {MAX_PAGE_SIZE})")
+    return min(limit, MAX_PAGE_SIZE)
+
+def required(body, *names):
+    """
+    Returns the named fields of a request body, raising ValueError if one is missing.
+    """
+    missing = [name for name in names if name not in body]
+    if missing:
+        raise ValueError(f"missing field(s): {', '.join(missing)}")
+    return [body[name] for name in names]
+
+def order_search_filters(query):
+    """
+    Returns the order search filters given as query parameters of GET /orders.
+    """
+    filters = {}
+    for parameter, name in (('supplier', 'supplier_id'), ('product', 'product_id'), ('employee', 'employee_id')):
+        if parameter in query:
+            filters[name] = int(query[parameter])
+    for parameter, name in (('from', 'date_from'), ('to', 'date_to')):
+        if parameter in query:
+            datetime.strptime(query[parameter], "%Y-%m-%d")
+            filters[name] = query[parameter]
+    return filters
+
+class RequestHandler(BaseHTTPRequestHandler):
+    """
+    Maps HTTP requests onto BusinessService. Routes:
+
+        GET    /employees /products /suppliers /orders /sales-report   ?after=KEY&limit=N
+        GET    /orders         ?supplier=ID&product=ID&employee=ID&from=DATE&to=DATE
+        GET    /departments
+        GET    /stats
+        POST   /employees      {"name", "position", "salary", "dept"}
+        POST   /orders         {"supplier", "product", "quantity", "product_ordered", "employee", "date"?}
+        PUT    /inventory/ID   {"quantity"}
+        DELETE /orders/ID
+        DELETE /suppliers/ID   ?with_orders=1
+    """
+
+    service = None
+    protocol_version = "HTTP/1.1"
+
+    def log_message(self, format, *args):
+        # Request statistics are available from /stats instead.
+        pass
+
+    def handle_request(self, method):
+        url = urlparse(self.path)
+        query = {key: values[-1] for key, values in parse_qs(url.query).items()}
+        parts = [part for part in url.path.split('/') if part]
+        route = f"{method} /{parts[0] if parts else ''}" + ("/ID" if len(parts) > 1 else "")
+
+        self.service.begin_request()
+        start = time.perf_counter()
+        status = 500
+        try:
+            status, payload = self.dispatch(method, url.path, parts, query)
+        except ValueError as e:
+            status, payload = 400, {'status': 'error', 'error': str(e)}
+        except sqlite3.IntegrityError as e:
+            status, payload = 409, {'status': 'error', 'error': str(e)}
+        except Exception as e:
+            status, payload = 500, {'status': 'error', 'error': str(e)}
+        finally:
+            self.service.end_request(route, time.perf_counter() - start, status >= 400)
+        self.send_json(status, payload)
+
+    def dispatch(self, method, path, parts, query):
+        service = self.service
+        if method == 'GET':
+            if path in VIEW_PATHS:
+                limit = page_limit(query)
+                after = parse_key(query['after']) if 'after' in query else None
+                filters = order_search_filters(query) if path == '/orders' else None
+                return 200, service.read_page(VIEW_PATHS[path], after, limit, filters)
+            if path == '/departments':
+                return 200, service.read_departments()
+            if path == '/stats':
+                return 200, service.stats()
+        elif method == 'POST':
+            body = self.read_body()
+            if path == '/employees':
+                name, position, salary, dept = required(body, 'name', 'position', 'salary', 'dept')
+                return 201, service.write('add-employee', name=name, position=position,
+                                          salary=float(salary), dept=int(dept))
+            if path == '/orders':
+                supplier, product, quantity, product_ordered, employee = required(
+                    body, 'supplier', 'product', 'quantity', 'product_ordered', 'employee')
+                return 201, service.write('add-order', supplier=int(supplier), product=int(product),
+                                          quantity=int(quantity), product_ordered=product_ordered,
+                                          employee=int(employee), date=body.get('date'))
+        elif method == 'PUT':
+            if len(parts) == 2 and parts[0] == 'inventory':
+                quantity, = required(self.read_body(), 'quantity')
+                return 200, service.write('update-stock', product=int(parts[1]), quantity=int(quantity))
+        elif method == 'DELETE':
+            if len(parts) == 2 and parts[0] == 'orders':
+                return 200, service.write('delete-order', order=int(parts[1]))
+            if len(parts) == 2 and parts[0] == 'suppliers':
+                with_orders = query.get('with_orders', '0').lower() in ('1', 'true', 'yes')
+                return 200, service.write('delete-supplier', supplier=int(parts[1]), with_orders=with_orders,
+                                          dry_run=False)
+        return 404, {'status': 'error', 'error': f"no route for {method} {path}"}
+
+    def read_body(self):
+        length = int(self.headers.get('Content-Length') or 0)
+        if not length:
+            return {}
+        try:
+            body = json.loads(self.rfile.read(length))
+        except json.JSONDecodeError as e:
+            raise ValueError(f"invalid JSON body: {e}")
+        if not isinstance(body, dict):
+            raise ValueError("the request body must be a JSON object")
+        return body
+
+    def send_json(self, status, payload):
+        data = json.dumps(payload).encode()
+        self.send_response(status)
+        self.send_header('Content-Type', 'application/json')
+        self.send_header('Content-Length', str(len(data)))
+        self.end_headers()
+        self.wfile.write(data)
+
+    def do_GET(self):
+        self.handle_request('GET')
+
+    def do_POST(self):
+        self.handle_request('POST')
+
+    def do_PUT(self):
+        self.handle_request('PUT')
+
+    def do_DELETE(self):
+        self.handle_request('DELETE')
+
+class ServiceHTTPServer(ThreadingHTTPServer):
+    """
+    ThreadingHTTPServer with a listen backlog large enough for bursts of
+    concurrent clients (the default of 5 resets their connections).
+    """
+
+    request_queue_size = 128
+    daemon_threads = True
+
+def print_stats(stats):
+    """
+    Prints the service statistics in a readable form.
+    """
+    print(f"\nRequests served in {stats['uptime_seconds']}s (profile: {stats['profile']}):")
+    print(f"Max concurrent requests: {stats['concurrency']['max_concurrent_requests']}")
+    readers = stats['readers']
+    print(f"Reader pool: {readers['size']} connections, {readers['checkouts']} checkouts, "
+          f"avg wait {readers['avg_wait_ms']} ms")
+    writer = stats['writer']
+    print(f"Writer: {writer['operations']} operations in {writer['commits']} commits "
+          f"(avg batch {writer['avg_batch_size']}, max {writer['max_batch_size']}), {writer['failed']} failed")
+    print("{:<26} {:>8} {:>7} {:>10} {:>10} {:>10}".format("Route", "Count", "Errors", "p50 ms", "p95 ms", "p99 ms"))
+    print("-" * 76)
+    for route, values in sorted(stats['latency'].items()):
+        print("{:<26} {:>8} {:>7} {:>10} {:>10} {:>10}".format(
+            route, values['count'], values['errors'], values['p50_ms'], values['p95_ms'], values['p99_ms']))
+
+def main():
+    parser = argparse.ArgumentParser(description="Serve the business database over HTTP/JSON.")
+    parser.add_argument("--database", default="business.db", help="database file (default: business.db)")
+    parser.add_argument("--host", default="127.0.0.1", help="address to listen on (default: 127.0.0.1)")
+    parser.add_argument("--port", type=int, default=DEFAULT_PORT, help=f"port (default: {DEFAULT_PORT})")
+    parser.add_argument("--readers", type=int, default=DEFAULT_READERS,
+                        help=f"read-only connections in the pool (default: {DEFAULT_READERS})")
+    parser.add_argument("--profile", default="throughput",
+                        help="connection profile from db_profiles.py (default: throughput)")
+    parser.add_argument("--batch-window-ms", type=float, default=write_queue.DEFAULT_WINDOW_MS,
+                        help=f"how long writes are collected before a commit (default: {write_queue.DEFAULT_WINDOW_MS})")
+    parser.add_argument("--batch-size", type=int, default=write_queue.DEFAULT_BATCH_SIZE,
+                        help=f"most writes per commit (default: {write_queue.DEFAULT_BATCH_SIZE})")
+    args = parser.parse_args()
+
+    if not os.path.exists(args.database):
+        print(f"Error: {args.database} does not exist. Run setup_database.py first.")
+        return
+
+    try:
+        service = BusinessService(args.database, args.readers, args.profile,
+                                  args.batch_window_ms, args.batch_size)
+    except (sqlite3.Error, ValueError, RuntimeError) as e:
+        print(f"Error starting the service: {e}")
+        return
+
+    RequestHandler.service = service
+    server = ServiceHTTPServer((args.host, args.port), RequestHandler)
+    print(f"Serving {args.database} on http://{args.host}:{args.port} "
+          f"({args.readers} readers, 1 writer, group commit every {args.batch_window_ms} ms "
+          f"or {args.batch_size} writes). Press Ctrl+C to stop.")
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    server.server_close()
+    print_stats(service.stats())
+    service.close()
+
+if __name__ == "__main__":
+    main()
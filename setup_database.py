@@ -1,8 +1,12 @@
 # setup_database.py
 
+import argparse
 import sqlite3
 import os
 
+import db_profiles
+import migrations
+
 def execute_script(conn, script_path):
     """
     Executes a SQL script from the given file path.
@@ -20,20 +24,30 @@ def execute_script(conn, script_path):
         print(f"An error occurred while executing {script_path}: {e}")
 
 def main():
+    parser = argparse.ArgumentParser(description="Create business.db with the sample data.")
+    parser.add_argument("--template", action="store_true",
+                        help="copy the database from a prebuilt template (see provision_database.py) "
+                             "instead of running the SQL scripts")
+    args = parser.parse_args()
     database = "business.db"
 
+    if args.template:
+        import provision_database
+        if provision_database.provision(database, 'sample', force=True):
+            print("\nDatabase setup completed successfully.")
+        return
+
     # Remove existing database for a fresh setup
     if os.path.exists(database):
         os.remove(database)
         print(f"Existing database '{database}' removed for a fresh setup.")
 
-    # Connect to SQLite database
+    # Connect to SQLite database. The database is still empty, so the profile's
+    # one-time settings (page size, journal mode) are applied before any table exists.
     try:
-        conn = sqlite3.connect(database)
-        # Enable foreign key constraints
-        conn.execute("PRAGMA foreign_keys = 1")
-        print(f"Connected to SQLite database: {database}\n")
-    except sqlite3.Error as e:
+        conn, profile, _ = db_profiles.connect(database, allow_vacuum=True)
+        print(f"Connected to SQLite database: {database} (profile: {profile})\n")
+    except (sqlite3.Error, ValueError) as e:
         print(f"Error connecting to database: {e}")
         return
 
@@ -41,6 +55,9 @@ def main():
     execute_script(conn, "create_tables.sql")
     execute_script(conn, "insert_sample_data.sql")
 
+    # Bring the new database up to the latest schema version
+    migrations.migrate(conn)
+
     # Close the connection
     conn.close()
     print("\nDatabase setup completed successfully.")
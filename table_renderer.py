@@ -0,0 +1,245 @@
+# table_renderer.py
+
+import itertools
+import os
+import shlex
+import shutil
+import subprocess
+import sys
+import textwrap
+
+# Rows read ahead to size the columns. Later rows that are wider are cut to fit.
+SAMPLE_ROWS = 200
+
+# Widest a column gets; longer text is cut (or wrapped) at this width.
+MAX_COLUMN_WIDTH = 40
+
+# Narrowest a column is squeezed to when the table is wider than the terminal.
+MIN_COLUMN_WIDTH = 8
+
+# Characters collected before each write, so large tables are not written line by line.
+BUFFER_SIZE = 64 * 1024
+
+# Shown for NULL values in table mode.
+NULL_TEXT = "N/A"
+
+# Output modes, chosen with BUSINESS_DB_OUTPUT:
+#   table  aligned columns, long text cut at the column width (the default)
+#   wrap   aligned columns, long values wrapped onto extra lines
+#   raw    tab-separated values with a header line and nothing cut, for piping
+OUTPUT_MODES = ('table', 'wrap', 'raw')
+
+def output_mode():
+    """
+    Returns the output mode from BUSINESS_DB_OUTPUT, or 'table'.
+    """
+    mode = os.environ.get("BUSINESS_DB_OUTPUT", "table").strip().lower() or "table"
+    if mode not in OUTPUT_MODES:
+        print(f"Warning: ignoring BUSINESS_DB_OUTPUT={mode!r}; use one of {', '.join(OUTPUT_MODES)}.")
+        return "table"
+    return mode
+
+def pager_command():
+    """
+    Returns the pager to run as an argument list: $PAGER if set, else less or
+    more. Returns None if PAGER is set to an empty string.
+    """
+    pager = os.environ.get("PAGER")
+    if pager is not None:
+        return shlex.split(pager) or None
+    if shutil.which("less"):
+        # -F quits at once if the table fits one screen; -R and -X keep the
+        # output on screen after quitting.
+        return ["less", "-FRX"]
+    return ["more"]
+
+def cell_text(value, null_text=NULL_TEXT):
+    """
+    Returns the text shown for one value.
+    """
+    if value is None:
+        return null_text
+    return str(value)
+
+def is_number(value):
+    """
+    True for values shown right-aligned.
+    """
+    return isinstance(value, (int, float)) and not isinstance(value, bool)
+
+class TableRenderer:
+    """
+    Writes rows as an aligned text table. Column widths come from the
+    headers and the first SAMPLE_ROWS rows, and the whole table is written in
+    BUFFER_SIZE chunks instead of one write per line. Numeric columns are
+    right-aligned.
+    """
+
+    def __init__(self, headers, mode=None, max_width=MAX_COLUMN_WIDTH, sample_rows=SAMPLE_ROWS):
+        self.headers = [str(header) for header in headers]
+        self.mode = mode or output_mode()
+        self.max_width = max_width
+        self.sample_rows = sample_rows
+
+    def layout(self, sample, terminal_width=None):
+        """
+        Returns (widths, right-aligned flags) for the columns of a sample.
+        """
+        widths = [len(header) for header in self.headers]
+        numeric = [True] * len(self.headers)
+        seen = [False] * len(self.headers)
+        for row in sample:
+            for i, value in enumerate(row):
+                widths[i] = max(widths[i], len(cell_text(value)))
+                if value is not None:
+                    seen[i] = True
+                    numeric[i] = numeric[i] and is_number(value)
+        widths = [min(width, max(self.max_width, len(header)))
+                  for width, header in zip(widths, self.headers)]
+
+        # Squeeze the widest columns until the table fits the terminal.
+        if terminal_width:
+            while sum(widths) + len(widths) - 1 > terminal_width:
+                widest = max(range(len(widths)), key=widths.__getitem__)
+                if widths[widest] <= MIN_COLUMN_WIDTH:
+                    break
+                widths[widest] -= 1
+        return widths, [numeric[i] and seen[i] for i in range(len(widths))]
+
+    def format_row(self, row, widths, right):
+        """
+        Returns one table row as text, cutting or (in wrap mode) wrapping
+        text wider than its column, value by value.
+        """
+        cells = []
+        for value, width in zip(row, widths):
+            text = cell_text(value)
+            if len(text) <= width:
+                cells.append([text])
+            elif is_number(value):
+                cells.append([text])
+            elif self.mode == 'wrap':
+                cells.append(textwrap.wrap(text, width, break_long_words=True) or [""])
+            else:
+                cells.append([text[:width]])
+        lines = []
+        for line_number in range(max(len(cell) for cell in cells)):
+            parts = []
+            for cell, width, align_right in zip(cells, widths, right):
+                text = cell[line_number] if line_number < len(cell) else ""
+                parts.append(text.rjust(width) if align_right else text.ljust(width))
+            lines.append(" ".join(parts).rstrip() + "\n")
+        return "".join(lines)
+
+    def raw_line(self, row):
+        """
+        Returns one tab-separated line; tabs and newlines inside values become spaces.
+        """
+        return "\t".join(("" if value is None else str(value)).replace("\t", " ").replace("\n", " ")
+                         for value in row) + "\n"
+
+    def header(self, widths):
+        """
+        Returns the header line and the rule under it.
+        """
+        if self.mode == 'raw':
+            return "\t".join(self.headers) + "\n"
+        return self.format_row(self.headers, widths, [False] * len(widths)) + "-" * (sum(widths) + len(widths) - 1) + "\n"
+
+    def row_formatter(self, widths, right):
+        """
+        Returns a function that turns one row into its text.
+        """
+        if self.mode == 'raw':
+            return self.raw_line
+
+        # Rows are formatted with a single str.format call each. In table
+        # mode the template cuts text columns to their width (a precision
+        # such as {:<25.25}); numbers are never cut, a wider one just shifts
+        # the rest of its row. In wrap mode a row that comes out longer than
+        # the table has an overflowing value and is wrapped value by value.
+        specs = []
+        for width, align_right in zip(widths, right):
+            if align_right:
+                specs.append(f"{{:>{width}}}")
+            elif self.mode == 'wrap':
+                specs.append(f"{{:<{width}}}")
+            else:
+                specs.append(f"{{:<{width}.{width}}}")
+        template = " ".join(specs)
+        table_width = sum(widths) + len(widths) - 1
+
+        def format_fast(row):
+            try:
+                line = template.format(*[NULL_TEXT if value is None else value for value in row])
+            except (ValueError, TypeError):
+                # A number (or blob) in a text column, which takes no precision.
+                return self.format_row(row, widths, right)
+            if self.mode == 'wrap' and len(line) > table_width:
+                return self.format_row(row, widths, right)
+            # Like format_row, no padding is left at the end of the line.
+            return line.rstrip() + "\n"
+        return format_fast
+
+    def render(self, rows, title=None, stream=None, pager=True):
+        """
+        Writes a table of rows (any iterable, read once) to stream, by
+        default standard output through the pager when it is a terminal and
+        the table is longer than the screen. Returns the number of rows
+        written; nothing at all is written when there are none.
+        """
+        rows = iter(rows)
+        sample = list(itertools.islice(rows, self.sample_rows))
+        if not sample:
+            return 0
+
+        interactive = stream is None and sys.stdout.isatty()
+        stream = stream or sys.stdout
+        terminal = shutil.get_terminal_size() if interactive else None
+        fits_screen = terminal and len(sample) < self.sample_rows and len(sample) + 4 <= terminal.lines
+        process = None
+        if pager and interactive and self.mode != 'raw' and not fits_screen:
+            command = pager_command()
+            if command:
+                try:
+                    sys.stdout.flush()
+                    process = subprocess.Popen(command, stdin=subprocess.PIPE, text=True)
+                    stream = process.stdin
+                except OSError:
+                    process = None
+
+        widths, right = self.layout(sample, terminal.columns if terminal else None)
+        format_row = self.row_formatter(widths, right)
+        count = 0
+        buffer = [title + "\n"] if title and self.mode != 'raw' else []
+        buffer.append(self.header(widths))
+        size = 0
+        try:
+            for row in itertools.chain(sample, rows):
+                text = format_row(row)
+                buffer.append(text)
+                size += len(text)
+                count += 1
+                if size >= BUFFER_SIZE:
+                    stream.write("".join(buffer))
+                    buffer.clear()
+                    size = 0
+            stream.write("".join(buffer))
+            stream.flush()
+        except BrokenPipeError:
+            # The pager was quit before the end of the table.
+            pass
+        finally:
+            if process:
+                try:
+                    process.stdin.close()
+                except BrokenPipeError:
+                    pass
+                process.wait()
+        return count
+
+def render(headers, rows, title=None, stream=None, pager=True, mode=None):
+    """
+    Writes rows as a table with the given headers (see TableRenderer.render).
+    """
+    return TableRenderer(headers, mode).render(rows, title, stream, pager)
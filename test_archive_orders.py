@@ -0,0 +1,61 @@
+# test_archive_orders.py
+
+import sqlite3
+import unittest
+
+import analytics
+import archive_orders
+from test_helpers import SampleDatabase
+
+ROLLUP = "SELECT * FROM OrderRollup WHERE order_count != 0 ORDER BY 1, 2, 3, 4"
+
+class ArchiveOrdersTest(unittest.TestCase):
+    """
+    Moving orders into the archive database with archive_orders.archive_orders.
+    """
+
+    def setUp(self):
+        self.sample = SampleDatabase()
+        self.conn = self.sample.connect()
+        archive_orders.attach_archive(self.conn, self.sample.path("business_archive.db"), create=True)
+
+    def tearDown(self):
+        self.conn.close()
+        self.sample.remove()
+
+    def orders(self, database):
+        return self.conn.execute(f"SELECT * FROM {database}.Orders ORDER BY order_id").fetchall()
+
+    def test_orders_move_to_the_archive(self):
+        live = self.orders("main")
+        moved = archive_orders.archive_orders(self.conn, "2024-03-01", chunk_size=1, verbose=False)
+        self.assertEqual(moved, 2)
+        self.assertEqual(self.orders("archive"), live[:2])
+        self.assertEqual(self.orders("main"), live[2:])
+
+    def test_rollup_keeps_archived_orders(self):
+        before = self.conn.execute(ROLLUP).fetchall()
+        archive_orders.archive_orders(self.conn, "2100-01-01", chunk_size=2, verbose=False)
+        self.assertEqual(self.orders("main"), [])
+        self.assertEqual(self.conn.execute(ROLLUP).fetchall(), before)
+        self.assertEqual(analytics.verify_rollup(self.conn), [])
+
+    def test_identical_rows_left_by_an_interrupted_run_are_skipped(self):
+        live = self.orders("main")
+        self.conn.execute("INSERT INTO archive.Orders SELECT * FROM main.Orders WHERE order_id = 501")
+        self.conn.commit()
+        self.assertEqual(archive_orders.archive_orders(self.conn, "2100-01-01", verbose=False), 3)
+        self.assertEqual(self.orders("archive"), live)
+
+    def test_reused_order_id_is_not_overwritten(self):
+        self.conn.execute("INSERT INTO archive.Orders SELECT order_id, order_date, supplier_id, product_id, "
+                          "order_quantity + 1, product_ordered, supplied_by FROM main.Orders WHERE order_id = 501")
+        self.conn.commit()
+        archived = self.orders("archive")
+        with self.assertRaisesRegex(sqlite3.IntegrityError, "order 501"):
+            archive_orders.archive_orders(self.conn, "2100-01-01", verbose=False)
+        self.assertEqual(self.orders("archive"), archived)
+        self.assertEqual(len(self.orders("main")), 3)
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,72 @@
+# test_bulk_import.py
+
+import json
+import unittest
+
+import bulk_import
+from test_helpers import SampleDatabase
+
+class ImportFilesTest(unittest.TestCase):
+    """
+    Reading CSV, JSONL and JSON files into a table with bulk_import.import_files.
+    """
+
+    def setUp(self):
+        self.sample = SampleDatabase()
+        self.conn = self.sample.connect()
+
+    def tearDown(self):
+        self.conn.close()
+        self.sample.remove()
+
+    def write(self, name, text):
+        path = self.sample.path(name)
+        with open(path, 'w') as file:
+            file.write(text)
+        return path
+
+    def suppliers(self):
+        return self.conn.execute(
+            "SELECT supplier_id, supplier_name, contact_number FROM Supplier WHERE supplier_id >= 900 "
+            "ORDER BY supplier_id").fetchall()
+
+    def test_csv(self):
+        path = self.write("s.csv", "supplier_id,supplier_name,contact_number\n900,A,\n901,B,555\n")
+        self.assertEqual(bulk_import.import_files(self.conn, 'Supplier', [path]), 2)
+        self.assertEqual(self.suppliers(), [(900, 'A', None), (901, 'B', '555')])
+
+    def test_csv_row_longer_than_header(self):
+        path = self.write("s.csv", "supplier_id,supplier_name\n900,A,extra\n")
+        self.assertEqual(bulk_import.import_files(self.conn, 'Supplier', [path]), 0)
+        self.assertEqual(self.suppliers(), [])
+        with self.assertRaisesRegex(ValueError, "record 1 has more fields than the header"):
+            _, rows = bulk_import.records_to_rows('Supplier', bulk_import.read_csv(path))
+            list(rows)
+
+    def test_jsonl_keys_beyond_the_first_record(self):
+        path = self.write("s.jsonl", '{"supplier_id": 900, "supplier_name": "A"}\n\n'
+                                     '{"supplier_id": 901, "supplier_name": "B", "contact_number": "555"}\n')
+        self.assertEqual(bulk_import.import_files(self.conn, 'Supplier', [path]), 2)
+        self.assertEqual(self.suppliers(), [(900, 'A', None), (901, 'B', '555')])
+
+    def test_json_array(self):
+        path = self.write("s.json", json.dumps([{"supplier_id": 900, "supplier_name": "A"},
+                                                {"supplier_id": 901, "supplier_name": "B"}], indent=2))
+        self.assertEqual(bulk_import.import_files(self.conn, 'Supplier', [path]), 2)
+        self.assertEqual([row[0] for row in self.suppliers()], [900, 901])
+
+    def test_unknown_key_stops_the_import(self):
+        path = self.write("s.jsonl", '{"supplier_id": 900, "supplier_name": "A"}\n'
+                                     '{"supplier_id": 901, "supplier_name": "B", "fax": "1"}\n')
+        with self.assertRaisesRegex(ValueError, "record 2: unknown column.*fax"):
+            _, rows = bulk_import.records_to_rows('Supplier', bulk_import.read_jsonl(path))
+            list(rows)
+        self.assertEqual(bulk_import.import_files(self.conn, 'Supplier', [path]), 0)
+
+    def test_json_must_hold_an_array(self):
+        path = self.write("s.json", '{"supplier_id": 900}')
+        with self.assertRaisesRegex(ValueError, "array of objects"):
+            list(bulk_import.read_json(path))
+
+if __name__ == "__main__":
+    unittest.main()
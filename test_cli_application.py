@@ -0,0 +1,57 @@
+# test_cli_application.py
+
+import unittest
+
+import cli_application as cli
+from test_helpers import SampleDatabase
+
+class FetchPageTest(unittest.TestCase):
+    """
+    Keyset paging through the orders view with cli_application.fetch_page.
+    """
+
+    def setUp(self):
+        self.sample = SampleDatabase()
+        self.conn = self.sample.connect()
+        # Several orders per date, so pages also split between equal dates.
+        self.conn.executemany(
+            "INSERT INTO Orders (order_id, order_date, supplier_id, product_id, order_quantity, "
+            "product_ordered, supplied_by) VALUES (?, ?, 401, 201, 1, 'Laptop', 101)",
+            [(600 + n, f"2024-04-0{n % 3 + 1}") for n in range(10)])
+        self.conn.commit()
+        self.expected = [row[0] for row in self.conn.execute(
+            "SELECT order_id FROM Orders ORDER BY order_date DESC, order_id DESC")]
+
+    def tearDown(self):
+        self.conn.close()
+        self.sample.remove()
+
+    def forward_pages(self, page_size):
+        pages = []
+        boundary = None
+        while True:
+            rows = cli.fetch_page(self.conn, 'orders', boundary, page_size=page_size)
+            if not rows:
+                return pages
+            pages.append(rows)
+            boundary = cli.page_key('orders', rows[-1])
+
+    def test_forward_pages_cover_every_order_once(self):
+        pages = self.forward_pages(4)
+        self.assertEqual([row[0] for rows in pages for row in rows], self.expected)
+        self.assertTrue(all(len(rows) == 4 for rows in pages[:-1]))
+
+    def test_backward_page_matches_forward_page(self):
+        pages = self.forward_pages(4)
+        for previous, current in zip(pages, pages[1:]):
+            rows = cli.fetch_page(self.conn, 'orders', cli.page_key('orders', current[0]),
+                                  backward=True, page_size=4)
+            self.assertEqual(rows, previous)
+
+    def test_conditions_narrow_the_pages(self):
+        rows = cli.fetch_page(self.conn, 'orders', conditions=["o.order_date = ?"],
+                              params=["2024-04-01"], page_size=100)
+        self.assertEqual([row[0] for row in rows], [609, 606, 603, 600])
+
+if __name__ == "__main__":
+    unittest.main()
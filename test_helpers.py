@@ -0,0 +1,41 @@
+# test_helpers.py
+
+import os
+import shutil
+import sqlite3
+import tempfile
+
+import migrations
+
+SCRIPT_DIR = os.path.dirname(os.path.abspath(__file__))
+
+class SampleDatabase:
+    """
+    A migrated copy of the sample database in a temporary directory, for
+    use in setUp/tearDown: database is its path, directory the folder.
+    """
+
+    def __init__(self):
+        self.directory = tempfile.mkdtemp()
+        self.database = os.path.join(self.directory, "business.db")
+        conn = sqlite3.connect(self.database)
+        for script in ("create_tables.sql", "insert_sample_data.sql"):
+            with open(os.path.join(SCRIPT_DIR, script)) as file:
+                conn.executescript(file.read())
+        migrations.migrate(conn, verbose=False)
+        conn.close()
+
+    def connect(self, **kwargs):
+        """
+        Returns a new connection to the database.
+        """
+        return sqlite3.connect(self.database, **kwargs)
+
+    def path(self, name):
+        """
+        Returns the path of another file in the temporary directory.
+        """
+        return os.path.join(self.directory, name)
+
+    def remove(self):
+        shutil.rmtree(self.directory)
@@ -0,0 +1,82 @@
+# test_migrations.py
+
+import contextlib
+import io
+import sqlite3
+import unittest
+from unittest import mock
+
+import analytics
+import migrations
+from test_helpers import SampleDatabase
+
+class SampleTestCase(unittest.TestCase):
+    """
+    Opens a fresh migrated sample database for each test.
+    """
+
+    def setUp(self):
+        self.sample = SampleDatabase()
+        self.conn = self.sample.connect()
+
+    def tearDown(self):
+        self.conn.close()
+        self.sample.remove()
+
+class MigrateTest(SampleTestCase):
+    """
+    Bringing a database up to date with migrations.migrate.
+    """
+
+    def migrate_quietly(self):
+        with contextlib.redirect_stdout(io.StringIO()) as output:
+            result = migrations.migrate(self.conn, verbose=False)
+        return result, output.getvalue()
+
+    def test_database_reaches_latest_version(self):
+        self.assertEqual(migrations.get_schema_version(self.conn), migrations.LATEST_VERSION)
+
+    def test_migrate_again_changes_nothing(self):
+        changes = self.conn.total_changes
+        self.assertEqual(self.migrate_quietly(), (True, ""))
+        self.assertEqual(self.conn.total_changes, changes)
+
+    def test_failed_migration_is_rolled_back(self):
+        version = migrations.LATEST_VERSION + 1
+        broken = migrations.MIGRATIONS + [
+            (version, "broken", ["CREATE TABLE Extra (value)", "SELECT * FROM MissingTable"])]
+        with mock.patch.object(migrations, "MIGRATIONS", broken), \
+             mock.patch.object(migrations, "LATEST_VERSION", version):
+            result, output = self.migrate_quietly()
+        self.assertFalse(result)
+        self.assertIn("migration", output)
+        self.assertEqual(migrations.get_schema_version(self.conn), version - 1)
+        self.assertIsNone(self.conn.execute(
+            "SELECT 1 FROM sqlite_master WHERE name = 'Extra'").fetchone())
+
+    def test_newer_database_is_refused(self):
+        self.conn.execute(f"PRAGMA user_version = {migrations.LATEST_VERSION + 1}")
+        result, output = self.migrate_quietly()
+        self.assertFalse(result)
+        self.assertIn("newer", output)
+
+class RollupTriggersTest(SampleTestCase):
+    """
+    The OrderRollup triggers added by the migrations, checked against a
+    full recomputation after each kind of write.
+    """
+
+    def test_rollup_follows_writes(self):
+        self.assertEqual(analytics.verify_rollup(self.conn), [])
+        self.conn.execute(
+            "INSERT INTO Orders (order_id, order_date, supplier_id, product_id, order_quantity, "
+            "product_ordered, supplied_by) VALUES (504, '2024-04-02', 402, 201, 7, 'Laptop', 101)")
+        self.assertEqual(analytics.verify_rollup(self.conn), [])
+        self.conn.execute("UPDATE Orders SET order_date = '2023-12-31', order_quantity = 3, "
+                          "supplier_id = 401 WHERE order_id = 502")
+        self.assertEqual(analytics.verify_rollup(self.conn), [])
+        self.conn.execute("DELETE FROM Orders WHERE order_id = 501")
+        self.assertEqual(analytics.verify_rollup(self.conn), [])
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,52 @@
+# test_purge_orders.py
+
+import sqlite3
+import unittest
+
+import purge_orders
+from test_helpers import SampleDatabase
+
+class PurgeOrdersTest(unittest.TestCase):
+    """
+    Deleting orders chunk by chunk with purge_orders.purge_orders.
+    """
+
+    def setUp(self):
+        self.sample = SampleDatabase()
+        self.conn = self.sample.connect()
+
+    def tearDown(self):
+        self.conn.close()
+        self.sample.remove()
+
+    def count(self, sql, params=()):
+        return self.conn.execute(sql, params).fetchone()[0]
+
+    def test_chunks_delete_every_matching_order(self):
+        total = self.count("SELECT COUNT(*) FROM Orders")
+        matching = purge_orders.count_orders(self.conn, "supplier_id = ?", (401,))
+        deleted, _ = purge_orders.purge_orders(self.conn, "supplier_id = ?", (401,), chunk_size=1, pause_ms=0)
+        self.assertEqual(deleted, matching)
+        self.assertEqual(self.count("SELECT COUNT(*) FROM Orders WHERE supplier_id = 401"), 0)
+        self.assertEqual(self.count("SELECT COUNT(*) FROM Orders"), total - matching)
+
+    def test_supplier_goes_with_the_last_chunk(self):
+        deleted, suppliers = purge_orders.delete_supplier(self.conn, 401, chunk_size=1, pause_ms=0)
+        self.assertEqual((deleted, suppliers), (2, 1))
+        self.assertEqual(self.count("SELECT COUNT(*) FROM Supplier WHERE supplier_id = 401"), 0)
+
+    def test_open_transaction_is_not_committed(self):
+        self.conn.execute("UPDATE Supplier SET supplier_name = 'Changed' WHERE supplier_id = 402")
+        with self.assertRaises(sqlite3.ProgrammingError):
+            purge_orders.purge_orders(self.conn, "supplier_id = ?", (401,), pause_ms=0)
+        self.conn.rollback()
+        self.assertNotEqual(self.count("SELECT COUNT(*) FROM Orders WHERE supplier_id = 401"), 0)
+        self.assertEqual(self.count("SELECT COUNT(*) FROM Supplier WHERE supplier_name = 'Changed'"), 0)
+
+    def test_empty_filter_is_refused(self):
+        with self.assertRaises(ValueError):
+            purge_orders.order_condition()
+        self.assertEqual(purge_orders.order_condition(allow_all=True), ("1", []))
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,44 @@
+# test_queries.py
+
+import unittest
+
+import queries
+from test_helpers import SampleDatabase
+
+class WarmUpTest(unittest.TestCase):
+    """
+    The startup check and statement preparation in queries.warm_up.
+    """
+
+    def setUp(self):
+        self.sample = SampleDatabase()
+        self.conn = self.sample.connect()
+
+    def tearDown(self):
+        self.conn.close()
+        self.sample.remove()
+
+    def test_warm_up_writes_nothing(self):
+        changes = self.conn.total_changes
+        self.assertTrue(queries.warm_up(self.conn, verbose=False))
+        self.assertEqual(self.conn.total_changes, changes)
+        self.assertFalse(self.conn.in_transaction)
+
+    def test_warm_up_while_another_connection_writes(self):
+        writer = self.sample.connect(isolation_level=None)
+        writer.execute("PRAGMA journal_mode = WAL")
+        writer.execute("BEGIN IMMEDIATE")
+        try:
+            self.conn.execute("PRAGMA busy_timeout = 100")
+            self.assertTrue(queries.warm_up(self.conn, verbose=False))
+        finally:
+            writer.execute("ROLLBACK")
+            writer.close()
+
+    def test_schema_drift_is_reported(self):
+        self.conn.execute("ALTER TABLE Supplier RENAME COLUMN contact_number TO phone")
+        problems = dict(queries.check_queries(self.conn))
+        self.assertIn('suppliers', problems)
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,54 @@
+# test_report_cache.py
+
+import unittest
+
+import report_cache
+from test_helpers import SampleDatabase
+
+class ReportCacheTest(unittest.TestCase):
+    """
+    Serving and dropping cached results with report_cache.ReportCache.
+    """
+
+    def setUp(self):
+        self.sample = SampleDatabase()
+        self.conn = self.sample.connect()
+        self.cache = report_cache.ReportCache(self.conn, max_bytes=1024 * 1024)
+
+    def tearDown(self):
+        self.conn.close()
+        self.sample.remove()
+
+    def orders(self):
+        return list(self.cache.rows('orders'))
+
+    def test_repeated_report_is_served_from_cache(self):
+        first = self.orders()
+        self.assertEqual(self.orders(), first)
+        self.assertEqual((self.cache.misses, self.cache.hits), (1, 1))
+
+    def test_own_write_drops_the_cache(self):
+        before = self.orders()
+        self.conn.execute("DELETE FROM Orders WHERE order_id = 501")
+        self.conn.commit()
+        self.assertEqual(len(self.orders()), len(before) - 1)
+        self.assertEqual(self.cache.hits, 0)
+
+    def test_other_connection_write_drops_the_cache(self):
+        before = self.orders()
+        other = self.sample.connect()
+        other.execute("DELETE FROM Orders WHERE order_id = 501")
+        other.commit()
+        other.close()
+        self.assertEqual(len(self.orders()), len(before) - 1)
+        self.assertEqual(self.cache.hits, 0)
+
+    def test_nothing_is_cached_inside_a_transaction(self):
+        self.conn.execute("UPDATE Orders SET order_quantity = 1 WHERE order_id = 501")
+        self.orders()
+        self.conn.rollback()
+        self.orders()
+        self.assertEqual(self.cache.hits, 0)
+
+if __name__ == "__main__":
+    unittest.main()
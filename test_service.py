@@ -0,0 +1,85 @@
+# test_service.py
+
+import http.client
+import json
+import threading
+import unittest
+
+import service
+from test_helpers import SampleDatabase
+
+class ServiceTestCase(unittest.TestCase):
+    """
+    Runs the HTTP service on a fresh sample database for each test.
+    """
+
+    def setUp(self):
+        self.sample = SampleDatabase()
+        self.service = service.BusinessService(self.sample.database, readers=1, window_ms=0)
+        service.RequestHandler.service = self.service
+        self.server = service.ServiceHTTPServer(("127.0.0.1", 0), service.RequestHandler)
+        threading.Thread(target=self.server.serve_forever, daemon=True).start()
+
+    def tearDown(self):
+        self.server.shutdown()
+        self.server.server_close()
+        self.service.close()
+        self.sample.remove()
+
+    def request(self, method, path):
+        client = http.client.HTTPConnection(*self.server.server_address)
+        try:
+            client.request(method, path)
+            response = client.getresponse()
+            return response.status, json.loads(response.read())
+        finally:
+            client.close()
+
+class DeleteSupplierTest(ServiceTestCase):
+    """
+    DELETE /suppliers/ID.
+    """
+
+    def test_delete_supplier_with_orders(self):
+        status, body = self.request("DELETE", "/suppliers/401")
+        self.assertEqual(status, 400, body)
+        self.assertIn("order(s)", body['error'])
+
+        status, body = self.request("DELETE", "/suppliers/401?with_orders=1")
+        self.assertEqual(status, 200, body)
+        self.assertEqual(body['rowcount'], 3)
+
+        conn = self.sample.connect()
+        self.assertIsNone(conn.execute("SELECT 1 FROM Supplier WHERE supplier_id = 401").fetchone())
+        self.assertEqual(conn.execute("SELECT COUNT(*) FROM Orders WHERE supplier_id = 401").fetchone()[0], 0)
+        conn.close()
+
+    def test_delete_missing_supplier(self):
+        status, body = self.request("DELETE", "/suppliers/999")
+        self.assertEqual(status, 400, body)
+
+class ReadPageTest(ServiceTestCase):
+    """
+    GET on the paged views, with keyset paging through "after" and "limit".
+    """
+
+    def test_pages_follow_each_other(self):
+        status, first = self.request("GET", "/orders?limit=2")
+        self.assertEqual(status, 200, first)
+        self.assertEqual([row['order_id'] for row in first['rows']], [503, 502])
+        after = ",".join(map(str, first['next']))
+        status, second = self.request("GET", f"/orders?limit=2&after={after}")
+        self.assertEqual([row['order_id'] for row in second['rows']], [501])
+        self.assertIsNone(second['next'])
+
+    def test_invalid_limits(self):
+        for limit in ("0", "-1", "ten"):
+            status, body = self.request("GET", f"/orders?limit={limit}")
+            self.assertEqual(status, 400, (limit, body))
+            self.assertIn("invalid limit", body['error'])
+
+    def test_limit_is_capped(self):
+        self.assertEqual(service.page_limit({'limit': '1000000'}), service.MAX_PAGE_SIZE)
+
+if __name__ == "__main__":
+    unittest.main()
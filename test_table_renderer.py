@@ -0,0 +1,26 @@
+# test_table_renderer.py
+
+import unittest
+
+from table_renderer import TableRenderer
+
+ROWS = [(1, "Laptop", None), (22, "Office Chair", "x"), (3, "A much longer product name", 4.5)]
+
+class RowFormatterTest(unittest.TestCase):
+    """
+    The single-format fast path of TableRenderer.row_formatter, checked
+    against format_row.
+    """
+
+    def test_fast_path_matches_format_row(self):
+        for mode in ("table", "wrap"):
+            renderer = TableRenderer(("ID", "Name", "Note"), mode=mode, max_width=12)
+            widths, right = renderer.layout(ROWS, terminal_width=80)
+            format_fast = renderer.row_formatter(widths, right)
+            for row in ROWS:
+                line = format_fast(row)
+                self.assertEqual(line, renderer.format_row(row, widths, right), (mode, row))
+                self.assertFalse(line.endswith(" \n"), (mode, row))
+
+if __name__ == "__main__":
+    unittest.main()
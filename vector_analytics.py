@@ -0,0 +1,305 @@
+# vector_analytics.py
+
+import argparse
+import os
+import sqlite3
+import sys
+import time
+
+import table_renderer
+
+# numpy is optional: without it this module cannot be used, and the rest of
+# the application works as before.
+try:
+    import numpy
+except ImportError:
+    numpy = None
+
+# Sales rows read per fetch when loading.
+BATCH_SIZE = 50_000
+
+PRODUCTS_SQL = '''
+    SELECT p.product_id, p.product_name, p.product_price, COALESCE(p.product_dept, 0),
+           COALESCE(i.quantity_in_stock, 0)
+    FROM Product p
+    LEFT JOIN Inventory i ON i.product_id = p.product_id
+    '''
+
+# The same reports in plain SQL, for the benchmark and as a check.
+# Parameter: the number of top rows.
+SQL_EQUIVALENTS = {
+    'revenue': '''
+    SELECT p.product_id, ROUND(p.product_price * SUM(s.quantity_sold), 2) AS revenue
+    FROM Sales s JOIN Product p ON p.product_id = s.product_id
+    GROUP BY p.product_id
+    HAVING SUM(s.quantity_sold) > 0
+    ORDER BY p.product_price * SUM(s.quantity_sold) DESC, p.product_id
+    LIMIT ?
+    ''',
+    'department-revenue': '''
+    SELECT COALESCE(p.product_dept, 0), ROUND(SUM(p.product_price * s.quantity_sold), 2) AS revenue
+    FROM Sales s JOIN Product p ON p.product_id = s.product_id
+    GROUP BY 1
+    HAVING SUM(s.quantity_sold) > 0
+    ORDER BY SUM(p.product_price * s.quantity_sold) DESC, 1
+    LIMIT ?
+    ''',
+    'valuation': '''
+    SELECT p.product_id, ROUND(p.product_price * i.quantity_in_stock, 2) AS value
+    FROM Product p JOIN Inventory i ON i.product_id = p.product_id
+    WHERE i.quantity_in_stock > 0
+    ORDER BY p.product_price * i.quantity_in_stock DESC, p.product_id
+    LIMIT ?
+    ''',
+    'sell-through': '''
+    SELECT p.product_id, ROUND(100.0 * sold / (sold + stock), 2) AS rate
+    FROM (SELECT p.product_id, COALESCE(SUM(s.quantity_sold), 0) AS sold,
+                 COALESCE((SELECT i.quantity_in_stock FROM Inventory i WHERE i.product_id = p.product_id), 0) AS stock
+          FROM Product p LEFT JOIN Sales s ON s.product_id = p.product_id
+          GROUP BY p.product_id) p
+    WHERE sold + stock > 0
+    ORDER BY 1.0 * sold / (sold + stock) DESC, p.product_id
+    LIMIT ?
+    ''',
+}
+
+HEADERS = {
+    'revenue': ("Product ID", "Product Name", "Department", "Sold", "Price", "Revenue", "Share %"),
+    'department-revenue': ("Dept ID", "Department Name", "Sold", "Revenue", "Share %"),
+    'valuation': ("Product ID", "Product Name", "Department", "In Stock", "Price", "Stock Value", "Share %"),
+    'sell-through': ("Product ID", "Product Name", "Sold", "In Stock", "Sell-Through %"),
+}
+
+def top_indexes(values, top=None, mask=None):
+    """
+    Returns the indexes of the largest values, largest first; equal values
+    keep index order. mask, if given, limits the choice to where it is True.
+    """
+    candidates = numpy.flatnonzero(mask) if mask is not None else numpy.arange(len(values))
+    order = candidates[numpy.argsort(-values[candidates], kind='stable')]
+    return order if top is None else order[:top]
+
+class SalesAnalytics:
+    """
+    Revenue, stock value and sell-through computed with numpy from arrays
+    indexed by product_id: price, department and stock (reloaded on every
+    refresh; there is one row per product) and units sold (kept up to date
+    from the Sales rows added since the last refresh).
+
+    Sales is only ever read beyond the last rowid seen. After each refresh
+    the per-product totals are compared with SalesSummary, which triggers
+    keep exact, and a deleted or edited sale (which new rowids do not show)
+    makes the next refresh reload everything.
+    """
+
+    def __init__(self, conn):
+        if numpy is None:
+            raise RuntimeError("vector_analytics needs numpy (pip install numpy)")
+        self.conn = conn
+        self.last_rowid = 0
+        self.sold = numpy.zeros(0, dtype=numpy.int64)
+        self.reloads = 0
+        self.state = None
+
+    def _load_products(self):
+        rows = self.conn.execute(PRODUCTS_SQL).fetchall()
+        size = max((row[0] for row in rows), default=-1) + 1
+        ids = numpy.fromiter((row[0] for row in rows), dtype=numpy.int64, count=len(rows))
+        self.exists = numpy.zeros(size, dtype=bool)
+        self.exists[ids] = True
+        self.price = numpy.zeros(size, dtype=numpy.float64)
+        self.price[ids] = numpy.fromiter((row[2] for row in rows), dtype=numpy.float64, count=len(rows))
+        self.dept = numpy.zeros(size, dtype=numpy.int64)
+        self.dept[ids] = numpy.fromiter((row[3] for row in rows), dtype=numpy.int64, count=len(rows))
+        self.stock = numpy.zeros(size, dtype=numpy.int64)
+        self.stock[ids] = numpy.fromiter((row[4] for row in rows), dtype=numpy.int64, count=len(rows))
+        self.names = {row[0]: row[1] for row in rows}
+        self.dept_names = dict(self.conn.execute("SELECT dept_id, dept_name FROM Department"))
+
+    def _load_sales(self):
+        cur = self.conn.execute(
+            "SELECT rowid, product_id, quantity_sold FROM Sales WHERE rowid > ? AND product_id IS NOT NULL "
+            "ORDER BY rowid", (self.last_rowid,))
+        loaded = 0
+        while True:
+            batch = cur.fetchmany(BATCH_SIZE)
+            if not batch:
+                break
+            columns = numpy.array(batch, dtype=numpy.int64)
+            totals = numpy.bincount(columns[:, 1], weights=columns[:, 2], minlength=len(self.sold))
+            if len(totals) > len(self.sold):
+                self.sold = numpy.concatenate([self.sold, numpy.zeros(len(totals) - len(self.sold), dtype=numpy.int64)])
+            self.sold += totals.astype(numpy.int64)
+            self.last_rowid = int(columns[-1, 0])
+            loaded += len(batch)
+        # Rows with no product are skipped above but must not be read again.
+        self.last_rowid = max(self.last_rowid, self.conn.execute(
+            "SELECT COALESCE(MAX(rowid), 0) FROM Sales").fetchone()[0])
+        return loaded
+
+    def _matches_summary(self):
+        rows = self.conn.execute("SELECT product_id, total_quantity_sold FROM SalesSummary").fetchall()
+        expected = numpy.zeros(len(self.sold), dtype=numpy.int64)
+        if rows:
+            summary = numpy.array(rows, dtype=numpy.int64)
+            if summary[:, 0].max() >= len(expected):
+                return False
+            expected[summary[:, 0]] = summary[:, 1]
+        return numpy.array_equal(expected, self.sold)
+
+    def refresh(self):
+        """
+        Brings the arrays up to date with the database, reading only the
+        Sales rows added since the last refresh (all of them on the first
+        one, or after a sale was deleted or changed). Nothing is read when
+        neither this nor another connection has written since the last
+        refresh. Returns the number of Sales rows read.
+        """
+        if self.conn.in_transaction:
+            self.conn.commit()
+        # data_version changes with commits of other connections,
+        # total_changes with writes of this one.
+        state = (self.conn.execute("PRAGMA data_version").fetchone()[0], self.conn.total_changes)
+        if state == self.state:
+            return 0
+        # One read transaction, so Sales, SalesSummary and the products are
+        # all seen at the same moment.
+        self.conn.execute("BEGIN")
+        try:
+            self._load_products()
+            loaded = self._load_sales()
+            if not self._matches_summary():
+                self.last_rowid = 0
+                self.sold = numpy.zeros(0, dtype=numpy.int64)
+                self.reloads += 1
+                loaded = self._load_sales()
+        finally:
+            self.conn.rollback()
+        self.state = state
+        if len(self.sold) < len(self.price):
+            self.sold = numpy.concatenate([self.sold, numpy.zeros(len(self.price) - len(self.sold), dtype=numpy.int64)])
+        return loaded
+
+    def _sold(self):
+        # Sales of products that no longer exist are left out, as in the SQL.
+        return self.sold[:len(self.price)]
+
+    def revenue(self):
+        """
+        Returns the revenue per product_id at the current prices.
+        """
+        return self.price * self._sold()
+
+    def revenue_by_product(self, top=None):
+        revenue = self.revenue()
+        total = revenue.sum()
+        sold = self._sold()
+        return [(int(i), self.names[i], self.dept_names.get(int(self.dept[i]), "(none)"), int(sold[i]),
+                 float(self.price[i]), round(float(revenue[i]), 2),
+                 round(100.0 * float(revenue[i] / total), 2) if total else 0.0)
+                for i in top_indexes(revenue, top, self.exists & (sold > 0))]
+
+    def revenue_by_department(self, top=None):
+        revenue = numpy.bincount(self.dept, weights=self.revenue())
+        sold = numpy.bincount(self.dept, weights=self._sold())
+        total = revenue.sum()
+        return [(int(d), self.dept_names.get(int(d), "(none)"), int(sold[d]), round(float(revenue[d]), 2),
+                 round(100.0 * float(revenue[d] / total), 1) if total else 0.0)
+                for d in top_indexes(revenue, top, sold > 0)]
+
+    def stock_valuation(self, top=None):
+        value = self.price * self.stock
+        total = value.sum()
+        return [(int(i), self.names[i], self.dept_names.get(int(self.dept[i]), "(none)"), int(self.stock[i]),
+                 float(self.price[i]), round(float(value[i]), 2),
+                 round(100.0 * float(value[i] / total), 2) if total else 0.0)
+                for i in top_indexes(value, top, self.exists & (self.stock > 0))]
+
+    def sell_through(self, top=None):
+        """
+        Units sold as a share of units sold plus units still in stock.
+        """
+        sold = self._sold()
+        handled = sold + self.stock
+        with numpy.errstate(divide='ignore', invalid='ignore'):
+            rate = numpy.where(handled > 0, sold / handled, 0.0)
+        return [(int(i), self.names[i], int(sold[i]), int(self.stock[i]), round(100.0 * float(rate[i]), 2))
+                for i in top_indexes(rate, top, self.exists & (handled > 0))]
+
+    def report(self, name, top=None):
+        """
+        Returns the rows of a report by name (see HEADERS).
+        """
+        return {
+            'revenue': self.revenue_by_product,
+            'department-revenue': self.revenue_by_department,
+            'valuation': self.stock_valuation,
+            'sell-through': self.sell_through,
+        }[name](top)
+
+def benchmark(conn, top=10, repeat=5):
+    """
+    Times every report in SQL and from the arrays, after the first load and
+    after an incremental refresh with nothing new, checking that both give
+    the same rows. Returns a list of (report, SQL seconds, numpy seconds
+    including the refresh, speedup), and the time of the first load.
+    """
+    engine = SalesAnalytics(conn)
+    load = timed(engine.refresh)
+    results = []
+    for name, sql in SQL_EQUIVALENTS.items():
+        expected = conn.execute(sql, (top,)).fetchall()
+        actual = [(row[0], row[-2] if name in ('revenue', 'department-revenue', 'valuation') else row[-1])
+                  for row in engine.report(name, top)]
+        # Sums of floats come out in a different order, so allow a cent.
+        if ([key for key, _ in actual] != [row[0] for row in expected]
+                or any(abs(value - row[1]) > 0.01 for (_, value), row in zip(actual, expected))):
+            raise AssertionError(f"{name} differs from the SQL version")
+        sql_time = min(timed(lambda: conn.execute(sql, (top,)).fetchall()) for _ in range(repeat))
+        numpy_time = min(timed(lambda: (engine.refresh(), engine.report(name, top))) for _ in range(repeat))
+        results.append((name, sql_time, numpy_time, sql_time / numpy_time))
+    return results, load
+
+def timed(func):
+    """
+    Returns how long one call took, in seconds.
+    """
+    start = time.perf_counter()
+    func()
+    return time.perf_counter() - start
+
+def main():
+    parser = argparse.ArgumentParser(description="Revenue, stock value and sell-through computed with numpy.")
+    parser.add_argument("report", choices=list(HEADERS) + ["benchmark"])
+    parser.add_argument("--top", type=int, help="show only the top N (default: all; 10 for the benchmark)")
+    parser.add_argument("--database", default="business.db", help="database file (default: business.db)")
+    args = parser.parse_args()
+
+    if numpy is None:
+        print("Error: vector_analytics.py needs numpy (pip install numpy).", file=sys.stderr)
+        return
+    if not os.path.exists(args.database):
+        print(f"Error: {args.database} does not exist. Run setup_database.py first.")
+        return
+
+    conn = sqlite3.connect(f"file:{args.database}?mode=ro", uri=True)
+    try:
+        if args.report == "benchmark":
+            results, load = benchmark(conn, args.top or 10)
+            print(f"First load of the arrays: {load * 1000:.1f} ms")
+            table_renderer.render(("Report", "SQL (ms)", "numpy + refresh (ms)", "Speedup"),
+                                  [(name, round(sql * 1000, 2), round(vector * 1000, 2), round(speedup, 1))
+                                   for name, sql, vector, speedup in results], pager=False)
+        else:
+            engine = SalesAnalytics(conn)
+            engine.refresh()
+            if not table_renderer.render(HEADERS[args.report], engine.report(args.report, args.top),
+                                         title=f"{args.report}:"):
+                print("No data for this report.")
+    except sqlite3.Error as e:
+        print(f"An error occurred while running the report: {e}")
+    finally:
+        conn.close()
+
+if __name__ == "__main__":
+    main()
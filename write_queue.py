@@ -0,0 +1,160 @@
+# write_queue.py
+
+import queue
+import threading
+import time
+from concurrent.futures import Future
+
+# Defaults for how long a batch stays open and how many operations it takes.
+DEFAULT_WINDOW_MS = 5
+DEFAULT_BATCH_SIZE = 100
+
+class GroupCommitQueue:
+    """
+    Collects mutations from many threads and commits them together.
+
+    One worker thread owns the connection. It opens a batch with the first
+    queued operation and keeps adding operations until the batch holds
+    batch_size of them or window_ms have passed, then commits the whole batch
+    with a single COMMIT (and fsync). Every operation runs in its own
+    savepoint, so a failing one is rolled back alone and its caller gets the
+    exception while the rest of the batch still commits. Callers get their
+    result only after the commit succeeded.
+    """
+
+    def __init__(self, conn, window_ms=DEFAULT_WINDOW_MS, batch_size=DEFAULT_BATCH_SIZE):
+        self.conn = conn
+        self.window = window_ms / 1000
+        self.batch_size = batch_size
+        self.jobs = queue.Queue()
+        self.lock = threading.Lock()
+        self.started = time.perf_counter()
+        self.commits = 0
+        self.operations = 0
+        self.failed = 0
+        self.max_batch = 0
+        self.commit_seconds = 0.0
+        # Batch sizes grouped into power-of-two buckets: 1, 2, 4, 8, ...
+        self.batch_sizes = {}
+        self.thread = threading.Thread(target=self._run, name="group-commit", daemon=True)
+        self.thread.start()
+
+    def submit(self, func, *args):
+        """
+        Queues func(conn, *args) and returns a Future for its result.
+        func must not commit or roll back itself.
+        """
+        future = Future()
+        self.jobs.put((func, args, future))
+        return future
+
+    def _collect(self):
+        """
+        Waits for the first operation, then gathers more until the batch is
+        full or the window has passed. Returns None when the queue is closed.
+        """
+        first = self.jobs.get()
+        if first is None:
+            return None
+        batch = [first]
+        deadline = time.perf_counter() + self.window
+        while len(batch) < self.batch_size:
+            remaining = deadline - time.perf_counter()
+            try:
+                job = self.jobs.get(timeout=remaining) if remaining > 0 else self.jobs.get_nowait()
+            except queue.Empty:
+                break
+            if job is None:
+                # Finish this batch first, then let _run see the close marker.
+                self.jobs.put(None)
+                break
+            batch.append(job)
+        return batch
+
+    def _run(self):
+        while True:
+            batch = self._collect()
+            if batch is None:
+                break
+            self._apply(batch)
+
+    def _apply(self, batch):
+        """
+        Runs one batch in a single transaction and completes its futures.
+        """
+        conn = self.conn
+        outcomes = []
+        failed = 0
+        try:
+            if conn.in_transaction:
+                conn.commit()
+            conn.execute("BEGIN")
+            for func, args, future in batch:
+                conn.execute("SAVEPOINT queued_write")
+                try:
+                    result = func(conn, *args)
+                    conn.execute("RELEASE queued_write")
+                    outcomes.append((future, result, None))
+                except Exception as e:
+                    conn.execute("ROLLBACK TO queued_write")
+                    conn.execute("RELEASE queued_write")
+                    outcomes.append((future, None, e))
+                    failed += 1
+            commit_start = time.perf_counter()
+            conn.commit()
+            commit_seconds = time.perf_counter() - commit_start
+        except Exception as e:
+            # The batch as a whole failed (for example the COMMIT itself), so
+            # nothing in it was applied.
+            if conn.in_transaction:
+                conn.rollback()
+            for func, args, future in batch:
+                if not future.done():
+                    future.set_exception(e)
+            with self.lock:
+                self.failed += len(batch)
+            return
+
+        with self.lock:
+            self.commits += 1
+            self.operations += len(batch)
+            self.failed += failed
+            self.max_batch = max(self.max_batch, len(batch))
+            self.commit_seconds += commit_seconds
+            bucket = 1 << (len(batch).bit_length() - 1)
+            self.batch_sizes[bucket] = self.batch_sizes.get(bucket, 0) + 1
+        for future, result, error in outcomes:
+            if error is None:
+                future.set_result(result)
+            else:
+                future.set_exception(error)
+
+    def stats(self):
+        """
+        Returns commit and batch metrics since the queue was started.
+        """
+        with self.lock:
+            elapsed = time.perf_counter() - self.started
+            return {
+                'window_ms': self.window * 1000,
+                'batch_size_limit': self.batch_size,
+                'queued': self.jobs.qsize(),
+                'commits': self.commits,
+                'operations': self.operations,
+                'failed': self.failed,
+                'commits_per_sec': round(self.commits / elapsed, 2) if elapsed else 0,
+                'operations_per_sec': round(self.operations / elapsed, 2) if elapsed else 0,
+                'avg_batch_size': round(self.operations / self.commits, 2) if self.commits else 0,
+                'max_batch_size': self.max_batch,
+                'avg_commit_ms': round(self.commit_seconds / self.commits * 1000, 3) if self.commits else 0,
+                'batch_size_histogram': {f"{size}-{size * 2 - 1}" if size > 1 else "1": count
+                                         for size, count in sorted(self.batch_sizes.items())},
+            }
+
+    def close(self):
+        """
+        Commits whatever is still queued, stops the worker and closes the connection.
+        """
+        self.jobs.put(None)
+        self.thread.join()
+        self.conn.close()